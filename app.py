@@ -1,14 +1,34 @@
 
 # app.py
-from PyQt6 import QtWidgets
-import pyqtgraph as pg
+import time
+T_START = time.perf_counter()
+import sys
+from PyQt6 import QtCore, QtWidgets
 from main_window import MainWindow
+T_IMPORTED = time.perf_counter()
 
 def main():
-    app = QtWidgets.QApplication([])
-    pg.setConfigOptions(antialias=True)
+    # --startup-report: print the startup timings and exit once the first plot is up
+    report_only = "--startup-report" in sys.argv
+    app = QtWidgets.QApplication([a for a in sys.argv if a != "--startup-report"])
+    t0 = time.perf_counter()
     win = MainWindow()
+    t_window = time.perf_counter()
     win.show()
+
+    def on_first_paint():
+        t_paint = time.perf_counter()
+        def on_plots_ready():
+            t_plots = time.perf_counter()
+            ms = lambda a, b: (b - a) * 1e3
+            msg = (f"Startup: imports {ms(T_START, T_IMPORTED):.0f} ms, window {ms(t0, t_window):.0f} ms, "
+                   f"first paint {ms(t_window, t_paint):.0f} ms, first plot {ms(t_paint, t_plots):.0f} ms "
+                   f"(time to window {ms(T_START, t_paint):.0f} ms)")
+            win.on_status(msg)
+            if report_only:
+                print(msg); app.quit()
+        QtCore.QTimer.singleShot(0, on_plots_ready)  # queued behind the deferred tab build
+    win.first_paint.connect(on_first_paint)
     app.exec()
 
 if __name__ == "__main__":
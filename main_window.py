@@ -1,17 +1,37 @@
 
 # main_window.py
 from PyQt6 import QtCore, QtWidgets
-from PyQt6.QtCore import QThread
-import pyqtgraph as pg
-from collections import deque
-import serial.tools.list_ports as list_ports
+from PyQt6.QtCore import QThread, pyqtSignal
+import functools, threading
+import numpy as np
 from ondosense.serial_worker import SerialWorker
+from ondosense.manager import SensorManager
 from ondosense.protocol import *
-from widgets.param_table import ParamTable
+from ondosense.series import LodSeries, RingImage
+from ondosense.mailbox import Mailbox, BatchBox
+from ondosense.param_cache import ParamCache
+from ondosense.dsp import IQPipeline
+from ondosense.eventlog import EventLog, INFO, WARNING, ERROR
+from widgets.param_table import ParamTable, PARAMS
+from widgets.render_scheduler import RenderScheduler
+from widgets.lazy_tabs import LazyTabs
+from widgets.log_view import LogView
+
+@functools.lru_cache(maxsize=None)
+def _pg():
+    # pyqtgraph is most of the startup import time; it is loaded when the first plot tab is built
+    import pyqtgraph as pg
+    pg.setConfigOptions(antialias=True)
+    return pg
 
 class MainWindow(QtWidgets.QMainWindow):
+    ports_found = pyqtSignal(list)   # from the port scan thread
+    first_paint = pyqtSignal()       # once, after the window has been painted for the first time
+    request_params = pyqtSignal(list)  # parameter batch for the worker (cache refresh)
+
     def __init__(self):
         super().__init__()
+        self._painted = False
         self.setWindowTitle("OndoSense Monitor + Parameters (Modular v2)")
         self.resize(1280, 820)
 
@@ -19,42 +39,84 @@ class MainWindow(QtWidgets.QMainWindow):
         self.port_cb = QtWidgets.QComboBox()
         self.refresh_btn = QtWidgets.QPushButton("↻")
         self.baud_sb = QtWidgets.QSpinBox(); self.baud_sb.setRange(9600, 921600); self.baud_sb.setValue(19200); self.baud_sb.setSingleStep(9600)
-        self.rate_ds = QtWidgets.QDoubleSpinBox(); self.rate_ds.setRange(0.5, 200); self.rate_ds.setValue(10.0); self.rate_ds.setSuffix(" Hz")
+        self.baud_mode_cb = QtWidgets.QComboBox()
+        for label, mode in (("Fixed", "off"), ("Find", "find"), ("Find + max", "max")): self.baud_mode_cb.addItem(label, mode)
+        self.baud_mode_cb.setToolTip("Fixed: open at PC Baud\nFind: probe standard rates for the sensor's current baud\nFind + max: then step the sensor up to the fastest rate that passes a stress burst")
+        self.rate_ds = QtWidgets.QDoubleSpinBox(); self.rate_ds.setRange(0.5, 2000); self.rate_ds.setValue(10.0); self.rate_ds.setSuffix(" Hz")
         self.timeout_ds = QtWidgets.QDoubleSpinBox(); self.timeout_ds.setRange(0.05, 5.0); self.timeout_ds.setValue(0.5); self.timeout_ds.setSuffix(" s")
+        self.timeout_ds.setToolTip("Upper bound per transaction; polls and parameter reads usually time out much sooner (wire time + margin)")
+        self.margin_sb = QtWidgets.QSpinBox(); self.margin_sb.setRange(0, 2000); self.margin_sb.setValue(30); self.margin_sb.setSuffix(" ms")
+        self.margin_sb.setToolTip("Sensor processing time allowed on top of the wire time before a transaction counts as timed out")
+        self.acq_cb = QtWidgets.QComboBox()
+        for label, mode in (("Timer", "timer"), ("Deadline", "deadline"), ("Free-run", "free")): self.acq_cb.addItem(label, mode)
+        self.acq_cb.setToolTip("Timer: Qt timer (≤200 Hz)\nDeadline: dedicated reader on a precise schedule\nFree-run: next poll as soon as the previous response completes")
         self.rts_chk = QtWidgets.QCheckBox("RTS drives DE/RE")
         self.inv_chk = QtWidgets.QCheckBox("DE active-LOW")
         self.auto_sel_chk = QtWidgets.QCheckBox("Write selector automatically"); self.auto_sel_chk.setChecked(True)
         self.auto_tab_chk = QtWidgets.QCheckBox("Auto-switch to incoming tab"); self.auto_tab_chk.setChecked(False)
+        self.hist_sb = QtWidgets.QSpinBox(); self.hist_sb.setRange(100, 1_000_000); self.hist_sb.setValue(10_000); self.hist_sb.setSingleStep(1000)
+        self.hist_sb.setToolTip("Samples kept per trend (distance, temperature, HP); about 48 bytes each")
+        self.fps_sb = QtWidgets.QSpinBox(); self.fps_sb.setRange(1, 120); self.fps_sb.setValue(30); self.fps_sb.setSuffix(" fps")
+        self.rec_btn = QtWidgets.QPushButton("● Record"); self.rec_btn.setCheckable(True); self.rec_btn.setEnabled(False)
+        self.share_btn = QtWidgets.QPushButton("⇄ Share"); self.share_btn.setCheckable(True)
+        self.share_btn.setToolTip("Publish decoded frames to shared memory 'ondosense' for other local processes (ondosense.shm.FrameReader)")
+        self.server = None  # StreamServer while serving frames on a socket
+        self.serve_btn = QtWidgets.QPushButton("⇶ Serve…"); self.serve_btn.setCheckable(True)
+        self.serve_btn.setToolTip("Stream decoded frames to local clients over TCP or a Unix socket (ondosense.stream)")
         self.connect_btn = QtWidgets.QPushButton("Connect")
         self.disconnect_btn = QtWidgets.QPushButton("Disconnect"); self.disconnect_btn.setEnabled(False)
 
         top = QtWidgets.QHBoxLayout()
         top.addWidget(QtWidgets.QLabel("Port:")); top.addWidget(self.port_cb); top.addWidget(self.refresh_btn)
         top.addSpacing(8)
-        top.addWidget(QtWidgets.QLabel("PC Baud:")); top.addWidget(self.baud_sb)
+        top.addWidget(QtWidgets.QLabel("PC Baud:")); top.addWidget(self.baud_sb); top.addWidget(self.baud_mode_cb)
         top.addWidget(QtWidgets.QLabel("Rate:")); top.addWidget(self.rate_ds)
         top.addWidget(QtWidgets.QLabel("Timeout:")); top.addWidget(self.timeout_ds)
+        top.addWidget(QtWidgets.QLabel("Margin:")); top.addWidget(self.margin_sb)
+        top.addWidget(QtWidgets.QLabel("Acq:")); top.addWidget(self.acq_cb)
+        top.addWidget(QtWidgets.QLabel("History:")); top.addWidget(self.hist_sb)
+        top.addWidget(QtWidgets.QLabel("Display:")); top.addWidget(self.fps_sb)
         top.addSpacing(8)
         top.addWidget(self.rts_chk); top.addWidget(self.inv_chk); top.addWidget(self.auto_sel_chk); top.addWidget(self.auto_tab_chk)
         top.addStretch(1)
-        top.addWidget(self.connect_btn); top.addWidget(self.disconnect_btn)
+        top.addWidget(self.rec_btn); top.addWidget(self.share_btn); top.addWidget(self.serve_btn); top.addWidget(self.connect_btn); top.addWidget(self.disconnect_btn)
+
+        # Replay bar
+        self.replay = None
+        self.replay_btn = QtWidgets.QPushButton("▶ Replay…")
+        self.replay_speed_cb = QtWidgets.QComboBox()
+        for label, speed in (("0.5×", 0.5), ("1×", 1.0), ("2×", 2.0), ("10×", 10.0), ("Max", 0.0)): self.replay_speed_cb.addItem(label, speed)
+        self.replay_speed_cb.setCurrentIndex(1)
+        self.replay_loop_chk = QtWidgets.QCheckBox("Loop")
+        self.replay_pos = QtWidgets.QSlider(QtCore.Qt.Orientation.Horizontal); self.replay_pos.setEnabled(False)
+        self.replay_lbl = QtWidgets.QLabel("")
+        rbar = QtWidgets.QHBoxLayout()
+        rbar.addWidget(self.replay_btn); rbar.addWidget(QtWidgets.QLabel("Speed:")); rbar.addWidget(self.replay_speed_cb)
+        rbar.addWidget(self.replay_loop_chk); rbar.addWidget(self.replay_pos, 1); rbar.addWidget(self.replay_lbl)
+
+        # Log: any thread posts, the view flushes in batches
+        self.events = EventLog()
+        self.log_view = LogView(self.events)
 
         # Tabs (monitor + parameters)
+        self.ports = []
+        self.sensors = SensorManager(self)  # the main sensor plus extra ones on their own ports (Sensors tab)
+        self.sensors.statusmsg.connect(self.on_sensor_status)
+        self.sensors.warnmsg.connect(lambda sid, msg: self.on_sensor_status(sid, msg, WARNING))
+        self.sensors.sensor_state.connect(lambda sid, ok, msg: self.on_sensor_status(sid, msg, INFO if ok else WARNING))
         self.tabs = QtWidgets.QTabWidget()
         self._build_monitor_tabs()
 
         self.param_tab = ParamTable()
         self.tabs.addTab(self.param_tab, "Parameters")
         self.param_tab.setEnabled(False)  # until connected
-
-        # Log
-        self.status_log = QtWidgets.QPlainTextEdit(); self.status_log.setReadOnly(True)
+        self.param_cache = ParamCache(); self.sensor_sn = None
 
         root = QtWidgets.QVBoxLayout()
         root.addLayout(top)
+        root.addLayout(rbar)
         root.addWidget(self.tabs, 1)
-        root.addWidget(QtWidgets.QLabel("Log"))
-        root.addWidget(self.status_log)  # no stretch factor
+        root.addWidget(self.log_view)  # no stretch factor
         # (optional, to ensure the plots get the extra space)
         root.setStretch(root.indexOf(self.tabs), 1)
         w = QtWidgets.QWidget(); w.setLayout(root)
@@ -64,16 +126,29 @@ class MainWindow(QtWidgets.QMainWindow):
         self.thread = QThread(self)
         self.worker = SerialWorker()
         self.worker.moveToThread(self.thread)
+        self.sensors.attach(self.worker, self.thread, "main", owned=False)  # in the Sensors dashboard too
 
         # Connect top controls
         self.refresh_btn.clicked.connect(self.populate_ports)
+        self.ports_found.connect(self.on_ports_found)
         self.connect_btn.clicked.connect(self.on_connect)
         self.disconnect_btn.clicked.connect(self.on_disconnect)
         self.rate_ds.valueChanged.connect(lambda v: self.worker.set_rate(float(v)))
         self.timeout_ds.valueChanged.connect(lambda v: self.worker.set_timeout(float(v)))
+        self.margin_sb.valueChanged.connect(lambda v: self.worker.set_margin(v / 1000.0))
+        self.acq_cb.currentIndexChanged.connect(lambda _: self.worker.set_acq_mode(self.acq_cb.currentData()))
         self.rts_chk.toggled.connect(lambda checked: self.worker.set_rts_options(checked, self.inv_chk.isChecked()))
         self.inv_chk.toggled.connect(lambda checked: self.worker.set_rts_options(self.rts_chk.isChecked(), checked))
         self.auto_sel_chk.toggled.connect(self.on_auto_selector_toggled)
+        self.hist_sb.editingFinished.connect(self.on_history_changed)
+        self.rec_btn.toggled.connect(self.on_record_toggled)
+        self.share_btn.toggled.connect(self.on_share_toggled)
+        self.serve_btn.toggled.connect(self.on_serve_toggled)
+        self.replay_btn.clicked.connect(self.on_replay_clicked)
+        self.replay_speed_cb.currentIndexChanged.connect(lambda _: self.replay and self.replay.set_speed(self.replay_speed_cb.currentData()))
+        self.replay_loop_chk.toggled.connect(lambda checked: self.replay and self.replay.set_loop(checked))
+        self.replay_pos.sliderReleased.connect(lambda: self.replay and self.replay.seek(self.replay_pos.value()))
+        self.fps_sb.valueChanged.connect(lambda v: self.render.set_fps(v))
         self.thread.started.connect(self.worker.start)
 
         # Parameter panel signals
@@ -81,101 +156,225 @@ class MainWindow(QtWidgets.QMainWindow):
         self.param_tab.request_read_min.connect(self.worker.read_min)
         self.param_tab.request_read_max.connect(self.worker.read_max)
         self.param_tab.request_write.connect(self.worker.write_param)
+        self.param_tab.request_batch.connect(self.worker.run_params)
         self.param_tab.request_save.connect(self.worker.save_params)
         self.param_tab.request_autos_amp.connect(self.worker.autoset_amplifier)
         self.param_tab.request_bg_cal.connect(self.worker.bg_cal)
         self.param_tab.request_bg_remove.connect(self.worker.bg_remove)
         self.param_tab.request_restart_hp.connect(self.worker.restart_hp)
         self.param_tab.request_factory.connect(self.worker.factory_reset)
+        self.param_tab.request_factory.connect(lambda: self._refresh_params(None))
+        self.param_tab.request_autos_amp.connect(lambda: self._refresh_params([PARAM_PREAMP_Q, PARAM_PREAMP_I, PARAM_ADCG_Q, PARAM_ADCG_I]))
+        self.request_params.connect(self.worker.run_params)
         # log UI clicks so you can see the button works
         self.param_tab.ui_event.connect(self.on_status)
 
         # Worker → UI
         self.worker.connected.connect(self.on_connected)
-        self.worker.statusmsg.connect(self.on_status)
+        # status text goes straight into the log ring from the worker's thread
+        direct = QtCore.Qt.ConnectionType.DirectConnection
+        self.worker.statusmsg.connect(lambda msg: self.events.post(msg, cat="link"), direct)
+        self.worker.warnmsg.connect(lambda msg: self.events.post(msg, WARNING, "link"), direct)
+        self.worker.tracemsg.connect(lambda msg: self.events.post(msg, cat="trace"), direct)
+        self.log_view.trace_toggled.connect(self.worker.set_trace)
         self.worker.errored.connect(self.on_error)
+        self.worker.polls_missed.connect(lambda n: self.statusBar().showMessage(f"Missed polls: {n}"))
+        self.worker.rate_clamped.connect(self.on_rate_clamped)
         # Param feedback
         self.worker.param_read.connect(self.on_param_read)
         self.worker.param_limits.connect(self.on_param_limits)
         self.worker.param_write.connect(self.on_param_write)
-        # Measurement data
-        self.worker.distance.connect(self.on_distance)
-        self.worker.distance_list.connect(self.on_dlist)
-        self.worker.spectrum.connect(self.on_spectrum)
-        self.worker.iq.connect(self.on_iq)
-        self.worker.peak_list.connect(self.on_peak_list)
-        self.worker.peak.connect(self.on_peak)
-        self.worker.meas_count.connect(self.on_meas_count)
-        self.worker.temperature.connect(self.on_temp)
-        self.worker.high_prec.connect(self.on_high_prec)
+        self.worker.param_batch.connect(self.on_param_batch)
+        self.worker.sensor_id.connect(self.on_sensor_id)
+        # Measurement data: dropped into mailboxes from the worker's thread (no queued events),
+        # drained and drawn by the render scheduler at the display rate
+        self._build_render()
+        self.worker.frame.connect(self.post_frame, QtCore.Qt.ConnectionType.DirectConnection)
 
         self.populate_ports()
 
     # -------- Monitor tabs --------
+    # Pages are created empty; their plots are built the first time each tab is shown, and not
+    # before the window's first paint (see _on_first_paint). Histories exist from the start.
     def _build_monitor_tabs(self):
-        self.tab_dist = QtWidgets.QWidget()
-        self.dist_plot = pg.PlotWidget(title="Distance (m)"); self.dist_plot.showGrid(x=True, y=True, alpha=0.2)
-        self.dist_curve = self.dist_plot.plot(pen=pg.mkPen(width=2))
-        self.dist_series = deque(maxlen=800); self.dist_idx = 0
-        QtWidgets.QVBoxLayout(self.tab_dist).addWidget(self.dist_plot)
-        self.tabs.addTab(self.tab_dist, "Distance")
-
-        self.tab_dlist = QtWidgets.QWidget()
-        self.dlist_plot = pg.PlotWidget(title="Distance list (m)"); self.dlist_plot.showGrid(x=True, y=True, alpha=0.2)
+        self.lazy = LazyTabs(self.tabs, self)
+        self.dist_series = LodSeries(self.hist_sb.value()); self.dist_idx = 0
+        self.temp_series = LodSeries(self.hist_sb.value()); self.temp_idx = 0
+        self.hp_series = LodSeries(self.hist_sb.value()); self.hp_idx = 0
+        self.iq_x = np.arange(0)
+        self.wf_ring = RingImage(2000); self.wf_meta = None
+        self.dsp = IQPipeline(lambda res: None)  # thread starts with the IQ DSP tab
+        self.tab_dist = self.lazy.add("Distance", self._build_dist_tab)
+        self.tab_dlist = self.lazy.add("Distance list", self._build_dlist_tab)
+        self.tab_spec = self.lazy.add("Spectrum", self._build_spec_tab)
+        self.tab_wf = self.lazy.add("Waterfall", self._build_wf_tab)
+        self.tab_iq = self.lazy.add("IQ", self._build_iq_tab)
+        self.tab_dsp = self.lazy.add("IQ DSP", self._build_dsp_tab)
+        self.tab_peaks = self.lazy.add("Peaks", self._build_peaks_tab)
+        self.tab_sys = self.lazy.add("System", self._build_sys_tab)
+        self.tab_multi = self.lazy.add("Sensors", self._build_multi_tab)
+        self.tab_link = self.lazy.add("Link", self._build_link_tab)
+        self.tab_latency = self.lazy.add("Latency", self._build_latency_tab)
+
+    def _plot(self, title: str):
+        plot = _pg().PlotWidget(title=title); plot.showGrid(x=True, y=True, alpha=0.2)
+        return plot
+
+    def _build_dist_tab(self, lay):
+        self.dist_plot = self._plot("Distance (m)")
+        self.dist_curve = self._trend_curve(self.dist_plot, self.dist_series)
+        lay.addWidget(self.dist_plot)
+
+    def _build_dlist_tab(self, lay):
+        self.dlist_plot = self._plot("Distance list (m)")
         self.dlist_curve = self.dlist_plot.plot(stepMode=False, pen=None, symbol='o', symbolSize=6)
-        QtWidgets.QVBoxLayout(self.tab_dlist).addWidget(self.dlist_plot)
-        self.tabs.addTab(self.tab_dlist, "Distance list")
+        lay.addWidget(self.dlist_plot)
 
-        self.tab_spec = QtWidgets.QWidget()
-        self.spec_plot = pg.PlotWidget(title="Spectrum"); self.spec_plot.showGrid(x=True, y=True, alpha=0.2)
+    def _build_spec_tab(self, lay):
+        pg = _pg()
+        self.spec_plot = self._plot("Spectrum")
         self.spec_curve = self.spec_plot.plot(pen=pg.mkPen(width=2))
         self.thr_curve  = self.spec_plot.plot(pen=pg.mkPen(width=1, style=QtCore.Qt.PenStyle.DotLine))
         self.spec_meta = QtWidgets.QLabel("")
-        lay = QtWidgets.QVBoxLayout(self.tab_spec); lay.addWidget(self.spec_plot); lay.addWidget(self.spec_meta)
-        self.tabs.addTab(self.tab_spec, "Spectrum")
+        lay.addWidget(self.spec_plot); lay.addWidget(self.spec_meta)
+
+    def _build_wf_tab(self, lay):
+        _pg()
+        from widgets.waterfall import WaterfallPanel
+        self.wf_panel = WaterfallPanel(self.wf_ring)
+        lay.addWidget(self.wf_panel)
 
-        self.tab_iq = QtWidgets.QWidget()
-        self.iq_plot = pg.PlotWidget(title="IQ"); self.iq_plot.showGrid(x=True, y=True, alpha=0.2)
+    def _build_iq_tab(self, lay):
+        pg = _pg()
+        self.iq_plot = self._plot("IQ")
         self.i_curve = self.iq_plot.plot(pen=pg.mkPen(width=2))
         self.q_curve = self.iq_plot.plot(pen=pg.mkPen(width=2))
-        QtWidgets.QVBoxLayout(self.tab_iq).addWidget(self.iq_plot)
-        self.tabs.addTab(self.tab_iq, "IQ")
-
-        self.tab_peaks = QtWidgets.QWidget()
-        self.peaks_plot = pg.PlotWidget(title="Peaks"); self.peaks_plot.showGrid(x=True, y=True, alpha=0.2)
-        self.peaks_scatter = pg.ScatterPlotItem(size=7); self.peaks_plot.addItem(self.peaks_scatter)
-        QtWidgets.QVBoxLayout(self.tab_peaks).addWidget(self.peaks_plot)
-        self.tabs.addTab(self.tab_peaks, "Peaks")
-
-        self.tab_sys = QtWidgets.QWidget()
-        self.temp_plot = pg.PlotWidget(title="Temperature (°C)"); self.temp_plot.showGrid(x=True, y=True, alpha=0.2)
-        self.temp_curve = self.temp_plot.plot(pen=pg.mkPen(width=2))
-        self.temp_series = deque(maxlen=800); self.temp_idx = 0
-        self.hp_plot = pg.PlotWidget(title="High-precision distance (m)"); self.hp_plot.showGrid(x=True, y=True, alpha=0.2)
-        self.hp_curve = self.hp_plot.plot(pen=pg.mkPen(width=2))
-        self.hp_series = deque(maxlen=800); self.hp_idx = 0
+        lay.addWidget(self.iq_plot)
+
+    def _build_dsp_tab(self, lay):
+        _pg()
+        from widgets.iq_dsp import IQDspPanel
+        self.dsp_panel = IQDspPanel(self.dsp, history=self.hist_sb.value())
+        self.render.add(self.tab_dsp, self.dsp_panel.drain, self.dsp_panel.render)
+        lay.addWidget(self.dsp_panel)
+
+    def _build_peaks_tab(self, lay):
+        self.peaks_plot = self._plot("Peaks")
+        self.peaks_scatter = _pg().ScatterPlotItem(size=7); self.peaks_plot.addItem(self.peaks_scatter)
+        lay.addWidget(self.peaks_plot)
+
+    def _build_sys_tab(self, lay):
+        self.temp_plot = self._plot("Temperature (°C)")
+        self.temp_curve = self._trend_curve(self.temp_plot, self.temp_series)
+        self.hp_plot = self._plot("High-precision distance (m)")
+        self.hp_curve = self._trend_curve(self.hp_plot, self.hp_series)
         self.mc_label = QtWidgets.QLabel("Meas count: —")
-        l = QtWidgets.QVBoxLayout(self.tab_sys)
-        l.addWidget(self.temp_plot); l.addWidget(self.hp_plot); l.addWidget(self.mc_label)
-        self.tabs.addTab(self.tab_sys, "System")
+        lay.addWidget(self.temp_plot); lay.addWidget(self.hp_plot); lay.addWidget(self.mc_label)
+
+    def _build_multi_tab(self, lay):
+        _pg()
+        from widgets.sensor_panel import SensorPanel
+        self.sensor_panel = SensorPanel(self.sensors, history=self.hist_sb.value())
+        self.sensor_panel.set_ports(self.ports)
+        self.ports_found.connect(self.sensor_panel.set_ports)
+        self.render.add(self.tab_multi, self.sensor_panel.drain, self.sensor_panel.render)
+        lay.addWidget(self.sensor_panel)
+
+    def _build_link_tab(self, lay):
+        from widgets.link_stats import LinkStatsPanel
+        self.link_panel = LinkStatsPanel(self.worker)
+        self.link_panel.clamp_chk.toggled.connect(lambda checked: self.worker.set_rate_limit("clamp" if checked else "warn"))
+        lay.addWidget(self.link_panel)
+
+    def _build_latency_tab(self, lay):
+        _pg()
+        from widgets.latency_panel import LatencyPanel
+        self.latency_panel = LatencyPanel(self.worker.link.latency)
+        self.latency_panel.toggled.connect(self.worker.set_latency)
+        self.latency_panel.ui_event.connect(self.on_status)
+        lay.addWidget(self.latency_panel)
+
+    def _build_render(self):
+        self.mb_dist = BatchBox(); self.mb_temp = BatchBox(); self.mb_hp = BatchBox()
+        self.mb_dlist = Mailbox(); self.mb_spec = Mailbox(); self.mb_iq = Mailbox(); self.mb_peaks = Mailbox(); self.mb_count = Mailbox()
+        self.mb_wf = BatchBox(maxlen=self.wf_ring.rows)
+        self.latest = {}; self.hp_lost = None
+        self.render = RenderScheduler(self.tabs, fps=self.fps_sb.value(), parent=self, ready=self.lazy.is_built)
+        r = self.render
+        r.add(self.tab_dist,  self._drain_dist, lambda: self.dist_curve.render())
+        r.add(self.tab_dlist, lambda: self._take(self.mb_dlist, "dlist", self.tab_dlist), lambda: self.on_dlist(self.latest["dlist"]))
+        r.add(self.tab_spec,  lambda: self._take(self.mb_spec, "spec", self.tab_spec), lambda: self.on_spectrum(self.latest["spec"]))
+        r.add(self.tab_wf,    self._drain_wf, lambda: self.wf_panel.render(self.wf_meta))
+        r.add(self.tab_iq,    lambda: self._take(self.mb_iq, "iq", self.tab_iq), lambda: self.on_iq(self.latest["iq"]))
+        r.add(self.tab_peaks, lambda: self._take(self.mb_peaks, "peaks", self.tab_peaks), lambda: self.on_peak_list(self.latest["peaks"]))
+        r.add(self.tab_sys,   lambda: self._take(self.mb_count, "count", self.tab_sys), lambda: self.on_meas_count(self.latest["count"]))
+        r.add(self.tab_sys,   self._drain_temp, lambda: self.temp_curve.render())
+        r.add(self.tab_sys,   self._drain_hp, lambda: self.hp_curve.render())
+
+    def _trend_curve(self, plot, series):
+        # long histories: min/max pyramid, about one point pair per pixel of the visible range
+        from widgets.lod_curve import LodCurve
+        return LodCurve(plot, series, pen=_pg().mkPen(width=2))
+
+    def on_history_changed(self):
+        n = self.hist_sb.value()
+        for series in (self.dist_series, self.temp_series, self.hp_series): series.resize(n)
+        if self.lazy.is_built(self.tab_dist): self.dist_curve.render()
+        if self.lazy.is_built(self.tab_sys):
+            self.temp_curve.render(); self.hp_curve.render()
+        if self.lazy.is_built(self.tab_multi): self.sensor_panel.set_history(n)
+        if self.lazy.is_built(self.tab_dsp): self.dsp_panel.set_history(n)
+
+    # -------- Startup --------
+    def paintEvent(self, e):
+        super().paintEvent(e)
+        if not self._painted:
+            self._painted = True
+            QtCore.QTimer.singleShot(0, self._on_first_paint)
+
+    def closeEvent(self, e):
+        self.sensors.stop_all(); self.dsp.stop(); self.worker.stop_publishing()
+        if self.server: self.server.stop()
+        super().closeEvent(e)
+
+    def _on_first_paint(self):
+        self.first_paint.emit()
+        self.lazy.release()
 
     # -------- Connect / status --------
     def populate_ports(self):
+        # list_ports can take hundreds of ms (USB/Bluetooth enumeration); scan off the GUI thread
+        self.refresh_btn.setEnabled(False)
+        def scan():
+            import serial.tools.list_ports as list_ports
+            try:
+                ports = [p.device for p in list_ports.comports()]
+            except Exception:
+                ports = []
+            self.ports_found.emit(ports)
+        threading.Thread(target=scan, name="ondosense-ports", daemon=True).start()
+
+    def on_ports_found(self, ports: list):
+        self.ports = ports
+        cur = self.port_cb.currentText()
         self.port_cb.clear()
-        ports = [p.device for p in list_ports.comports()]
         self.port_cb.addItems(ports or ["COM3"])
+        if cur in ports: self.port_cb.setCurrentText(cur)
+        self.refresh_btn.setEnabled(self.port_cb.isEnabled())
 
     def on_connect(self):
         cfg = dict(
             port=self.port_cb.currentText(),
             baud=int(self.baud_sb.value()),
+            auto_baud=self.baud_mode_cb.currentData(),
             timeout=float(self.timeout_ds.value()),
+            margin=self.margin_sb.value() / 1000.0,
             rate_hz=float(self.rate_ds.value()),
+            acq_mode=self.acq_cb.currentData(),
             rts_de=self.rts_chk.isChecked(),
             de_active_low=self.inv_chk.isChecked(),
             selector=SEL_DISTANCE,  # start simple
             auto_write_selector=self.auto_sel_chk.isChecked(),
-            pre=0.003, post=0.003,
         )
         self.worker.configure(cfg)
         self.thread.start()
@@ -186,38 +385,170 @@ class MainWindow(QtWidgets.QMainWindow):
         self.thread.wait(2000)
 
     def on_connected(self, ok: bool, msg: str):
-        self.status_log.appendPlainText(msg)
+        self.log(msg, cat="link")
         self.connect_btn.setEnabled(not ok)
         self.disconnect_btn.setEnabled(ok)
         self.port_cb.setEnabled(not ok)
         self.refresh_btn.setEnabled(not ok)
-        self.baud_sb.setEnabled(not ok)
+        self.baud_sb.setEnabled(not ok); self.baud_mode_cb.setEnabled(not ok)
+        if ok: self.baud_sb.setValue(self.worker.cfg["baud"])  # auto baud may have changed it
         self.param_tab.setEnabled(ok)
+        self.rec_btn.setEnabled(ok)
+        if not ok: self.rec_btn.setChecked(False)
         if not ok:
-            self._reset_plots()
+            self._reset_plots(); self.sensor_sn = None
+
+    def on_record_toggled(self, checked: bool):
+        if not checked:
+            self.worker.stop_recording(); return
+        default = QtCore.QDateTime.currentDateTime().toString("'ondosense_'yyyyMMdd_HHmmss'.osr'")
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Record raw frames", default, "OndoSense capture (*.osr)")
+        if not path:
+            self.rec_btn.blockSignals(True); self.rec_btn.setChecked(False); self.rec_btn.blockSignals(False); return
+        self.worker.start_recording(path)
+
+    def on_share_toggled(self, checked: bool):
+        # stays on across reconnects, so readers can keep the block mapped
+        if not checked:
+            self.worker.stop_publishing(); return
+        if not self.worker.start_publishing():
+            self.share_btn.blockSignals(True); self.share_btn.setChecked(False); self.share_btn.blockSignals(False)
+
+    def on_serve_toggled(self, checked: bool):
+        if not checked:
+            srv, self.server = self.server, None
+            if srv: srv.stop()
+            return
+        from ondosense.stream import StreamServer, DEFAULT_ADDRESS
+        addr, ok = QtWidgets.QInputDialog.getText(self, "Serve frames", "Address (host:port or unix:/path):", text=DEFAULT_ADDRESS)
+        if ok and addr.strip():
+            try:
+                self.server = StreamServer(addr.strip(), log=lambda msg: self.events.post(msg, cat="stream")).start()
+                return
+            except (OSError, ValueError) as e:
+                self.log(f"Serving failed: {e}", WARNING, "stream")
+        self.serve_btn.blockSignals(True); self.serve_btn.setChecked(False); self.serve_btn.blockSignals(False)
+
+    # -------- Replay --------
+    def on_replay_clicked(self):
+        if self.replay:
+            self._end_replay(); return
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Replay capture", "", "OndoSense capture (*.osr)")
+        if not path: return
+        from ondosense.replay import ReplayWorker
+        self._reset_plots()
+        rp = ReplayWorker(path, speed=self.replay_speed_cb.currentData(), loop=self.replay_loop_chk.isChecked())
+        rp.statusmsg.connect(lambda msg: self.log(msg, cat="replay"))
+        rp.connected.connect(self.on_replay_state)
+        rp.position.connect(self.on_replay_position)
+        rp.frame.connect(self.post_frame, QtCore.Qt.ConnectionType.DirectConnection)
+        self.replay = rp
+        rp.start()
+
+    def on_replay_state(self, ok: bool, msg: str):
+        self.log(msg, cat="replay")
+        self.connect_btn.setEnabled(not ok)  # the replay owns the plots until it ends
+        self.replay_pos.setEnabled(ok)
+        self.replay_btn.setText("■ Stop replay" if ok else "▶ Replay…")
+        if not ok: self._end_replay()
+
+    def on_replay_position(self, i: int, n: int):
+        if self.replay_pos.isSliderDown(): return
+        self.replay_pos.blockSignals(True); self.replay_pos.setRange(0, n); self.replay_pos.setValue(i); self.replay_pos.blockSignals(False)
+        self.replay_lbl.setText(f"{i}/{n}")
+
+    def _end_replay(self):
+        rp, self.replay = self.replay, None
+        if rp is None: return
+        rp.connected.disconnect(self.on_replay_state)
+        rp.stop()
+        self.connect_btn.setEnabled(True); self.replay_pos.setEnabled(False); self.replay_btn.setText("▶ Replay…")
+
+    def on_rate_clamped(self, hz: float):
+        self.rate_ds.blockSignals(True); self.rate_ds.setValue(hz); self.rate_ds.blockSignals(False)
 
     def on_auto_selector_toggled(self, checked: bool):
         if checked and self.disconnect_btn.isEnabled():
             self.worker.set_selector(self.worker.cfg.get("selector", SEL_DISTANCE))
 
     def _reset_plots(self):
-        self.dist_series.clear(); self.dist_idx = 0; self.dist_curve.setData([])
-        self.dlist_curve.setData([], [])
-        self.spec_curve.setData([], []); self.thr_curve.setData([], []); self.spec_meta.setText("")
-        self.i_curve.setData([], []); self.q_curve.setData([], [])
-        self.peaks_scatter.setData([], [])
-        self.temp_series.clear(); self.temp_idx = 0; self.temp_curve.setData([])
-        self.hp_series.clear(); self.hp_idx = 0; self.hp_curve.setData([]); self.mc_label.setText("Meas count: —")
+        for box in (self.mb_dist, self.mb_temp, self.mb_hp, self.mb_dlist, self.mb_spec, self.mb_iq, self.mb_peaks, self.mb_count, self.mb_wf):
+            box.clear()
+        self.latest.clear(); self.hp_lost = None
+        self.dist_series.clear(); self.dist_idx = 0
+        self.temp_series.clear(); self.temp_idx = 0
+        self.hp_series.clear(); self.hp_idx = 0
+        self.wf_ring.clear(); self.wf_meta = None
+        built = self.lazy.is_built
+        if built(self.tab_dist): self.dist_curve.render()
+        if built(self.tab_dlist): self.dlist_curve.setData([], [])
+        if built(self.tab_spec): self.spec_curve.setData([], []); self.thr_curve.setData([], []); self.spec_meta.setText("")
+        if built(self.tab_wf): self.wf_panel.clear()
+        if built(self.tab_dsp): self.dsp_panel.clear()
+        if built(self.tab_iq): self.i_curve.setData([], []); self.q_curve.setData([], [])
+        if built(self.tab_peaks): self.peaks_scatter.setData([], [])
+        if built(self.tab_sys): self.temp_curve.render(); self.hp_curve.render(); self.mc_label.setText("Meas count: —")
+
+    # -------- Parameter cache --------
+    # The table is filled from the cache as soon as the serial number is known; only limits
+    # never seen and values that are missing or invalidated go on the bus.
+    def on_sensor_id(self, sn):
+        self.sensor_sn = sn
+        self.param_tab.clear_values()
+        if sn is None:
+            self.log("Serial number read failed: parameter cache not used", WARNING); return
+        cache = self.param_cache
+        known = cache.known(sn)
+        cache.set_value(sn, PARAM_BAUD, self.worker.cfg["baud"])  # neither survives a power cycle,
+        if self.worker.cfg["auto_write_selector"]:                  # but both were just set by us
+            cache.set_value(sn, PARAM_SELECTOR, self.worker.cfg["selector"])
+        self.param_tab.apply_batch(cache.results(sn))
+        ops = cache.pending(sn, [p.pid for p in PARAMS])
+        self.log(f"Sensor SN {sn}: {'cached' if known else 'new'}, {len(ops)} parameter reads needed")
+        if ops: self.request_params.emit(ops)
+
+    def _cache_results(self, results):
+        if self.sensor_sn is None: return
+        self.param_cache.update(self.sensor_sn, results)
+        self._save_cache()
+
+    def _save_cache(self):
+        try:
+            self.param_cache.save()
+        except OSError as e:
+            self.log(f"Parameter cache not saved: {e}", WARNING)
+
+    def _refresh_params(self, pids):
+        # invalidate (all values if pids is None) and queue a re-read behind the command that changed them
+        sn = self.sensor_sn
+        if sn is None: return
+        self.param_cache.invalidate(sn, pids)
+        self._save_cache()
+        self.request_params.emit([(CMD_READ_PARAM, p.pid) for p in PARAMS] if pids is None else [(CMD_READ_PARAM, pid) for pid in pids])
 
     # -------- Parameter callbacks --------
     def on_param_read(self, pid: int, val: int):
         self.param_tab.set_value(pid, val)
-        self.status_log.appendPlainText(f"Read 0x{pid:02X} = {val}")
+        self._cache_results([(CMD_READ_PARAM, pid, STATUS_SUCCESS, val)])
+        self.log(f"Read 0x{pid:02X} = {val}", cat="param")
 
     def on_param_limits(self, pid: int, mn, mx):
         self.param_tab.set_limits(pid, mn=mn, mx=mx)
-        if mn is not None: self.status_log.appendPlainText(f"Min 0x{pid:02X} = {mn}")
-        if mx is not None: self.status_log.appendPlainText(f"Max 0x{pid:02X} = {mx}")
+        if mn is not None: self._cache_results([(CMD_READ_MIN, pid, STATUS_SUCCESS, mn)])
+        if mx is not None: self._cache_results([(CMD_READ_MAX, pid, STATUS_SUCCESS, mx)])
+        if mn is not None: self.log(f"Min 0x{pid:02X} = {mn}", cat="param")
+        if mx is not None: self.log(f"Max 0x{pid:02X} = {mx}", cat="param")
+
+    def on_param_batch(self, results: list):
+        self.param_tab.apply_batch(results)
+        if not any(st < 0 for _, _, st, _ in results):  # a timeout or short read: nothing from this batch is trusted
+            self._cache_results(results)
+        if self.sensor_sn is not None and any(st not in STATUS_OK for _, _, st, _ in results):
+            self.param_cache.invalidate(self.sensor_sn); self._save_cache()  # re-read everything on the next connect
+        names = {CMD_READ_PARAM: "Read", CMD_READ_MIN: "Min", CMD_READ_MAX: "Max", CMD_WRITE_PARAM: "Write"}
+        bad = [f"{names.get(cmd, cmd)} 0x{pid:02X}" + (f" (0x{st:02X})" if st >= 0 else " (no reply)")
+               for cmd, pid, st, _ in results if st not in STATUS_OK]
+        if bad: self.log("Failed: " + ", ".join(bad), WARNING, "param")
 
     def on_param_write(self, pid: int, ok: bool, status: int):
         STATUS_TEXT = {
@@ -233,54 +564,100 @@ class MainWindow(QtWidgets.QMainWindow):
             0xF8: "Error in distance calculation module"
         }
         desc = STATUS_TEXT.get(status, f"0x{status:02X}")
-        self.status_log.appendPlainText(f"Write 0x{pid:02X} -> {'OK' if ok else f'FAIL ({desc})'}")
+        self.log(f"Write 0x{pid:02X} -> {'OK' if ok else f'FAIL ({desc})'}", INFO if ok else WARNING, "param")
+        if pid == PARAM_BAUD:
+            if ok and self.sensor_sn is not None: self.param_cache.set_value(self.sensor_sn, pid, self.worker.cfg["baud"]); self._save_cache()
+        else:
+            self._refresh_params([pid])  # the sensor may have clamped or rejected it
 
     # -------- Measurement handlers --------
     def maybe_switch(self, widget):
         if self.auto_tab_chk.isChecked():
             self.tabs.setCurrentWidget(widget)
 
-    def on_status(self, msg: str): self.status_log.appendPlainText(msg)
-    def on_error(self, err: str): self.status_log.appendPlainText(f"ERROR: {err}"); self.on_disconnect()
-
-    def on_distance(self, meters: float):
-        self.dist_series.append((self.dist_idx, meters)); self.dist_idx += 1
-        xs, ys = zip(*self.dist_series) if self.dist_series else ([], [])
-        self.dist_curve.setData(xs, ys); self.maybe_switch(self.tab_dist)
-
-    def on_dlist(self, vals_m: list):
-        xs = list(range(1, len(vals_m)+1))
-        self.dlist_curve.setData(xs, vals_m); self.maybe_switch(self.tab_dlist)
+    def log(self, msg: str, level: int = INFO, cat: str = "app"):
+        self.events.post(msg, level, cat)
+    def on_status(self, msg: str): self.log(msg)
+    def on_sensor_status(self, sid: int, msg: str, level: int = INFO):
+        s = self.sensors.sensors.get(sid)
+        if s is not None and not s.owned: return  # the main sensor: logged under "link" already
+        self.log(f"[{s.name if s else f'sensor {sid}'}] {msg}", level, "sensors")
+    def on_error(self, err: str): self.log(err, ERROR, "link"); self.on_disconnect()
+
+    # runs in the acquisition thread: only hand the datasets over, never touch widgets here
+    def post_frame(self, fr):
+        if fr.distance is not None: self.mb_dist.put(fr.distance)
+        if fr.temperature is not None: self.mb_temp.put(fr.temperature)
+        if fr.high_prec is not None: self.mb_hp.put(fr.high_prec)
+        if fr.distance_list is not None: self.mb_dlist.put(fr.distance_list)
+        if fr.spectrum is not None: self.mb_spec.put(fr.spectrum); self.mb_wf.put(fr.spectrum)
+        if fr.iq is not None:
+            self.mb_iq.put(fr.iq)
+            if self.dsp.running: self.dsp.submit(fr)
+        if fr.meas_count is not None: self.mb_count.put(fr.meas_count)
+        if fr.peak is not None: self.mb_peaks.put({"freq": [fr.peak["freq"]], "amp": [fr.peak["amp"]]})
+        elif fr.peak_list is not None: self.mb_peaks.put(fr.peak_list)
+        srv = self.server
+        if srv is not None: srv.write(fr)
+
+    # latest-value channel: keep only the newest frame since the last display tick
+    def _take(self, box, key, tab) -> bool:
+        v = box.take()
+        if v is None: return False
+        self.latest[key] = v; self.maybe_switch(tab)
+        return True
+
+    # batched scalar channels: append everything that arrived since the last display tick
+    def _drain_dist(self) -> bool:
+        ys = self.mb_dist.drain()
+        if not ys: return False
+        self.dist_series.extend(np.arange(self.dist_idx, self.dist_idx + len(ys)), ys); self.dist_idx += len(ys)
+        self.maybe_switch(self.tab_dist)
+        return True
+
+    def _drain_temp(self) -> bool:
+        ys = self.mb_temp.drain()
+        if not ys: return False
+        self.temp_series.extend(np.arange(self.temp_idx, self.temp_idx + len(ys)), ys); self.temp_idx += len(ys)
+        self.maybe_switch(self.tab_sys)
+        return True
+
+    def _drain_hp(self) -> bool:
+        ds = self.mb_hp.drain()
+        if not ds: return False
+        self.hp_series.extend(np.arange(self.hp_idx, self.hp_idx + len(ds)), [d["d_m"] for d in ds]); self.hp_idx += len(ds)
+        lost = ds[-1]["lost"]
+        if lost != self.hp_lost:  # log HP lock changes, not every sample
+            self.hp_lost = lost; self.log(f"HP lost={lost}")
+        self.maybe_switch(self.tab_sys)
+        return True
+
+    def _drain_wf(self) -> bool:
+        ds = self.mb_wf.drain()
+        if not ds: return False
+        n = len(ds[-1]["mag"])
+        if all(len(d["mag"]) == n for d in ds): self.wf_ring.extend(np.stack([d["mag"] for d in ds]))
+        else:
+            for d in ds: self.wf_ring.extend(d["mag"])  # bin count changed mid-batch: the ring starts over
+        self.wf_meta = ds[-1]["meta"]
+        return True
+
+    def on_dlist(self, vals_m: object):
+        self.dlist_curve.setData(np.arange(1, len(vals_m)+1), vals_m)
 
     def on_spectrum(self, d: object):
         self.spec_curve.setData(d['freq'], d['mag'])
         self.thr_curve.setData(d['freq'], d['thr'])
         m = d['meta']; self.spec_meta.setText(f"bins={m['count']} maxHz={m['maxHz']} dHz={m['dHz']} ampl={m['ampl']}")
-        self.maybe_switch(self.tab_spec)
 
     def on_iq(self, d: object):
         I = d["I"]; Q = d["Q"]
-        self.i_curve.setData(list(range(len(I))), I)
-        self.q_curve.setData(list(range(len(Q))), Q)
-        self.maybe_switch(self.tab_iq)
+        if len(self.iq_x) != len(I): self.iq_x = np.arange(len(I))
+        self.i_curve.setData(self.iq_x, I)
+        self.q_curve.setData(self.iq_x, Q)
 
     def on_peak_list(self, d: object):
-        spots = [{'pos': (d["freq"][i], d["amp"][i])} for i in range(len(d["freq"]))]
-        self.peaks_scatter.setData(spots); self.maybe_switch(self.tab_peaks)
-
-    def on_peak(self, d: object):
-        self.peaks_scatter.setData([{'pos': (d["freq"], d["amp"])}]); self.maybe_switch(self.tab_peaks)
+        self.peaks_scatter.setData(x=d["freq"], y=d["amp"])
 
     def on_meas_count(self, c: int):
-        self.mc_label.setText(f"Meas count: {c}"); self.maybe_switch(self.tab_sys)
-
-    def on_temp(self, t_c: float):
-        self.temp_series.append((self.temp_idx, t_c)); self.temp_idx += 1
-        xs, ys = zip(*self.temp_series) if self.temp_series else ([], [])
-        self.temp_curve.setData(xs, ys); self.maybe_switch(self.tab_sys)
-
-    def on_high_prec(self, d: object):
-        self.hp_series.append((self.hp_idx, d["d_m"])); self.hp_idx += 1
-        xs, ys = zip(*self.hp_series) if self.hp_series else ([], [])
-        self.hp_curve.setData(xs, ys)
-        self.status_log.appendPlainText(f"HP lost={d['lost']}"); self.maybe_switch(self.tab_sys)
+        self.mc_label.setText(f"Meas count: {c}")
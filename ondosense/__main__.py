@@ -0,0 +1,4 @@
+# python -m ondosense: headless logger (see cli.py)
+from .cli import main
+
+main()
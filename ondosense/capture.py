@@ -0,0 +1,143 @@
+# ondosense/capture.py
+# Raw capture files. Two append-only files per session:
+#   <name>.osr      file header, then per poll: record header + raw CMD_MEASUREMENT response bytes
+#   <name>.osr.idx  file header, then one fixed 32-byte entry per record (mmap/NumPy friendly)
+# The .osr alone is enough to rebuild the index (rebuild_index) if a session ended uncleanly;
+# CaptureReader indexes whatever the .idx does not cover in memory.
+import mmap, os, queue, struct, threading, time
+import numpy as np
+
+DATA_MAGIC = b"OSCAPv01"
+INDEX_MAGIC = b"OSIDXv01"
+FILE_HDR = struct.Struct("<8sd16x")        # magic, created (epoch s)  -> 32 bytes
+REC_HDR = struct.Struct("<IIdIH2x")        # length, seq, t, baud, selector -> 24 bytes
+IDX_ENTRY = struct.Struct("<QdIIIH2x")     # payload offset, t, length, seq, baud, selector -> 32 bytes
+IDX_DTYPE = np.dtype([("offset", "<u8"), ("t", "<f8"), ("length", "<u4"), ("seq", "<u4"),
+                      ("baud", "<u4"), ("selector", "<u2"), ("_pad", "<u2")])
+assert IDX_DTYPE.itemsize == IDX_ENTRY.size
+
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+class FrameRecorder:
+    # write() only copies the bytes and queues them; a background thread does the file I/O
+    def __init__(self, path: str, max_queue: int = 4096, flush_s: float = 1.0):
+        self.path = path
+        self.flush_s = flush_s
+        self.frames = 0; self.bytes = 0; self.dropped = 0
+        self._q = queue.Queue(max_queue)
+        self._thread = None
+
+    def start(self):
+        now = time.time()
+        self._data = open(self.path, "wb"); self._data.write(FILE_HDR.pack(DATA_MAGIC, now))
+        self._idx = open(index_path(self.path), "wb"); self._idx.write(FILE_HDR.pack(INDEX_MAGIC, now))
+        self._off = FILE_HDR.size
+        self._thread = threading.Thread(target=self._run, name="ondosense-rec", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, seq: int, t: float, selector: int, baud: int, payload):
+        try:
+            self._q.put_nowait((seq, t, selector, baud, bytes(payload)))
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        if self._thread is None: return
+        self._q.put(None); self._thread.join(); self._thread = None
+        self._data.close(); self._idx.close()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._q.get(timeout=self.flush_s)
+            except queue.Empty:
+                item = ()
+            if item is None: break
+            if item:
+                seq, t, selector, baud, payload = item
+                n = len(payload)
+                self._data.write(REC_HDR.pack(n, seq & 0xFFFFFFFF, t, baud, selector)); self._data.write(payload)
+                self._idx.write(IDX_ENTRY.pack(self._off + REC_HDR.size, t, n, seq & 0xFFFFFFFF, baud, selector))
+                self._off += REC_HDR.size + n
+                self.frames += 1; self.bytes += n
+            now = time.monotonic()
+            if now - last_flush >= self.flush_s:
+                self._data.flush(); self._idx.flush(); last_flush = now
+
+class CaptureReader:
+    # Random access by record number or time; payloads are zero-copy memoryviews into the mmap.
+    # Never writes: records the .idx does not cover yet (a recording still running, or one that
+    # ended uncleanly) are indexed in memory from the .osr.
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = open(path, "rb")
+        self._mm = mmap.mmap(self._fd.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.created = FILE_HDR.unpack_from(self._mm, 0)
+        if magic != DATA_MAGIC:
+            self._mm.close(); self._fd.close()
+            raise ValueError(f"{path}: not an OndoSense capture")
+        self._ifd = self._imm = None
+        index = np.zeros(0, IDX_DTYPE)
+        ipath = index_path(path)
+        if os.path.exists(ipath) and os.path.getsize(ipath) >= FILE_HDR.size + IDX_ENTRY.size:
+            self._ifd = open(ipath, "rb")
+            self._imm = mmap.mmap(self._ifd.fileno(), 0, access=mmap.ACCESS_READ)
+            n = (len(self._imm) - FILE_HDR.size) // IDX_ENTRY.size
+            index = np.frombuffer(self._imm, IDX_DTYPE, n, FILE_HDR.size)
+            # the two files are flushed separately: drop entries whose payload is not on disk yet
+            index = index[:int(np.searchsorted(index["offset"] + index["length"], len(self._mm), "right"))]
+        off = int(index["offset"][-1] + index["length"][-1]) if len(index) else FILE_HDR.size
+        if off < len(self._mm):
+            index = np.concatenate([index, _scan(self._mm, off)])
+        self.index = index
+        self._view = memoryview(self._mm)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i: int):
+        e = self.index[i]; off = int(e["offset"])
+        return float(e["t"]), int(e["seq"]), int(e["selector"]), int(e["baud"]), self._view[off:off + int(e["length"])]
+
+    def find_time(self, t: float) -> int:
+        # first record at or after t (epoch seconds)
+        return int(np.searchsorted(self.index["t"], t, side="left"))
+
+    @property
+    def duration(self) -> float:
+        return float(self.index["t"][-1] - self.index["t"][0]) if len(self) else 0.0
+
+    def close(self):
+        self.index = None; self._view.release()
+        self._mm.close(); self._fd.close()
+        if self._imm is not None: self._imm.close(); self._ifd.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _scan(data, off: int) -> np.ndarray:
+    # index entries for the complete records in data from off on (a torn last record is left out)
+    rows = []
+    while off + REC_HDR.size <= len(data):
+        length, seq, t, baud, selector = REC_HDR.unpack_from(data, off)
+        if off + REC_HDR.size + length > len(data): break
+        rows.append((off + REC_HDR.size, t, length, seq, baud, selector, 0))
+        off += REC_HDR.size + length
+    return np.array(rows, dtype=IDX_DTYPE)
+
+def rebuild_index(path: str) -> int:
+    # rewrite the .idx from the .osr; only for a capture no recorder is writing to
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, created = FILE_HDR.unpack_from(data, 0)
+    if magic != DATA_MAGIC: raise ValueError(f"{path}: not an OndoSense capture")
+    index = _scan(data, FILE_HDR.size)
+    with open(index_path(path), "wb") as out:
+        out.write(FILE_HDR.pack(INDEX_MAGIC, created)); out.write(index.tobytes())
+    return len(index)
@@ -0,0 +1,222 @@
+# ondosense/cli.py
+# Headless logger: python -m ondosense --port /dev/ttyUSB0 --baud 115200 --selector distance,temperature
+# Streams decoded measurements as text, CSV or NDJSON. Deliberately imports nothing from Qt.
+import argparse, json, sys, threading, time
+from . import protocol
+from .protocol import *
+from .frame import FIELDS
+from .link import SensorLink, Poller
+
+SELECTOR_NAMES = {name: bit for bit, name in FIELDS.items()}
+PARAM_NAMES = {k[len("PARAM_"):].lower(): v for k, v in vars(protocol).items() if k.startswith("PARAM_")}
+
+def parse_selector(text: str) -> int:
+    # "18", "0x12" or "spectrum,distance"
+    try:
+        return int(text, 0)
+    except ValueError:
+        pass
+    mask = 0
+    for name in text.replace("+", ",").split(","):
+        name = name.strip().lower()
+        if name not in SELECTOR_NAMES:
+            raise argparse.ArgumentTypeError(f"unknown dataset {name!r} (choose from {', '.join(SELECTOR_NAMES)})")
+        mask |= SELECTOR_NAMES[name]
+    return mask
+
+def parse_param(text: str) -> tuple[int, int]:
+    # "0x43=50" or "meas_rate=50"
+    pid, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected PID=VALUE, got {text!r}")
+    pid = pid.strip().lower()
+    try:
+        pid = PARAM_NAMES[pid] if pid in PARAM_NAMES else int(pid, 0)
+        return pid, int(value, 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad parameter {text!r}") from None
+
+# ------------- output formats -------------
+CSV_COLUMNS = {
+    SEL_PEAK: ("peak_freq", "peak_amp"),
+    SEL_DISTANCE_LIST: ("distance_list",),
+    SEL_DISTANCE: ("distance",),
+    SEL_MEAS_COUNT: ("meas_count",),
+    SEL_TEMPERATURE: ("temperature",),
+    SEL_HIGH_PREC: ("hp_distance", "hp_lost"),
+}
+
+def _csv_values(bit: int, v) -> tuple:
+    if v is None: return ("",) * len(CSV_COLUMNS[bit])
+    if bit == SEL_PEAK: return (f"{v['freq']:.2f}", v["amp"])
+    if bit == SEL_DISTANCE_LIST: return (" ".join(f"{d:.6f}" for d in v),)
+    if bit == SEL_HIGH_PREC: return (f"{v['d_m']:.6f}", v["lost"])
+    if isinstance(v, float): return (f"{v:.6f}" if bit == SEL_DISTANCE else f"{v:.2f}",)
+    return (v,)
+
+class CsvWriter:
+    # one row per frame; array datasets (IQ, spectrum, peak list) have no CSV form and are skipped
+    def __init__(self, out, selector: int):
+        self.out = out
+        self.bits = [b for b in selected_datasets(selector) if b in CSV_COLUMNS]
+        cols = ["seq", "t"] + [c for b in self.bits for c in CSV_COLUMNS[b]]
+        out.write(",".join(cols) + "\n")
+
+    def __call__(self, fr):
+        row = [str(fr.seq), f"{fr.t:.6f}"]
+        for b in self.bits:
+            row.extend(str(x) for x in _csv_values(b, fr.get(b)))
+        self.out.write(",".join(row) + "\n")
+
+def _jsonable(v):
+    if hasattr(v, "tolist"): return v.tolist()
+    if isinstance(v, dict): return {k: _jsonable(x) for k, x in v.items()}
+    return v
+
+class NdjsonWriter:
+    def __init__(self, out, selector: int):
+        self.out = out
+
+    def __call__(self, fr):
+        rec = {"seq": fr.seq, "t": fr.t, "selector": fr.selector,
+               "status": {FIELDS[b]: s for b, s in fr.status.items()}}
+        for b, v in fr.items():
+            rec[FIELDS[b]] = _jsonable(v)
+        self.out.write(json.dumps(rec, separators=(",", ":")) + "\n")
+
+class TextWriter:
+    def __init__(self, out, selector: int):
+        self.out = out
+
+    def __call__(self, fr):
+        parts = [f"#{fr.seq}"]
+        for b, v in fr.items():
+            if b in CSV_COLUMNS:
+                parts.extend(f"{c}={x}" for c, x in zip(CSV_COLUMNS[b], _csv_values(b, v)))
+            else:
+                n = len(v["freq"]) if b != SEL_IQ else len(v["I"])
+                parts.append(f"{FIELDS[b]}=[{n}]")
+        self.out.write(" ".join(parts) + "\n")
+
+WRITERS = {"text": TextWriter, "csv": CsvWriter, "ndjson": NdjsonWriter}
+
+# ------------- main -------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m ondosense", description="Headless OndoSense logger")
+    ap.add_argument("--port", required=True)
+    ap.add_argument("--baud", type=int, default=19200)
+    ap.add_argument("--auto-baud", default="off", choices=("off", "find", "max"),
+                    help="find: probe for the sensor's baud; max: then step up to the fastest stable rate")
+    ap.add_argument("--selector", type=parse_selector, default=SEL_DISTANCE,
+                    help="bitmask or dataset names, e.g. 144 or distance,meas_count")
+    ap.add_argument("--no-write-selector", action="store_true", help="poll with the selector the sensor already has (read from it; --selector is only the fallback)")
+    ap.add_argument("--param", type=parse_param, action="append", default=[], metavar="PID=VALUE",
+                    help="write a parameter before streaming (hex PID or name, repeatable)")
+    ap.add_argument("--mode", default="free", choices=("free", "deadline"),
+                    help="free: poll as fast as the link allows; deadline: poll at --rate")
+    ap.add_argument("--rate", type=float, default=10.0, help="poll rate for --mode deadline (Hz)")
+    ap.add_argument("--timeout", type=float, default=0.5, help="upper bound per transaction (s)")
+    ap.add_argument("--margin", type=float, default=30.0, metavar="MS", help="sensor processing time allowed on top of the wire time")
+    ap.add_argument("--clamp-rate", action="store_true", help="lower --rate to what the link can carry instead of warning")
+    ap.add_argument("--rts-de", action="store_true", help="drive RS-485 DE from RTS")
+    ap.add_argument("--de-active-low", action="store_true")
+    ap.add_argument("--format", default="text", choices=tuple(WRITERS))
+    ap.add_argument("-o", "--output", help="output file (default: stdout)")
+    ap.add_argument("--flush", type=float, default=1.0, metavar="SEC", help="flush the output every SEC seconds")
+    ap.add_argument("--duration", type=float, default=0.0, metavar="SEC", help="stop after SEC seconds")
+    ap.add_argument("--count", type=int, default=0, help="stop after this many frames")
+    ap.add_argument("--record", metavar="PATH", help="also record raw responses to a capture file")
+    ap.add_argument("--shm", nargs="?", const="ondosense", metavar="NAME",
+                    help="also publish frames to shared memory NAME (default ondosense) for ondosense.shm.FrameReader")
+    ap.add_argument("--serve", nargs="?", const="127.0.0.1:5605", metavar="ADDRESS",
+                    help="also stream frames to socket clients on ADDRESS (host:port or unix:/path, default 127.0.0.1:5605)")
+    ap.add_argument("--latency", metavar="PATH", help="time every poll phase; print a summary and write the histograms (JSON) to PATH")
+    ap.add_argument("-v", "--verbose", action="store_true", help="log link traffic to stderr")
+    a = ap.parse_args(argv)
+
+    log = (lambda msg: print(msg, file=sys.stderr)) if a.verbose else None
+    warn = (lambda msg: print(f"warning: {msg}", file=sys.stderr)) if a.verbose else None
+    link = SensorLink(dict(port=a.port, baud=a.baud, auto_baud=a.auto_baud, selector=a.selector, rate_hz=max(0.5, a.rate),
+                           acq_mode=a.mode, timeout=max(0.05, a.timeout), margin=max(0.0, a.margin) / 1000.0,
+                           rts_de=a.rts_de, de_active_low=a.de_active_low, rate_limit="clamp" if a.clamp_rate else "warn"), log=log, warn=warn, trace=log)
+    try:
+        link.open()
+    except Exception as e:
+        link.close()
+        sys.exit(f"Open failed: {e}")
+    if a.auto_baud != "off": print(f"Using {link.cfg['baud']} baud", file=sys.stderr)
+    out = open(a.output, "w", newline="") if a.output else sys.stdout
+    server = None  # StreamServer with --serve
+    try:
+        if a.no_write_selector:
+            sel = link.read_param(PARAM_SELECTOR)  # responses only parse with the selector the sensor uses
+            if sel is None: print(f"warning: could not read the sensor's selector, assuming {a.selector}", file=sys.stderr)
+            else: link.cfg["selector"] = sel
+            if not link.cfg["selector"]: print("warning: the sensor's selector is 0, nothing to poll", file=sys.stderr)
+        elif not link.write_selector(a.selector):
+            print(f"warning: selector write {a.selector} not acknowledged", file=sys.stderr)
+        for pid, value in a.param:
+            ok, status = link.write_param(pid, value)
+            if not ok: print(f"warning: write 0x{pid:02X}={value} failed (status {status})", file=sys.stderr)
+        rate = link.cfg["rate_hz"]; rate_checked = False
+        def check_rate():
+            # the budget depends on the IQ/spectrum sizes, known once the first response is in
+            nonlocal rate_checked
+            if not link.sizes_known(): return
+            rate_checked = True; mx = link.max_rate()
+            if a.mode == "deadline" and rate > mx and not a.verbose:
+                print(f"warning: {rate:g} Hz exceeds the link budget of {mx:.1f} Hz ({sum(link.poll_bytes())} bytes/poll at {link.cfg['baud']} baud)"
+                      + (f", clamped to {link.cfg['rate_hz']:.1f} Hz" if a.clamp_rate else ""), file=sys.stderr)
+        link.check_rate(); check_rate()
+        if a.record:
+            from .capture import FrameRecorder
+            link.recorder = FrameRecorder(a.record).start()
+        if a.shm:
+            from .shm import FramePublisher
+            link.publisher = FramePublisher(a.shm)
+        if a.serve:
+            from .stream import StreamServer
+            server = StreamServer(a.serve, log=lambda msg: print(msg, file=sys.stderr)).start()
+
+        write = WRITERS[a.format](out, link.cfg["selector"])
+        done = threading.Event()
+        frames = 0
+        def on_frame(fr):
+            nonlocal frames
+            if done.is_set(): return
+            if not rate_checked: check_rate()
+            if server: server.write(fr)
+            write(fr); frames += 1
+            if a.count and frames >= a.count: done.set()
+        link.latency.enabled = bool(a.latency)
+        poller = Poller(link, on_frame)
+        t0 = time.perf_counter()
+        poller.start()
+        end = t0 + a.duration if a.duration > 0 else None
+        try:
+            while not done.is_set():
+                wait = a.flush if end is None else min(a.flush, end - time.perf_counter())
+                if wait <= 0 or done.wait(wait): break
+                out.flush()
+        except KeyboardInterrupt:
+            pass
+        poller.stop()
+        dt = time.perf_counter() - t0
+        st = link.stats
+        print(f"{frames} frames in {dt:.1f} s ({frames / max(dt, 1e-9):.1f}/s), {st.polls} polls, {st.timeouts} timeouts"
+              + (f", {st.garbled} garbled, {st.resynced} resynced" if st.garbled or st.resynced else "")
+              + (f", {st.missed} missed" if a.mode == "deadline" else "")
+              + (f", {st.skipped} measurements skipped, {st.repeats} repeated" if st.last_count is not None else "")
+              + f"; link budget {link.max_rate():.1f} polls/s", file=sys.stderr)
+        if a.latency:
+            print(link.latency.format(), file=sys.stderr)
+            link.latency.dump(a.latency)
+    finally:
+        rec = link.recorder; link.recorder = None
+        if rec: rec.stop()
+        pub = link.publisher; link.publisher = None
+        if pub: pub.close()
+        if server: server.stop()
+        link.close()
+        out.flush()
+        if out is not sys.stdout: out.close()
@@ -0,0 +1,76 @@
+# ondosense/decode.py
+# Dataset decoders. Each takes a buffer positioned just past the dataset's status byte and
+# returns the payload; array payloads are copied out so the receive buffer can be reused.
+import functools, struct
+import numpy as np
+from .protocol import *
+
+_U16 = struct.Struct(">H"); _U32 = struct.Struct(">I"); _I32 = struct.Struct(">i"); _I16 = struct.Struct(">h")
+_SPEC_HDR = struct.Struct(">HIII")
+_PEAK = struct.Struct(">IHI")
+
+PEAK_DTYPE = np.dtype([("freq", ">u4"), ("res", ">u2"), ("amp", ">u4")])  # centi-Hz, reserved, amplitude
+
+@functools.lru_cache(maxsize=32)
+def freq_axis(count: int, maxHz: int, dHz: int) -> np.ndarray:
+    f = (maxHz - (count - 1) * dHz) + dHz * np.arange(count, dtype=np.float64)
+    f.flags.writeable = False  # shared between frames
+    return f
+
+def decode_iq(buf, off: int) -> dict:
+    cnt = _U16.unpack_from(buf, off)[0]
+    raw = np.frombuffer(buf, np.uint8, 2 * cnt, off + 2).copy()
+    return {"I": raw[0::2], "Q": raw[1::2]}
+
+def decode_spectrum(buf, off: int) -> dict:
+    cnt, maxHz, dHz, ampl = _SPEC_HDR.unpack_from(buf, off); off += 14
+    mt = np.frombuffer(buf, np.uint8, 2 * cnt, off).copy()
+    return {"freq": freq_axis(cnt, maxHz, dHz), "mag": mt[:cnt], "thr": mt[cnt:],
+            "meta": {"count": cnt, "maxHz": maxHz, "dHz": dHz, "ampl": ampl}}
+
+def decode_peak_list(buf, off: int) -> dict:
+    c, idx = buf[off], buf[off + 1]
+    pk = np.frombuffer(buf, PEAK_DTYPE, c, off + 2)
+    return {"freq": pk["freq"] / 100.0, "amp": pk["amp"].astype(np.uint32), "idx": idx}
+
+def decode_peak(buf, off: int) -> dict:
+    f_centi, _, amp = _PEAK.unpack_from(buf, off)
+    return {"freq": f_centi / 100.0, "amp": amp}
+
+def decode_distance_list(buf, off: int):
+    c = buf[off]
+    return np.frombuffer(buf, ">u4", c, off + 2) / 1e6 if c else None
+
+def decode_distance(buf, off: int) -> float:
+    return _U32.unpack_from(buf, off)[0] / 1e6
+
+def decode_meas_count(buf, off: int) -> int:
+    return _U32.unpack_from(buf, off)[0]
+
+def decode_temperature(buf, off: int) -> float:
+    return _I16.unpack_from(buf, off)[0] / 100.0
+
+def decode_high_prec(buf, off: int) -> dict:
+    return {"d_m": _I32.unpack_from(buf, off + 1)[0] / 1e6, "lost": buf[off]}
+
+DECODERS = {
+    SEL_IQ: decode_iq, SEL_SPECTRUM: decode_spectrum, SEL_PEAK_LIST: decode_peak_list,
+    SEL_PEAK: decode_peak, SEL_DISTANCE_LIST: decode_distance_list, SEL_DISTANCE: decode_distance,
+    SEL_MEAS_COUNT: decode_meas_count, SEL_TEMPERATURE: decode_temperature, SEL_HIGH_PREC: decode_high_prec,
+}
+
+def decode_response(buf, fr) -> int:
+    # Decode a complete CMD_MEASUREMENT response for fr.selector into fr; returns bytes consumed
+    pos = 0; end = len(buf)
+    for bit in selected_datasets(fr.selector):
+        if pos >= end: break
+        st = buf[pos]; pos += 1
+        fr.status[bit] = st
+        if st not in STATUS_OK: continue
+        h = DATASET_HEADER[bit]
+        if pos + h > end: break
+        n = h + dataset_body_size(bit, buf, pos)
+        if pos + n > end: break
+        fr.set(bit, DECODERS[bit](buf, pos))
+        pos += n
+    return pos
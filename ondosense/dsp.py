@@ -0,0 +1,135 @@
+# ondosense/dsp.py
+# Host-side processing of SEL_IQ frames: windowed FFT, peak search and distance, all vectorised
+# over a batch of frames. IQPipeline runs it on a background thread so the polling and GUI
+# threads only queue frames and pick up results.
+# The beat frequency of a target is hz_per_m * distance (the sensor's ramp slope); fs_hz is the
+# IQ sample rate. Both are sensor-variant settings, defaults match the simulator.
+import functools, queue, threading, time
+import numpy as np
+
+DEFAULTS = {
+    "fs_hz": 25600.0,   # IQ sample rate
+    "hz_per_m": 2000.0, # beat frequency per metre
+    "window": "hann",   # hann | hamming | blackman | rect
+    "pad": 2,           # FFT length = next power of two >= pad * samples
+    "peaks": 3,         # strongest peaks reported per frame
+    "snr_db": 12.0,     # peaks must stand this far above the median bin
+}
+
+_WINDOWS = {"hann": np.hanning, "hamming": np.hamming, "blackman": np.blackman, "rect": np.ones}
+
+@functools.lru_cache(maxsize=16)
+def window(kind: str, n: int) -> np.ndarray:
+    w = _WINDOWS[kind](n).astype(np.float32)
+    w.flags.writeable = False
+    return w
+
+def nfft_for(n: int, pad: int) -> int:
+    return 1 << max(1, int(np.ceil(np.log2(max(2, n * max(1, pad))))))
+
+def process_iq(I: np.ndarray, Q: np.ndarray, opts: dict = DEFAULTS) -> dict:
+    # I, Q: (frames, samples) raw uint8 around 128. Returns arrays over the batch:
+    #   freq (bins,)            positive-frequency axis in Hz, shared by every frame
+    #   mag (frames, bins)      |FFT| of the windowed, DC-free signal
+    #   peak_freq, peak_amp     (frames, peaks), strongest first, NaN/0 where there is none
+    #   distance (frames,)      strongest peak / hz_per_m, NaN when there is none
+    n = I.shape[1]; nfft = nfft_for(n, opts["pad"]); k = opts["peaks"]
+    x = (I.astype(np.float32) - 128.0) + 1j * (Q.astype(np.float32) - 128.0)
+    x -= x.mean(axis=1, keepdims=True)
+    x *= window(opts["window"], n)
+    mag = np.abs(np.fft.fft(x, nfft, axis=1)[:, :nfft // 2 + 1]).astype(np.float32)
+    freq = np.arange(nfft // 2 + 1) * (opts["fs_hz"] / nfft)
+
+    # local maxima above the per-frame noise floor; bins 0 and last have no two neighbours
+    mid = mag[:, 1:-1]
+    floor = np.median(mag, axis=1, keepdims=True) * 10 ** (opts["snr_db"] / 20)
+    is_pk = (mid > mag[:, :-2]) & (mid >= mag[:, 2:]) & (mid > floor)
+    cand = np.where(is_pk, mid, 0.0)
+    k = min(k, cand.shape[1])
+    top = np.argpartition(cand, -k, axis=1)[:, -k:]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(cand, top, axis=1), axis=1), axis=1)
+    amp = np.take_along_axis(cand, top, axis=1)
+
+    # parabolic interpolation on log magnitude for the sub-bin position
+    b = top + 1; rows = np.arange(len(mag))[:, None]
+    lm = np.log(np.maximum(mag, 1e-12))
+    a, c, m = lm[rows, b - 1], lm[rows, b + 1], lm[rows, b]
+    den = a - 2 * m + c
+    delta = np.where(den < 0, 0.5 * (a - c) / np.where(den < 0, den, 1.0), 0.0)
+    pf = np.where(amp > 0, (b + delta) * (opts["fs_hz"] / nfft), np.nan)
+    return {"freq": freq, "mag": mag, "peak_freq": pf, "peak_amp": amp,
+            "distance": pf[:, 0] / opts["hz_per_m"] if k else np.full(len(mag), np.nan)}
+
+class IQPipeline:
+    # submit() only queues the frame (called from the polling thread); the worker thread takes
+    # everything queued at once, runs one process_iq() per run of equal-length frames and hands
+    # each result to on_result on that thread. A full queue drops the new frame (counted).
+    # Each result carries the sensor's own distance/peak/spectrum from the same frame, so host
+    # and sensor processing can be compared side by side.
+    def __init__(self, on_result, max_queue: int = 1024, max_batch: int = 256, **opts):
+        self.on_result = on_result
+        self.opts = dict(DEFAULTS, **opts)
+        self.max_batch = max_batch
+        self.frames = self.batches = self.dropped = 0; self.busy_ns = 0
+        self._q = queue.Queue(max_queue)
+        self._thread = None
+
+    def configure(self, **opts):
+        # takes effect from the next batch
+        self.opts = dict(self.opts, **opts)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ondosense-dsp", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None: return
+        self._q.put(None); self._thread.join(); self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def submit(self, fr):
+        if fr.iq is None: return
+        try:
+            self._q.put_nowait(fr)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            frames = [self._q.get()]
+            while len(frames) < self.max_batch:
+                try:
+                    frames.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = frames[-1] is None
+            if stop: frames.pop()
+            start = 0
+            for i in range(1, len(frames) + 1):  # one batch per run of equal sample counts
+                if i == len(frames) or len(frames[i].iq["I"]) != len(frames[start].iq["I"]):
+                    if len(frames[start].iq["I"]) > 2: self._batch(frames[start:i])
+                    start = i
+            if stop: break
+
+    def _batch(self, frames: list):
+        t0 = time.perf_counter_ns(); opts = self.opts
+        res = process_iq(np.stack([f.iq["I"] for f in frames]), np.stack([f.iq["Q"] for f in frames]), opts)
+        self.busy_ns += time.perf_counter_ns() - t0
+        self.frames += len(frames); self.batches += 1
+        freq = res["freq"]; freq.flags.writeable = False
+        for j, fr in enumerate(frames):
+            ok = res["peak_amp"][j] > 0
+            self.on_result({"seq": fr.seq, "t": fr.t, "freq": freq, "mag": res["mag"][j], "hz_per_m": opts["hz_per_m"],
+                            "peaks": {"freq": res["peak_freq"][j][ok], "amp": res["peak_amp"][j][ok]},
+                            "distance": None if np.isnan(res["distance"][j]) else float(res["distance"][j]),
+                            "sensor": {"distance": fr.distance, "peak": fr.peak, "spectrum": fr.spectrum}})
+
+    def stats(self) -> dict:
+        return {"frames": self.frames, "batches": self.batches, "dropped": self.dropped, "queued": self._q.qsize(),
+                "batch_mean": self.frames / self.batches if self.batches else 0.0,
+                "us_per_frame": self.busy_ns / 1e3 / self.frames if self.frames else 0.0}
@@ -0,0 +1,71 @@
+# ondosense/eventlog.py
+# Bounded, leveled message log shared by every thread. post() checks the category's level before
+# doing anything else, so disabled messages cost one dict lookup. Accepted records go into a ring
+# (oldest dropped and counted when nobody drains it) and, if one is open, a rotating log file.
+# A viewer takes everything pending with one drain() per refresh instead of one call per message.
+import collections, logging, logging.handlers, threading, time
+
+DEBUG, INFO, WARNING, ERROR = logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# category -> what goes there
+CATEGORIES = {
+    "link": "connection, commands, polling",
+    "trace": "hex dumps of command frames (TX/RX)",
+    "param": "parameter reads and writes",
+    "sensors": "extra sensors (Sensors tab)",
+    "replay": "capture replay",
+    "stream": "socket streaming server and its clients",
+    "app": "cache, HP lock, UI actions",
+}
+
+class EventLog:
+    def __init__(self, capacity: int = 10_000, level: int = INFO):
+        self.level = level
+        self.enabled = {c: c != "trace" for c in CATEGORIES}  # trace only when asked for
+        self.dropped = 0  # records pushed out of the ring before anyone drained them
+        self._ring = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._file = None
+        self._logger = logging.getLogger(f"ondosense.events.{id(self):x}")
+        self._logger.propagate = False; self._logger.setLevel(DEBUG)
+
+    def wants(self, cat: str, level: int = INFO) -> bool:
+        return level >= ERROR or (level >= self.level and self.enabled.get(cat, True))
+
+    def post(self, msg: str, level: int = INFO, cat: str = "app"):
+        # any thread; errors are never filtered out
+        if not self.wants(cat, level): return
+        rec = (time.time(), level, cat, msg)
+        with self._lock:
+            if len(self._ring) == self._ring.maxlen: self.dropped += 1
+            self._ring.append(rec)
+        if self._file is not None: self._logger.log(level, "[%s] %s", cat, msg)
+
+    def drain(self) -> tuple[list, int]:
+        # (records oldest first, records dropped since the last drain)
+        with self._lock:
+            recs = list(self._ring); self._ring.clear()
+            dropped, self.dropped = self.dropped, 0
+        return recs, dropped
+
+    # ------------- file output -------------
+    def open_file(self, path: str, max_bytes: int = 5_000_000, backups: int = 3):
+        self.close_file()
+        h = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        h.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(message)s"))
+        self._logger.addHandler(h); self._file = path
+
+    def close_file(self):
+        for h in list(self._logger.handlers):
+            self._logger.removeHandler(h); h.close()
+        self._file = None
+
+    @property
+    def file(self) -> str | None:
+        return self._file
+
+def format_record(rec) -> str:
+    t, level, cat, msg = rec
+    stamp = time.strftime("%H:%M:%S", time.localtime(t)) + f".{int(t * 1000) % 1000:03d}"
+    return f"{stamp} {msg}" if level < WARNING else f"{stamp} {LEVEL_NAMES.get(level, level)}: {msg}"
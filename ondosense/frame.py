@@ -0,0 +1,40 @@
+# ondosense/frame.py
+from .protocol import *
+
+# selector bit -> MeasurementFrame attribute
+FIELDS = {
+    SEL_IQ: "iq", SEL_SPECTRUM: "spectrum", SEL_PEAK_LIST: "peak_list", SEL_PEAK: "peak",
+    SEL_DISTANCE_LIST: "distance_list", SEL_DISTANCE: "distance", SEL_MEAS_COUNT: "meas_count",
+    SEL_TEMPERATURE: "temperature", SEL_HIGH_PREC: "high_prec",
+}
+
+class MeasurementFrame:
+    # Every dataset decoded from one CMD_MEASUREMENT response. Datasets that were not selected,
+    # or came back with a non-success status (see `status`), stay None.
+    __slots__ = ("seq", "t", "selector", "status") + tuple(FIELDS.values())
+
+    def __init__(self, seq: int, t: float, selector: int):
+        self.seq = seq            # poll sequence number (gaps = polls that produced nothing)
+        self.t = t                # time.time() when the command was sent
+        self.selector = selector
+        self.status = {}          # bit -> status byte, for every dataset that got one
+        self.iq = self.spectrum = self.peak_list = self.peak = self.distance_list = None
+        self.distance = self.meas_count = self.temperature = self.high_prec = None
+
+    def set(self, bit: int, value):
+        setattr(self, FIELDS[bit], value)
+
+    def get(self, bit: int):
+        return getattr(self, FIELDS[bit])
+
+    def items(self):
+        # (bit, value) for each dataset present, in wire order
+        for bit in SEL_ORDER:
+            v = getattr(self, FIELDS[bit])
+            if v is not None: yield bit, v
+
+    def __bool__(self):
+        return any(getattr(self, f) is not None for f in FIELDS.values())
+
+    def __repr__(self):
+        return f"MeasurementFrame(seq={self.seq}, " + ", ".join(f"{FIELDS[b]}=…" if not isinstance(v, (int, float)) else f"{FIELDS[b]}={v}" for b, v in self.items()) + ")"
@@ -0,0 +1,98 @@
+# ondosense/latency.py
+# Per-phase timing of poll transactions. Phases are measured with perf_counter_ns on the
+# polling thread and binned into log-linear histograms (4 bins per octave, at most 25 % wide),
+# so recording one sample is a few integer operations and memory stays fixed however long it
+# runs. SensorLink only takes timestamps while `enabled` is set.
+import json, time
+
+SUB = 2                 # log2 of bins per octave
+NBINS = 64 << SUB       # covers any 64-bit nanosecond count
+
+# transaction phases in wire order; dataset payloads ("payload <field>") go between
+# first_byte and decode
+PHASES = ("pre_tx", "write", "post_tx", "first_byte", "decode", "emit", "total")
+
+def bin_of(ns: int) -> int:
+    s = ns.bit_length() - SUB - 1
+    return ns if s <= 0 else (s << SUB) + (ns >> s)
+
+def bin_edges(b: int) -> tuple[int, int]:
+    # [low, high) in ns of histogram bin b
+    if b < 2 << SUB: return b, b + 1
+    s = (b >> SUB) - 1; m = b - (s << SUB)
+    return m << s, (m + 1) << s
+
+class Histogram:
+    __slots__ = ("bins", "count", "total", "max")
+
+    def __init__(self):
+        self.bins = [0] * NBINS
+        self.count = self.total = self.max = 0
+
+    def add(self, ns: int):
+        if ns < 0: ns = 0
+        self.bins[bin_of(ns)] += 1
+        self.count += 1; self.total += ns
+        if ns > self.max: self.max = ns
+
+    def percentile(self, q: float) -> int:
+        # upper edge of the bin holding the q-th fraction of samples (never under-reports)
+        if not self.count: return 0
+        want = q * self.count; seen = 0
+        for b, n in enumerate(self.bins):
+            seen += n
+            if n and seen >= want: return min(bin_edges(b)[1], self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class LatencyStats:
+    # Histograms by phase name. add() is called from the polling thread only; readers get a
+    # consistent-enough view without locking (a sample may land between two reads).
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.hists = {}
+        self.t_reset = time.time()
+
+    def reset(self):
+        self.hists = {}; self.t_reset = time.time()
+
+    def add(self, phase: str, ns: int):
+        h = self.hists.get(phase)
+        if h is None: h = self.hists[phase] = Histogram()
+        h.add(ns)
+
+    def phases(self) -> list:
+        # recorded phase names in transaction order (payloads in the order they were first seen)
+        names = list(self.hists)  # one C-level copy: add() may insert from the polling thread
+        seen = {p: i for i, p in enumerate(names)}
+        def key(p):
+            if p.startswith("payload "): return PHASES.index("first_byte") + 0.5, seen[p]
+            return (PHASES.index(p) if p in PHASES else len(PHASES)), seen[p]
+        return sorted(names, key=key)
+
+    def summary(self) -> list:
+        # (phase, count, mean, p50, p90, p99, max) with times in µs
+        out = []
+        for p in self.phases():
+            h = self.hists[p]
+            out.append((p, h.count, h.mean() / 1e3, h.percentile(0.5) / 1e3, h.percentile(0.9) / 1e3,
+                        h.percentile(0.99) / 1e3, h.max / 1e3))
+        return out
+
+    def format(self) -> str:
+        lines = [f"{'phase':<24}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (µs)"]
+        for p, n, mean, p50, p90, p99, mx in self.summary():
+            lines.append(f"{p:<24}{n:>8}{mean:>10.1f}{p50:>10.1f}{p90:>10.1f}{p99:>10.1f}{mx:>10.1f}")
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        # JSON: summary per phase plus the non-empty bins as [low_ns, high_ns, count]
+        phases = {}
+        for p, n, mean, p50, p90, p99, mx in self.summary():
+            h = self.hists[p]
+            phases[p] = {"count": n, "mean_us": mean, "p50_us": p50, "p90_us": p90, "p99_us": p99, "max_us": mx,
+                         "bins": [[*bin_edges(b), c] for b, c in enumerate(h.bins) if c]}
+        with open(path, "w") as f:
+            json.dump({"since": self.t_reset, "dumped": time.time(), "phases": phases}, f, indent=1)
@@ -0,0 +1,649 @@
+# ondosense/link.py
+# Qt-free RS-485 transport: opens the port and runs one protocol transaction at a time.
+# SerialWorker wraps it for the GUI; the headless logger (python -m ondosense) uses it directly.
+import os, select, serial, struct, threading, time
+from .protocol import *
+from .decode import DECODERS
+from .frame import MeasurementFrame, FIELDS
+from .latency import LatencyStats
+from .parser import ResponseParser
+
+DEFAULT_CFG = {
+    "port": "COM3",
+    "baud": 19200,
+    "timeout": 0.5,  # upper bound for any single transaction
+    "margin": 0.03,  # sensor processing time allowed on top of the wire time (see _budget)
+    "rate_hz": 10.0,
+    "rts_de": False,
+    "de_active_low": False,
+    "pre": None, "post": None,  # RS-485 DE lead/hold in seconds; None = TURNAROUND_CHARS character times
+    "selector": SEL_DISTANCE,
+    "auto_write_selector": True,
+    "acq_mode": "timer",  # timer | deadline | free (see Poller)
+    "gap_chars": 32,  # line silence (in character times) that ends a response
+    "auto_baud": "off",  # off | find (probe for the sensor's baud) | max (find, then step up; see negotiate_baud)
+    "stress_reads": 200,  # PARAM_SN reads a rate must pass during negotiate_baud
+    "rate_limit": "warn",  # warn | clamp: what check_rate does when rate_hz exceeds the link budget
+}
+
+TURNAROUND_CHARS = 1.5
+PAYLOAD_PHASE = {bit: f"payload {name}" for bit, name in FIELDS.items()}  # LatencyStats phase per dataset
+
+def char_time(baud: int) -> float:
+    # 8N1: start + 8 data + stop bits per byte
+    return 10.0 / int(baud)
+
+def read_exact(ser: serial.Serial, n: int, overall_timeout: float) -> bytes:
+    end = time.monotonic() + overall_timeout
+    fd = getattr(ser, "fd", None)
+    out = bytearray()
+    saved = ser.timeout
+    try:
+        while len(out) < n:
+            left = end - time.monotonic()
+            if left <= 0: break
+            # block on the descriptor instead of spinning; without one (Windows) pyserial blocks
+            # for ser.timeout, so that is cut down to what is left of the deadline
+            if fd is not None:
+                if not select.select([fd], [], [], left)[0]: break
+            else:
+                ser.timeout = left
+            chunk = ser.read(min(n - len(out), max(1, ser.in_waiting)))
+            if chunk: out.extend(chunk)
+    finally:
+        if ser.timeout != saved: ser.timeout = saved
+    return bytes(out)
+
+def hexdump(data: bytes) -> str:
+    return " ".join(f"{b:02X}" for b in data)
+
+class LinkStats:
+    # Counters that tell link, host and sensor losses apart. Written by whichever thread polls,
+    # read by anyone (plain ints: a reader may be one poll behind).
+    #   timeouts: polls whose response was missing or cut short (link)
+    #   garbled:  responses that failed the parser's checks (link noise, wrong baud)
+    #   resynced: responses found behind leftover bytes of an earlier one (each cost one frame)
+    #   missed:   scheduled polls that could not be issued in time (host; see Poller)
+    #   skipped:  sensor measurements nobody fetched, from meas_count steps > 1 (polling too slow)
+    #   repeats:  polls that returned a meas_count already seen (polling faster than the sensor)
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.polls = self.frames = self.timeouts = self.missed = self.garbled = self.resynced = 0
+        self.skipped = self.repeats = self.measurements = 0
+        self.last_count = None
+        self._snap = (time.perf_counter(), 0, 0, 0)
+
+    def meas_count(self, mc: int):
+        last = self.last_count; self.last_count = mc
+        if last is None: return
+        d = (mc - last) & 0xFFFFFFFF
+        if d == 0: self.repeats += 1
+        elif d < 0x80000000:  # larger steps mean the counter went backwards (sensor restart)
+            self.skipped += d - 1; self.measurements += d
+
+    def snapshot(self) -> dict:
+        # totals, plus rates since the previous snapshot() call
+        now = time.perf_counter()
+        t0, p0, f0, m0 = self._snap
+        dt = now - t0
+        self._snap = (now, self.polls, self.frames, self.measurements)
+        rate = lambda n: n / dt if dt > 0 else 0.0
+        return {"polls": self.polls, "frames": self.frames, "timeouts": self.timeouts, "missed": self.missed,
+                "garbled": self.garbled, "resynced": self.resynced,
+                "skipped": self.skipped, "repeats": self.repeats, "meas_count": self.last_count,
+                "polls_hz": rate(self.polls - p0), "frames_hz": rate(self.frames - f0),
+                "meas_hz": rate(self.measurements - m0)}
+
+class SensorLink:
+    def __init__(self, cfg: dict | None = None, log=None, warn=None, trace=None):
+        self.cfg = dict(DEFAULT_CFG)
+        if cfg: self.cfg.update(cfg)
+        self.log = log or (lambda msg: None)  # status messages, same wording as the GUI log
+        self.warn = warn or self.log          # failures and budget warnings
+        self.trace = trace                    # hex dumps of command frames; None skips building them
+        self.ser = None
+        self.busy = False  # guard re-entrancy
+        self.lock = threading.RLock()  # one transaction on the wire at a time
+        self.parser = ResponseParser()
+        self.seq = 0
+        self.recorder = None
+        self.publisher = None  # FramePublisher (ondosense.shm): decoded frames for other processes
+        self.sn = None  # PARAM_SN, once discover_baud has seen it
+        self.stats = LinkStats()
+        self.counts = {}  # largest item count seen per ITEM_BYTES dataset (IQ samples, spectrum bins, ...)
+        self._warned = None
+        self.on_clamp = lambda hz: None  # called with the new rate_hz when check_rate clamps it
+        self.latency = LatencyStats()  # per-phase poll timings, recorded while latency.enabled
+        self._suspect = False  # last response was cut short or garbled: its tail may still arrive
+
+    # ------------- port -------------
+    def open(self):
+        self.sn = None
+        self.stats.reset(); self.counts = {}; self._warned = None
+        self._open_serial(self.cfg["baud"])
+        if self.cfg["rts_de"]:
+            self._set_rts(False)
+        mode = self.cfg["auto_baud"]
+        if mode != "off":
+            if self.discover_baud() is None:
+                raise serial.SerialException(f"no sensor answered on {self.cfg['port']} at any of {', '.join(map(str, BAUD_RATES))} baud")
+            if mode == "max": self.negotiate_baud()
+
+    def close(self):
+        with self.lock:  # let a transaction in flight on another thread finish first
+            try:
+                if self.ser: self.ser.close()
+            except Exception:
+                pass
+            self.ser = None
+
+    def set_timeout(self, sec: float):
+        self.cfg["timeout"] = max(0.05, float(sec))
+        if self.ser: self.ser.timeout = self.cfg["timeout"]
+
+    def set_margin(self, sec: float):
+        self.cfg["margin"] = max(0.0, float(sec))
+
+    def set_rts_options(self, rts_de: bool, active_low: bool):
+        self.cfg["rts_de"] = bool(rts_de)
+        self.cfg["de_active_low"] = bool(active_low)
+        if self.ser and self.cfg["rts_de"]:
+            self._set_rts(False)
+
+    # ------------- parameter ops -------------
+    def read_param(self, pid: int) -> int | None:
+        return self._read_value(CMD_READ_PARAM, pid, "Read", "short value", "Read error")
+
+    def read_limit(self, pid: int, cmd: int) -> int | None:
+        return self._read_value(cmd, pid, "Limit", "short", "Limit error")
+
+    def _read_value(self, cmd: int, pid: int, what: str, short: str, err: str) -> int | None:
+        if not self.ser:
+            self.warn("Not connected"); return None
+        with self.lock:
+            self.busy = True
+            try:
+                end = time.monotonic() + self._budget(5, 2)
+                self._pre_tx(); self.ser.reset_input_buffer()
+                self.ser.write(bytes([cmd, pid])); self.ser.flush()
+                self._post_tx()
+                st_b = read_exact(self.ser, 1, end - time.monotonic())
+                if len(st_b)==1 and st_b[0] in STATUS_OK:
+                    val_b = read_exact(self.ser, 4, end - time.monotonic())
+                    if len(val_b)==4:
+                        return struct.unpack(">i", val_b)[0]
+                    self.warn(f"{what} 0x{pid:02X}: {short}")
+                else:
+                    self.warn(f"{what} 0x{pid:02X}: no status")
+            except Exception as e:
+                self.warn(f"{err} 0x{pid:02X}: {e}")
+            finally:
+                self.busy = False
+        return None
+
+    def write_param(self, pid: int, value: int) -> tuple[bool, int]:
+        # (ok, status byte or -1)
+        if not self.ser:
+            self.warn("Not connected"); return False, -1
+        if pid == PARAM_BAUD:
+            ok = self.set_sensor_baud(int(value))
+            return ok, (STATUS_SUCCESS if ok else -1)
+        with self.lock:
+            self.busy = True
+            try:
+                end = time.monotonic() + self._budget(1, 6)
+                self._pre_tx()
+                self.ser.reset_input_buffer()
+                frame = bytes([CMD_WRITE_PARAM, pid]) + struct.pack(">i", int(value))
+                if self.trace: self.trace(f"TX write 0x{pid:02X} ({len(frame)}): {hexdump(frame)}")
+                self.ser.write(frame); self.ser.flush()
+                self._post_tx()
+
+                ack = read_exact(self.ser, 1, end - time.monotonic())
+                if self.trace: self.trace(f"RX ack: {hexdump(ack) if ack else '(none)'}")
+                ok = len(ack)==1 and ack[0] in STATUS_OK
+                return ok, (ack[0] if ack else -1)
+            except Exception as e:
+                self.warn(f"Write error 0x{pid:02X}: {e}")
+                return False, -1
+            finally:
+                self.busy = False
+
+    def param_batch(self, ops) -> list:
+        # ops: (CMD_READ_PARAM | CMD_READ_MIN | CMD_READ_MAX, pid) or (CMD_WRITE_PARAM, pid, value)
+        # Runs them back-to-back under one lock hold with no per-op log lines. Returns
+        # (cmd, pid, status, value) per op: status is -1 when nothing (or too little) came back,
+        # value is None unless a read succeeded. After such an op the line is drained until it
+        # goes quiet, so a late reply cannot be read as the next op's; if it never does, the
+        # remaining ops are not sent and come back with status -1.
+        if not self.ser:
+            self.warn("Not connected"); return []
+        out = []
+        with self.lock:
+            self.busy = True
+            try:
+                for k, op in enumerate(ops):
+                    cmd, pid = op[0], op[1]
+                    tx = bytes([cmd, pid]) if cmd != CMD_WRITE_PARAM else bytes([cmd, pid]) + struct.pack(">i", int(op[2]))
+                    end = time.monotonic() + self._budget(1 if cmd == CMD_WRITE_PARAM else 5, len(tx))
+                    self._pre_tx(); self.ser.reset_input_buffer()
+                    self.ser.write(tx); self.ser.flush()
+                    self._post_tx()
+                    st_b = read_exact(self.ser, 1, end - time.monotonic())
+                    st = st_b[0] if st_b else -1; val = None
+                    if st in STATUS_OK and cmd != CMD_WRITE_PARAM:
+                        val_b = read_exact(self.ser, 4, end - time.monotonic())
+                        if len(val_b) == 4: val = struct.unpack(">i", val_b)[0]
+                        else: st = -1
+                    out.append((cmd, pid, st, val))
+                    if st == -1 and not self._settle():
+                        out.extend((o[0], o[1], -1, None) for o in ops[k + 1:])
+                        self.warn(f"Batch aborted after {k + 1}/{len(ops)} ops: the line did not go quiet")
+                        break
+            except Exception as e:
+                self.warn(f"Batch error after {len(out)}/{len(ops)} ops: {e}")
+            finally:
+                self.busy = False
+        return out
+
+    def _settle(self) -> bool:
+        # after a reply that timed out or was cut short: discard whatever still arrives until the
+        # line has been quiet for a gap plus the sensor margin; False if that takes over cfg["timeout"]
+        quiet = self._gap(self.cfg["baud"]) + self.cfg["margin"]
+        end = time.monotonic() + self.cfg["timeout"]
+        while time.monotonic() < end:
+            late = read_exact(self.ser, 1, min(quiet, end - time.monotonic()))
+            self.ser.reset_input_buffer()
+            if not late: return True
+        return False
+
+    def factory_reset(self) -> bool:
+        if not self.ser:
+            self.warn("Not connected"); return False
+        with self.lock:
+            self.busy = True
+            try:
+                self._pre_tx(); self.ser.reset_input_buffer()
+                self.ser.write(bytes([CMD_FACTORY_RESET]) + b"RESET"); self.ser.flush()
+                self._post_tx()
+                ack = read_exact(self.ser, 1, self.cfg["timeout"])
+                ok = len(ack)==1 and ack[0] in STATUS_OK
+                (self.log if ok else self.warn)("Factory reset OK" if ok else "Factory reset FAILED")
+                return ok
+            except Exception as e:
+                self.warn(f"Factory reset error: {e}")
+                return False
+            finally:
+                self.busy = False
+
+    def set_sensor_baud(self, new_baud: int) -> bool:
+        if not self.ser:
+            self.warn("Not connected"); return False
+        with self.lock:
+            self.busy = True
+            try:
+                end = time.monotonic() + self._budget(1, 6)
+                self._pre_tx(); self.ser.reset_input_buffer()
+                self.ser.write(bytes([CMD_WRITE_PARAM, PARAM_BAUD]) + struct.pack(">i", int(new_baud)))
+                self.ser.flush()
+                self._post_tx()
+                ack = read_exact(self.ser, 1, end - time.monotonic())
+                if not (len(ack)==1 and ack[0] in STATUS_OK):
+                    self.warn("Baud write FAILED"); return False
+                self._reopen_serial(new_baud)
+                self.log(f"Reopened at {new_baud} baud")
+                return True
+            except Exception as e:
+                self.warn(f"Baud change error: {e}")
+                return False
+            finally:
+                self.busy = False
+
+    def simple_cmd(self, cmd: int, label: str = "", expect_status: bool = True, timeout_override: float | None = None) -> bool:
+        # maintenance commands (autoset, background cal, save...) do real work on the sensor
+        # before acknowledging, so they wait the full cfg["timeout"] rather than a wire budget
+        if not self.ser:
+            self.warn("Not connected"); return False
+        with self.lock:
+            self.busy = True
+            try:
+                self._pre_tx()
+                self.ser.reset_input_buffer()
+                tx = bytes([cmd])
+                if self.trace: self.trace(f"TX cmd{f' {label}' if label else ''}: {hexdump(tx)}")
+                self.ser.write(tx); self.ser.flush()
+                self._post_tx()
+                if not expect_status:
+                    self.log(f"{label}: sent"); return True
+                ack = read_exact(self.ser, 1, (timeout_override if timeout_override is not None else self.cfg["timeout"]))
+                if self.trace: self.trace(f"RX ack: {hexdump(ack) if ack else '(none)'}")
+                ok = len(ack)==1 and ack[0] in STATUS_OK
+                code = f"0x{ack[0]:02X}" if ack else "(no byte)"
+                (self.log if ok else self.warn)(f"{label}: {'OK' if ok else 'FAIL (' + code + ')'}")
+                return ok
+            except Exception as e:
+                self.warn(f"{label}: error {e}")
+                return False
+            finally:
+                self.busy = False
+
+    def write_selector(self, mask: int) -> bool:
+        with self.lock:
+            try:
+                end = time.monotonic() + self._budget(1, 6)
+                self._pre_tx()
+                self.ser.reset_input_buffer()
+                frame = bytes([CMD_WRITE_PARAM, PARAM_SELECTOR]) + struct.pack(">i", int(mask))
+                if self.trace: self.trace(f"TX selector ({len(frame)}): {hexdump(frame)}")
+                self.ser.write(frame); self.ser.flush()
+                self._post_tx()
+                ack = read_exact(self.ser, 1, end - time.monotonic())
+                if self.trace: self.trace(f"RX ack: {hexdump(ack) if ack else '(none)'}")
+                ok = len(ack)==1 and ack[0] in STATUS_OK
+                (self.log if ok else self.warn)(f"Selector -> {mask} {'OK' if ok else 'FAILED'}")
+                return ok
+            except Exception:
+                return False
+
+    # ------------- baud discovery -------------
+    def discover_baud(self, rates=BAUD_RATES) -> int | None:
+        # Probe for the rate the sensor is listening at: the configured one first, then the
+        # factory default, then the rest fastest first (cheapest probes). A rate counts once two
+        # PARAM_SN reads in a row agree, so line noise decoded at the wrong rate cannot pass.
+        order = list(dict.fromkeys([self.cfg["baud"], 19200] + sorted(rates, reverse=True)))
+        with self.lock:
+            for baud in order:
+                self._set_host_baud(baud)
+                sn = self._probe_sn()
+                if sn is not None:
+                    self.sn = sn
+                    self.log(f"Sensor answered at {baud} baud (SN {sn})")
+                    return baud
+        self.warn("No sensor answered at any baud")
+        return None
+
+    def negotiate_baud(self, rates=BAUD_RATES) -> int:
+        # Step the sensor up to the fastest rate that survives cfg["stress_reads"] back-to-back
+        # PARAM_SN reads. Faster rates are tried first; a failing rate is left again by writing
+        # the previous baud back (or, if the link is too broken for that, by discover_baud).
+        # Returns the rate in use afterwards.
+        with self.lock:
+            start = self.cfg["baud"]
+            sn = self.sn if self.sn is not None else self._probe_sn()
+            if sn is None: return start
+            for baud in sorted((b for b in rates if b > start), reverse=True):
+                if not self.set_sensor_baud(baud):
+                    continue
+                bad = self._stress(sn)
+                if not bad:
+                    self.log(f"Link stable at {baud} baud")
+                    return baud
+                self.warn(f"{baud} baud: stress reads failed ({bad}), falling back")
+                if not (self.set_sensor_baud(start) and self._probe_sn() == sn):
+                    if self.discover_baud() is None: return self.cfg["baud"]
+                    if self.cfg["baud"] != start: self.set_sensor_baud(start)
+            self.log(f"Staying at {self.cfg['baud']} baud")
+            return self.cfg["baud"]
+
+    def _probe_sn(self) -> int | None:
+        op = [(CMD_READ_PARAM, PARAM_SN)]
+        a = self.param_batch(op)
+        if not a or a[0][3] is None: return None  # silent at this rate: one timeout, not two
+        b = self.param_batch(op)
+        return a[0][3] if b and b[0][3] == a[0][3] else None
+
+    def _stress(self, sn: int, chunk: int = 20) -> int:
+        # failed reads; stops at the first failing chunk so a bad rate costs little time
+        n = self.cfg["stress_reads"]
+        for i in range(0, n, chunk):
+            res = self.param_batch([(CMD_READ_PARAM, PARAM_SN)] * min(chunk, n - i))
+            bad = sum(1 for r in res if r[3] != sn) + min(chunk, n - i) - len(res)
+            if bad: return bad
+        return 0
+
+    def _set_host_baud(self, baud: int):
+        # retune the open port; unlike _reopen_serial this does not tell the sensor anything
+        time.sleep(2 * self._gap(self.cfg["baud"]))  # let a reply at the old rate drain first
+        self.ser.baudrate = int(baud); self.ser.inter_byte_timeout = self._gap(baud)
+        self.cfg["baud"] = int(baud)
+        self.ser.reset_input_buffer()
+
+    # ------------- polling -------------
+    def poll(self) -> MeasurementFrame | None:
+        # one CMD_MEASUREMENT transaction; None if nothing could be decoded
+        if self.cfg["selector"] == 0 or not self.ser:
+            return None
+        with self.lock:
+            self.busy = True
+            try:
+                self.seq += 1; self.stats.polls += 1
+                fr = MeasurementFrame(self.seq, time.time(), self.cfg["selector"])
+                lat = self.latency if self.latency.enabled else None
+                if lat: ns = time.perf_counter_ns; t0 = ns()
+                p = self.parser; p.start(fr); p.timed = lat is not None
+                self._send_measure(lat)
+                if lat: t_sent = ns()
+                # first byte due within the wire budget for the smallest possible response; after
+                # that, line silence (gap) ends the read
+                t_first = self._receive(p, self._budget(min_response_size(self.cfg["selector"]), 1), self._gap(self.cfg["baud"]))
+                state = p.finish()
+                if self.recorder and p.end: self.recorder.write(fr.seq, fr.t, fr.selector, self.cfg["baud"], p.mv[:p.end])
+                if lat:
+                    prev = t_first
+                    for bit, t, dec in p.marks:
+                        lat.add(PAYLOAD_PHASE[bit], t - prev); prev = t + dec
+                    if p.end: lat.add("first_byte", t_first - t_sent)
+                    lat.add("decode", sum(m[2] for m in p.marks)); lat.add("total", ns() - t0)
+                stats = self.stats
+                if fr.meas_count is not None: stats.meas_count(fr.meas_count)
+                if p.skipped: stats.resynced += 1
+                self._suspect = state != "done"
+                if state == "garbled": stats.garbled += 1
+                elif state != "done": stats.timeouts += 1  # nothing, or cut short
+                grew = False
+                for bit, c in p.items.items():
+                    if c > self.counts.get(bit, 0): self.counts[bit] = c; grew = True
+                if grew: self.check_rate()  # bigger spectrum/IQ/list than budgeted for so far
+                if not fr: return None
+                stats.frames += 1
+                if self.publisher: self.publisher.write(fr)
+                return fr
+            except Exception as e:
+                self.stats.timeouts += 1
+                self.warn(f"Poll error: {e}")
+                return None
+            finally:
+                self.busy = False
+
+    def _receive(self, p: ResponseParser, timeout: float, gap: float) -> int:
+        # Read into the parser until its response is complete, or nothing arrives for `timeout`
+        # (before the first byte) / `gap` (after it). Reads ask for exactly what the parser
+        # still expects. After a cut-short response the line is also watched for `gap` past the
+        # end, so a late tail of the old response makes the parser realign instead of leaking
+        # into the next poll. Returns perf_counter_ns() of the first bytes.
+        ser = self.ser; fd = getattr(ser, "fd", None)
+        deadline = time.monotonic() + timeout; t_first = 0
+        settle = self._suspect and fd is not None
+        saved = ser.timeout
+        try:
+            while p.state in ("hunt", "data") or (settle and p.done):
+                want = p.need or 4096
+                wait = gap if p.end else deadline - time.monotonic()
+                if wait <= 0: break
+                if fd is None:  # non-POSIX: pyserial blocks up to ser.timeout; inter_byte_timeout ends short responses
+                    ser.timeout = wait
+                    k = ser.readinto(p.space(want))
+                    if not k: break
+                else:
+                    if not select.select([fd], [], [], wait)[0]: break
+                    try:
+                        k = os.readv(fd, [p.space(want)])
+                    except BlockingIOError:
+                        continue
+                    if not k: raise serial.SerialException("device reports readiness but returned no data")
+                if not p.end: t_first = time.perf_counter_ns()
+                p.commit(k)
+        finally:
+            if ser.timeout != saved: ser.timeout = saved
+        return t_first
+
+    # ------------- link budget -------------
+    def poll_bytes(self, selector: int | None = None) -> tuple[int, int]:
+        # (request, response) bytes of one poll, using the largest IQ/spectrum/list sizes seen
+        sel = self.cfg["selector"] if selector is None else selector
+        return 1, response_size(sel, self.counts)
+
+    def max_rate(self, selector: int | None = None) -> float:
+        # polls/s the wire can carry at the current baud: request, response and both DE
+        # turnarounds back to back. The sensor's processing time (margin) comes on top, so
+        # this is a ceiling, not a promise.
+        tx, rx = self.poll_bytes(selector)
+        return 1.0 / ((tx + rx + 2 * TURNAROUND_CHARS) * char_time(self.cfg["baud"]))
+
+    def sizes_known(self, selector: int | None = None) -> bool:
+        # IQ samples and spectrum bins are set on the sensor and only learnt from a response;
+        # until then max_rate() counts them as empty and can be off by orders of magnitude
+        sel = self.cfg["selector"] if selector is None else selector
+        return all(b in self.counts for b in (SEL_IQ, SEL_SPECTRUM) if sel & b)
+
+    def check_rate(self) -> float:
+        # compare cfg["rate_hz"] with max_rate(); warn once per new ceiling, or lower rate_hz
+        # to it when cfg["rate_limit"] is "clamp". Free-run polling has no rate to check, and
+        # nothing is checked before sizes_known(): poll() calls this again once they are.
+        mx = self.max_rate()
+        if self.cfg["acq_mode"] == "free" or self.cfg["rate_hz"] <= mx or not self.sizes_known(): return mx
+        tx, rx = self.poll_bytes()
+        if self.cfg["rate_limit"] == "clamp":
+            self.cfg["rate_hz"] = max(0.5, int(mx * 10) / 10)
+            self.warn(f"Rate clamped to {self.cfg['rate_hz']:.1f} Hz: {tx + rx} bytes/poll at {self.cfg['baud']} baud")
+            self.on_clamp(self.cfg["rate_hz"])
+        elif self._warned != round(mx, 1):
+            self._warned = round(mx, 1)
+            self.warn(f"{self.cfg['rate_hz']:.1f} Hz exceeds the link budget of {mx:.1f} Hz "
+                     f"({tx + rx} bytes/poll at {self.cfg['baud']} baud)")
+        return mx
+
+    # ------------- helpers -------------
+    def _open_serial(self, baud: int):
+        self.ser = serial.Serial(
+            port=self.cfg["port"], baudrate=int(baud),
+            bytesize=serial.EIGHTBITS, parity=serial.PARITY_NONE, stopbits=serial.STOPBITS_ONE,
+            timeout=self.cfg["timeout"], write_timeout=self.cfg["timeout"], inter_byte_timeout=self._gap(baud),
+            rtscts=False, dsrdtr=False, xonxoff=False
+        )
+        self.cfg["baud"] = int(baud)
+
+    def _gap(self, baud: int) -> float:
+        return max(0.002, self.cfg["gap_chars"] * char_time(baud))
+
+    def _budget(self, rx: int, tx: int = 0) -> float:
+        # deadline for one transaction: request and reply on the wire, DE turnaround both ways,
+        # and the sensor's processing margin; never longer than cfg["timeout"]
+        wire = (tx + rx + 2 * TURNAROUND_CHARS) * char_time(self.cfg["baud"])
+        return min(self.cfg["timeout"], wire + self.cfg["margin"])
+
+    def _turnaround(self, key: str) -> float:
+        v = self.cfg[key]
+        return TURNAROUND_CHARS * char_time(self.cfg["baud"]) if v is None else v
+
+    def _reopen_serial(self, baud: int):
+        try:
+            if self.ser: self.ser.close()
+        except Exception: pass
+        time.sleep(0.1)
+        self._open_serial(baud)
+        if self.cfg["rts_de"]: self._set_rts(False)
+
+    def _pre_tx(self):
+        if self.cfg["rts_de"]:
+            self._set_rts(True); time.sleep(self._turnaround("pre"))
+
+    def _post_tx(self):
+        # flush() returns once the driver has sent the bytes; hold DE for the last stop bit
+        if self.cfg["rts_de"]:
+            time.sleep(self._turnaround("post")); self._set_rts(False)
+
+    def _set_rts(self, tx: bool):
+        if not self.ser: return
+        level = (not tx) if self.cfg["de_active_low"] else tx
+        self.ser.rts = level
+
+    def _send_measure(self, lat=None):
+        if lat is None:
+            self._pre_tx()
+            self.ser.reset_input_buffer()
+            self.ser.write(bytes([CMD_MEASUREMENT])); self.ser.flush()
+            self._post_tx()
+            return
+        ns = time.perf_counter_ns
+        t0 = ns(); self._pre_tx()
+        t1 = ns(); self.ser.reset_input_buffer(); self.ser.write(bytes([CMD_MEASUREMENT])); self.ser.flush()
+        t2 = ns(); self._post_tx()
+        t3 = ns()
+        lat.add("pre_tx", t1 - t0); lat.add("write", t2 - t1); lat.add("post_tx", t3 - t2)
+
+def emit_frame(lat: LatencyStats, on_frame, fr):
+    # hand a frame to its consumer, timing the hand-over as the "emit" phase when enabled
+    if not lat.enabled:
+        on_frame(fr); return
+    t = time.perf_counter_ns(); on_frame(fr)
+    lat.add("emit", time.perf_counter_ns() - t)
+
+class Poller:
+    # Dedicated acquisition thread for a SensorLink:
+    #   deadline: issue CMD_MEASUREMENT on a fixed grid of perf_counter deadlines and count
+    #             grid slots that passed while a transaction was still running as missed
+    #   free:     issue the next CMD_MEASUREMENT as soon as the previous response completes
+    # Mode and rate are read from link.cfg on every cycle; call wake() after changing them.
+    IDLE_S = 0.01  # free mode: wait this long after a poll that returned nothing at once (no port, selector 0, ...)
+
+    def __init__(self, link: SensorLink, on_frame, on_missed=None):
+        self.link = link
+        self.on_frame = on_frame
+        self.on_missed = on_missed or (lambda k: None)
+        self.missed = 0
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self):
+        if self.alive: self.wake(); return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="ondosense-acq", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+        t = self._thread; self._thread = None
+        if t and t is not threading.current_thread(): t.join(2.0)
+
+    def wake(self):
+        self._wake.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        cfg = self.link.cfg
+        nxt = time.perf_counter()
+        while not self._stop.is_set():
+            period = 1.0 / float(cfg["rate_hz"])
+            free = cfg["acq_mode"] == "free"
+            if not free:
+                dt = nxt - time.perf_counter()
+                if dt > 0 and self._wake.wait(dt):
+                    self._wake.clear(); nxt = time.perf_counter(); continue
+            t0 = time.perf_counter()
+            fr = self.link.poll()
+            if fr is not None: emit_frame(self.link.latency, self.on_frame, fr)
+            elif free and time.perf_counter() - t0 < self.IDLE_S:
+                if self._wake.wait(self.IDLE_S): self._wake.clear()  # nothing went out: don't spin
+            nxt += period
+            late = time.perf_counter() - nxt
+            if late > 0 and not free:
+                k = int(late / period)
+                if k: self.missed += k; self.link.stats.missed += k; self.on_missed(k); nxt += k * period
+        self._wake.clear()
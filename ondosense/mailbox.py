@@ -0,0 +1,45 @@
+# ondosense/mailbox.py
+# Thread-safe hand-off slots between the acquisition thread and a slower consumer (e.g. the GUI).
+import threading
+
+class Mailbox:
+    # keeps only the latest value; older ones are overwritten
+    __slots__ = ("_lock", "_v", "dropped", "__weakref__")
+
+    def __init__(self):
+        self._lock = threading.Lock(); self._v = None; self.dropped = 0
+
+    def put(self, v):
+        with self._lock:
+            if self._v is not None: self.dropped += 1
+            self._v = v
+
+    def take(self):
+        with self._lock:
+            v, self._v = self._v, None
+        return v
+
+    def clear(self):
+        self.take()
+
+class BatchBox:
+    # keeps every value until drained, up to maxlen (oldest dropped beyond that)
+    __slots__ = ("_lock", "_items", "maxlen", "dropped", "__weakref__")
+
+    def __init__(self, maxlen: int = 1_000_000):
+        self._lock = threading.Lock(); self._items = []; self.maxlen = maxlen; self.dropped = 0
+
+    def put(self, v):
+        with self._lock:
+            self._items.append(v)
+            if len(self._items) > self.maxlen:
+                k = len(self._items) - self.maxlen
+                del self._items[:k]; self.dropped += k
+
+    def drain(self) -> list:
+        with self._lock:
+            items, self._items = self._items, []
+        return items
+
+    def clear(self):
+        self.drain()
@@ -0,0 +1,115 @@
+# ondosense/manager.py
+# Several sensors at once: one SerialWorker on its own QThread per port. Each worker polls
+# and times out independently; frames land in per-sensor mailboxes, so a slow sensor only
+# ever delays itself. The main window's own worker is attached too (owned=False), so it shows
+# up in the combined stats, but it is still started and stopped by the window.
+from PyQt6 import QtCore
+from PyQt6.QtCore import pyqtSignal, QObject, QThread
+import time
+from .serial_worker import SerialWorker
+from .mailbox import BatchBox
+
+class Sensor:
+    def __init__(self, sid: int, name: str, worker: SerialWorker, thread: QThread, owned: bool = True):
+        self.sid = sid
+        self.name = name
+        self.worker = worker
+        self.thread = thread
+        self.owned = owned           # started, stopped and removed by the manager
+        self.connected = False
+        self.msg = ""
+        self.frames = 0              # frames received since the sensor was added
+        self.last_t = None           # time.time() of the newest frame
+        self.distance = None         # newest distance (m)
+        self.dist = BatchBox(100_000)  # (t, distance) samples for the dashboard, until it drains them
+
+    @property
+    def cfg(self) -> dict:
+        return self.worker.cfg
+
+    def _on_frame(self, fr):
+        # acquisition thread (DirectConnection)
+        self.frames += 1; self.last_t = fr.t
+        d = fr.distance if fr.distance is not None else (fr.high_prec["d_m"] if fr.high_prec is not None else None)
+        if d is not None:
+            self.distance = d; self.dist.put((fr.t, d))
+
+class SensorManager(QObject):
+    sensor_added   = pyqtSignal(int)             # sensor id
+    sensor_removed = pyqtSignal(int)
+    sensor_state   = pyqtSignal(int, bool, str)  # (sensor id, connected, message)
+    statusmsg      = pyqtSignal(int, str)        # (sensor id, message)
+    warnmsg        = pyqtSignal(int, str)        # (sensor id, failure or warning)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sensors = {}  # sid -> Sensor
+        self._next = 1
+        self._snap = {}    # sid -> (perf_counter, frames) at the previous stats() call
+
+    def add(self, cfg: dict, name: str | None = None) -> Sensor:
+        thread = QThread(self)
+        worker = SerialWorker(); worker.configure(cfg)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.start)
+        return self.attach(worker, thread, name or cfg.get("port"))
+
+    def attach(self, worker: SerialWorker, thread: QThread, name: str | None = None, owned: bool = True) -> Sensor:
+        # a worker already on its thread; owned=False leaves start/stop to its owner and does not
+        # forward its status messages (the owner logs them already)
+        sid = self._next; self._next += 1
+        s = Sensor(sid, name or f"sensor {sid}", worker, thread, owned)
+        worker.connected.connect(lambda ok, msg, s=s: self._on_connected(s, ok, msg))
+        if owned:
+            worker.statusmsg.connect(lambda msg, sid=sid: self.statusmsg.emit(sid, msg))
+            worker.warnmsg.connect(lambda msg, sid=sid: self.warnmsg.emit(sid, msg))
+        worker.frame.connect(s._on_frame, QtCore.Qt.ConnectionType.DirectConnection)
+        self.sensors[sid] = s
+        self.sensor_added.emit(sid)
+        return s
+
+    def remove(self, sid: int):
+        if sid in self.sensors and not self.sensors[sid].owned: return
+        s = self.sensors.pop(sid, None)
+        if s is None: return
+        self._stop(s)
+        s.worker.deleteLater(); self._snap.pop(sid, None)
+        self.sensor_removed.emit(sid)
+
+    def start(self, sid: int):
+        s = self.sensors[sid]
+        if s.owned and not s.thread.isRunning(): s.thread.start()
+
+    def stop(self, sid: int):
+        self._stop(self.sensors[sid])
+
+    def start_all(self):
+        for sid in self.sensors: self.start(sid)
+
+    def stop_all(self):
+        for s in self.sensors.values(): self._stop(s)
+
+    def _stop(self, s: Sensor):
+        if not s.owned or not s.thread.isRunning(): return
+        s.worker.stop()
+        s.thread.quit(); s.thread.wait(2000)
+
+    def _on_connected(self, s: Sensor, ok: bool, msg: str):
+        s.connected = ok; s.msg = msg
+        self.sensor_state.emit(s.sid, ok, msg)
+
+    def stats(self) -> dict:
+        # per-sensor and aggregate throughput since the previous call
+        now = time.perf_counter(); wall = time.time()
+        per = {}; total_rate = 0.0
+        for sid, s in self.sensors.items():
+            t0, n0 = self._snap.get(sid, (now, s.frames))
+            rate = (s.frames - n0) / (now - t0) if now > t0 else 0.0
+            self._snap[sid] = (now, s.frames)
+            per[sid] = {"name": s.name, "connected": s.connected, "frames": s.frames, "rate_hz": rate,
+                        "polls": s.worker.link.seq, "missed": s.worker.link.stats.missed,
+                        "age_s": wall - s.last_t if s.last_t else None, "distance": s.distance}
+            total_rate += rate
+        return {"sensors": per, "frames": sum(p["frames"] for p in per.values()), "rate_hz": total_rate,
+                "missed": sum(p["missed"] for p in per.values()),
+                "connected": sum(p["connected"] for p in per.values())}
@@ -0,0 +1,81 @@
+# ondosense/param_cache.py
+# On-disk cache of parameter limits and last-known values, keyed by sensor serial number
+# (PARAM_SN). Results use the same (cmd, pid, status, value) tuples as SensorLink.param_batch,
+# so a cached table and a freshly read one go through the same code paths.
+import json, os, time
+from .protocol import *
+
+CACHE_VERSION = 1
+
+def default_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".ondosense", "param_cache.json")
+
+class ParamCache:
+    # Per sensor: limits {pid: [min, max]} (None where the sensor refused the query; never
+    # re-read), values {pid: value} and the set of pids whose value is stale. Values become
+    # stale through invalidate(), e.g. after a write or a factory reset.
+    def __init__(self, path: str | None = None):
+        self.path = path or default_path()
+        self.sensors = {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.sensors = data.get("sensors", {})
+        except (OSError, ValueError, AttributeError):
+            pass  # missing, unreadable or from another version: start empty
+
+    def _entry(self, sn: int) -> dict:
+        return self.sensors.setdefault(str(sn), {"updated": 0.0, "limits": {}, "values": {}, "stale": []})
+
+    def known(self, sn: int) -> bool:
+        return str(sn) in self.sensors
+
+    def results(self, sn: int) -> list:
+        # cached limits and values as param_batch results (stale values included: better than blank)
+        e = self.sensors.get(str(sn))
+        if not e: return []
+        out = []
+        for pid, lim in e["limits"].items():
+            if lim is None: continue
+            out.append((CMD_READ_MIN, int(pid), STATUS_SUCCESS, lim[0]))
+            out.append((CMD_READ_MAX, int(pid), STATUS_SUCCESS, lim[1]))
+        out.extend((CMD_READ_PARAM, int(pid), STATUS_SUCCESS, v) for pid, v in e["values"].items())
+        return out
+
+    def pending(self, sn: int, pids) -> list:
+        # param_batch ops for whatever is missing or stale among pids
+        e = self._entry(sn); stale = set(e["stale"])
+        ops = []
+        for pid in pids:
+            if str(pid) not in e["limits"]: ops += [(CMD_READ_MIN, pid), (CMD_READ_MAX, pid)]
+            if str(pid) not in e["values"] or pid in stale: ops.append((CMD_READ_PARAM, pid))
+        return ops
+
+    def update(self, sn: int, results):
+        e = self._entry(sn); stale = set(e["stale"])
+        for cmd, pid, status, value in results:
+            key = str(pid)
+            if cmd == CMD_READ_PARAM:
+                if value is not None: e["values"][key] = value; stale.discard(pid)
+            elif cmd in (CMD_READ_MIN, CMD_READ_MAX):
+                lim = e["limits"].get(key) or [None, None]
+                if value is not None: lim[cmd == CMD_READ_MAX] = value
+                elif status < 0: continue  # no reply: try again next time
+                e["limits"][key] = lim if value is not None or any(v is not None for v in lim) else None
+        e["stale"] = sorted(stale); e["updated"] = time.time()
+
+    def set_value(self, sn: int, pid: int, value: int):
+        self.update(sn, [(CMD_READ_PARAM, pid, STATUS_SUCCESS, value)])
+
+    def invalidate(self, sn: int, pids=None):
+        # mark values stale (all of them if pids is None); limits are kept
+        e = self._entry(sn)
+        e["stale"] = sorted(set(e["stale"]) | set(int(p) for p in (e["values"] if pids is None else pids)))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": CACHE_VERSION, "sensors": self.sensors}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
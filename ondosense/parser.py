@@ -0,0 +1,192 @@
+# ondosense/parser.py
+# Push parser for CMD_MEASUREMENT responses. Bytes go in as they arrive, in chunks of any size;
+# each dataset is decoded and handed to on_dataset the moment its last byte is in. Every status
+# byte and count header is checked, so a response that is cut short or garbled costs that one
+# frame: bytes left over from an earlier response are skipped at the start of the next one
+# (resync).
+# The protocol has no start marker, so a leftover tail can pass the checks by chance. A correct
+# parse ends exactly where the sensor stops sending; bytes after the end therefore mean the
+# start was misjudged and the response is parsed again one byte further on (realign).
+import functools, time
+from .protocol import *
+from .decode import DECODERS
+
+# largest item count accepted per counted dataset; anything above is taken as garbage
+MAX_ITEMS = {SEL_IQ: 8192, SEL_SPECTRUM: 4096, SEL_PEAK_LIST: 64, SEL_DISTANCE_LIST: 64}
+
+@functools.lru_cache(maxsize=64)
+def layout(selector: int) -> tuple:
+    # (bit, header bytes, minimum bytes of the datasets after it) per selected dataset
+    bits = selected_datasets(selector); rest = min_response_size(selector); out = []
+    for b in bits:
+        rest -= 1 + DATASET_HEADER[b]
+        out.append((b, DATASET_HEADER[b], rest))
+    return tuple(out)
+
+class ResponseParser:
+    # States of the current response:
+    #   hunt       nothing accepted yet; a byte that cannot start the response is skipped
+    #   data       some datasets accepted, waiting for more bytes
+    #   done       every selected dataset is in (later bytes trigger a realign, or are counted
+    #              as `extra` when realign is off)
+    #   garbled    no start within max_hunt bytes passes the checks; the rest is ignored
+    #   truncated  finish() was called before the response was complete
+    # The receive buffer is owned here: read straight into space(n) and commit(k), or feed().
+    def __init__(self, on_dataset=None, max_items: dict | None = None, max_hunt: int = 65536, size: int = 16384):
+        self.buf = bytearray(size); self.mv = memoryview(self.buf)
+        self.on_dataset = on_dataset or (lambda fr, bit, value: None)
+        self.max_items = dict(MAX_ITEMS, **(max_items or {}))
+        self.max_hunt = max_hunt  # bytes skipped at most while looking for the response start
+        self.realign = True       # reparse from the next byte when data continues past the end
+        self.timed = False        # record (bit, perf_counter_ns when complete, decode ns) in marks
+        self.fr = None; self.state = "done"; self._layout = ()
+        self.pos = self.end = self.i = self.first = 0; self._want = 1
+        self.skipped = self.extra = 0
+        self.items = {}; self.marks = []
+        self.garbled = self.truncated = self.resynced = self.realigned = 0  # totals over all responses
+
+    # ------------- response lifecycle -------------
+    def start(self, fr):
+        # begin the response to one CMD_MEASUREMENT; fr.selector fixes the dataset layout
+        self.fr = fr; self._layout = layout(fr.selector)
+        self.pos = self.end = self.i = self.first = 0
+        self.skipped = self.extra = 0
+        self.items = {}; self.marks = []
+        self.state = "hunt" if self._layout else "done"
+        self._want = 1 + self._layout[0][1] + self._layout[0][2] if self._layout else 0
+
+    def finish(self) -> str:
+        # no more bytes are coming for this response (timeout or line silence). A parse still
+        # waiting may have latched onto a leftover tail: try the later offsets against the bytes
+        # that did arrive before calling it truncated. (A truly truncated fixed-size response is
+        # too short to parse from any later offset.) A later offset that only yields failed
+        # datasets is one stray byte passing for a status, not evidence, and is not taken.
+        moved = False
+        while self.state in ("hunt", "data") and self.realign:
+            if self.state == "hunt": self.first = self.pos
+            if self.first + 1 >= self.end: break
+            self._realign(); moved = True
+            if self.state == "hunt": self._advance()
+        if moved and self.state == "done" and not any(st in STATUS_OK for st in self.fr.status.values()):
+            self.state = "data"
+        if self.state in ("hunt", "data"):
+            self.state = "truncated"; self.truncated += 1
+        return self.state
+
+    @property
+    def done(self) -> bool:
+        return self.state == "done"
+
+    @property
+    def need(self) -> int:
+        # bytes still expected if every remaining dataset succeeds (at least 1 while parsing)
+        if self.state in ("hunt", "data"): return max(1, self._want - self.end)
+        return 0
+
+    # ------------- input -------------
+    def space(self, n: int) -> memoryview:
+        # writable view of n bytes at the end of the buffer
+        if self.end + n > len(self.buf): self._grow(self.end + n)
+        return self.mv[self.end:self.end + n]
+
+    def commit(self, k: int):
+        self.end += k
+        if self.state in ("hunt", "data"): self._advance()
+        elif self.state == "done": self._overrun()
+
+    def feed(self, data) -> int:
+        # copy in a chunk; returns the number of datasets completed so far
+        n = len(data)
+        self.space(n)[:] = data; self.commit(n)
+        return self.i
+
+    def _grow(self, n: int):
+        size = len(self.buf)
+        while size < n: size *= 2
+        buf = bytearray(size); buf[:self.end] = self.mv[:self.end]
+        self.mv.release(); self.buf = buf; self.mv = memoryview(buf)
+
+    # ------------- state machine -------------
+    def _advance(self):
+        buf = self.buf; fr = self.fr; lay = self._layout
+        while True:
+            while self.i < len(lay):
+                bit, hlen, rest = lay[self.i]
+                p = self.pos
+                if p >= self.end:
+                    self._want = p + 1 + hlen + rest; return
+                st = buf[p]
+                if st not in STATUS_KNOWN:
+                    if not self._reject(): return
+                    continue
+                if st not in STATUS_OK:  # failed dataset: status byte only
+                    self._accept(bit, st, p + 1); continue
+                if self.end < p + 1 + hlen:
+                    self._want = p + 1 + hlen + rest; return
+                body = dataset_body_size(bit, buf, p + 1)
+                if body and not self._plausible(bit, p + 1, body):
+                    if not self._reject(): return
+                    continue
+                n = 1 + hlen + body
+                if self.end < p + n:
+                    self._want = p + n + rest; return
+                if body: self.items[bit] = body // ITEM_BYTES[bit]
+                if self.timed:
+                    t = time.perf_counter_ns(); value = DECODERS[bit](self.mv, p + 1)
+                    self.marks.append((bit, t, time.perf_counter_ns() - t))
+                else:
+                    value = DECODERS[bit](self.mv, p + 1)
+                fr.set(bit, value)
+                self._accept(bit, st, p + n)
+                self.on_dataset(fr, bit, value)
+            self.state = "done"; self.extra = self.end - self.pos
+            if not (self.extra and self.realign): return
+            self._realign()
+            if self.state != "hunt": return
+
+    def _overrun(self):
+        # more bytes after a complete response
+        self.extra = self.end - self.pos
+        if self.extra and self.realign:
+            self._realign()
+            if self.state == "hunt": self._advance()
+
+    def _realign(self):
+        # the accepted start was wrong: forget what was decoded and hunt again one byte further on
+        fr = self.fr
+        for bit in fr.status: fr.set(bit, None)
+        fr.status.clear(); self.items = {}; self.marks = []
+        self.i = 0; self.extra = 0; self.realigned += 1
+        self.pos = self.skipped = self.first + 1
+        if self.skipped > self.max_hunt:
+            self.state = "garbled"; self.garbled += 1
+        else:
+            self.state = "hunt"
+
+    def _accept(self, bit: int, st: int, pos: int):
+        if self.state == "hunt":
+            self.first = self.pos
+            if self.skipped: self.resynced += 1
+        self.fr.status[bit] = st; self.pos = pos; self.i += 1; self.state = "data"
+
+    def _reject(self) -> bool:
+        # the byte at pos cannot be what the layout says; True to keep parsing
+        if self.state == "hunt":
+            if self.skipped < self.max_hunt:
+                self.pos += 1; self.skipped += 1  # leftovers of an earlier response: slide forward
+                return True
+            self.state = "garbled"; self.garbled += 1
+            return False
+        if self.realign:
+            self._realign()
+            return self.state == "hunt"
+        self.state = "garbled"; self.garbled += 1
+        return False
+
+    def _plausible(self, bit: int, off: int, body: int) -> bool:
+        if body // ITEM_BYTES[bit] > self.max_items[bit]: return False
+        if bit == SEL_SPECTRUM:  # u16 count, u32 maxHz, u32 dHz: the axis must start at >= 0 Hz
+            cnt = body // 2
+            max_hz = int.from_bytes(self.buf[off + 2:off + 6], "big"); d_hz = int.from_bytes(self.buf[off + 6:off + 10], "big")
+            return d_hz > 0 and max_hz >= (cnt - 1) * d_hz
+        return True
@@ -67,3 +67,48 @@ SEL_DISTANCE_LIST = 64
 SEL_MEAS_COUNT    = 128
 SEL_TEMPERATURE   = 256
 SEL_HIGH_PREC     = 512
+
+STATUS_OK = (STATUS_SUCCESS, STATUS_SUCCESS_WEAK)
+STATUS_KNOWN = frozenset(STATUS_OK + tuple(range(0xF8, 0x100)))  # 0xF8..0xFF: error codes
+
+# Standard rates accepted by PARAM_BAUD (factory default 19200)
+BAUD_RATES = (9600, 19200, 38400, 57600, 115200, 230400, 460800, 921600)
+
+# Datasets in the order the sensor serializes them after CMD_MEASUREMENT.
+# Each is: status byte + fixed header (below) + variable body (see dataset_body_size).
+SEL_ORDER = (SEL_IQ, SEL_SPECTRUM, SEL_PEAK_LIST, SEL_PEAK, SEL_DISTANCE_LIST,
+             SEL_DISTANCE, SEL_MEAS_COUNT, SEL_TEMPERATURE, SEL_HIGH_PREC)
+DATASET_HEADER = {
+    SEL_IQ: 2,              # u16 sample count
+    SEL_SPECTRUM: 14,       # u16 bins, u32 maxHz, u32 dHz, u32 ampl
+    SEL_PEAK_LIST: 2,       # u8 count, u8 index
+    SEL_PEAK: 10,           # u32 centi-Hz, u16, u32 amplitude
+    SEL_DISTANCE_LIST: 2,   # u8 count, u8
+    SEL_DISTANCE: 4,        # u32 µm
+    SEL_MEAS_COUNT: 4,      # u32
+    SEL_TEMPERATURE: 4,     # i16 centi-°C, 2 reserved
+    SEL_HIGH_PREC: 5,       # u8 lost, i32 µm
+}
+# body bytes per item for datasets whose header carries a count (IQ: I+Q per sample,
+# spectrum: magnitude+threshold per bin)
+ITEM_BYTES = {SEL_IQ: 2, SEL_SPECTRUM: 2, SEL_PEAK_LIST: 10, SEL_DISTANCE_LIST: 4}
+
+def selected_datasets(mask: int) -> tuple:
+    return tuple(b for b in SEL_ORDER if mask & b)
+
+def dataset_body_size(bit: int, hdr, off: int = 0) -> int:
+    # bytes that follow the fixed header, given the header bytes at hdr[off:]
+    if bit == SEL_IQ or bit == SEL_SPECTRUM: return 2 * ((hdr[off] << 8) | hdr[off + 1])
+    if bit == SEL_PEAK_LIST: return 10 * hdr[off]
+    if bit == SEL_DISTANCE_LIST: return 4 * hdr[off]
+    return 0
+
+def min_response_size(mask: int) -> int:
+    # response length when every dataset succeeds and every list is empty
+    return sum(1 + DATASET_HEADER[b] for b in selected_datasets(mask))
+
+def response_size(mask: int, counts=None) -> int:
+    # response length when every dataset succeeds; counts: {bit: items} for the ITEM_BYTES
+    # datasets (IQ samples, spectrum bins, list entries), missing ones taken as empty
+    counts = counts or {}
+    return min_response_size(mask) + sum(ITEM_BYTES[b] * counts.get(b, 0) for b in selected_datasets(mask) if b in ITEM_BYTES)
@@ -0,0 +1,135 @@
+# ondosense/replay.py
+# Plays a capture file (see capture.py) through the same frame signal as SerialWorker.
+# Records hold every byte a poll read, stale or garbled ones included, so they are decoded with
+# the link's ResponseParser (resync, plausibility checks) rather than decode_response.
+from PyQt6 import QtCore
+from PyQt6.QtCore import pyqtSignal, QObject
+import argparse, threading, time
+from .capture import CaptureReader
+from .frame import MeasurementFrame
+from .parser import ResponseParser
+
+class ReplayWorker(QObject):
+    connected   = pyqtSignal(bool, str)
+    statusmsg   = pyqtSignal(str)
+    errored     = pyqtSignal(str)
+    frame       = pyqtSignal(object)             # MeasurementFrame, once per recorded poll
+    position    = pyqtSignal(int, int)           # (record index, record count), ~10 Hz
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        super().__init__()
+        self.path = path
+        self.speed = float(speed)   # 1.0 = real time, N = N× faster, 0 = as fast as possible
+        self.loop = loop
+        self.running = False
+        self.reader = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._seek = None
+
+    # ------------- lifecycle -------------
+    @QtCore.pyqtSlot()
+    def start(self):
+        try:
+            self.reader = CaptureReader(self.path)
+        except (OSError, ValueError) as e:
+            self.connected.emit(False, f"Replay failed: {e}"); return
+        self.running = True
+        self.connected.emit(True, f"Replaying {self.path}: {len(self.reader)} frames, {self.reader.duration:.1f} s")
+        self._thread = threading.Thread(target=self._run, name="ondosense-replay", daemon=True)
+        self._thread.start()
+
+    @QtCore.pyqtSlot()
+    def stop(self):
+        self.running = False; self._wake.set()
+        if self._thread and self._thread is not threading.current_thread(): self._thread.join(2.0)
+        self._thread = None
+        if self.reader: self.reader.close(); self.reader = None
+        self.connected.emit(False, "Replay stopped")
+
+    # ------------- live settings -------------
+    @QtCore.pyqtSlot(float)
+    def set_speed(self, speed: float):
+        self.speed = max(0.0, float(speed)); self._wake.set()
+
+    @QtCore.pyqtSlot(bool)
+    def set_loop(self, loop: bool):
+        self.loop = bool(loop)
+
+    @QtCore.pyqtSlot(int)
+    def seek(self, index: int):
+        self._seek = max(0, int(index)); self._wake.set()
+
+    @QtCore.pyqtSlot(float)
+    def seek_time(self, t: float):
+        if self.reader: self.seek(self.reader.find_time(self.reader.index["t"][0] + t))
+
+    # ------------- playback -------------
+    def _run(self):
+        rd = self.reader; n = len(rd)
+        i = 0; t_pos = 0.0; passes = 0
+        base = None  # (wall clock, record time) the pacing is anchored to
+        t_pass = t_report = time.perf_counter(); done = bad = 0
+        p = ResponseParser()
+        while self.running:
+            if self._seek is not None:
+                i = min(self._seek, n); self._seek = None; base = None
+            if i >= n:
+                now = time.perf_counter(); dt = now - t_pass
+                if not self.loop or now - t_report >= 1.0:  # short loops would flood the log
+                    t_report = now
+                    self.statusmsg.emit(f"Replay pass {passes + 1}: {done} frames in {dt:.2f} s ({done / max(dt, 1e-9):.0f} frames/s)"
+                                        + (f", {bad} incomplete or garbled" if bad else ""))
+                passes += 1; done = bad = 0; t_pass = now
+                if not self.loop: break
+                i = 0; base = None
+                continue
+            t, seq, selector, baud, payload = rd[i]
+            if self.speed > 0:
+                if base is None: base = (time.perf_counter(), t)
+                wait = base[0] + (t - base[1]) / self.speed - time.perf_counter()
+                if wait > 0 and self._wake.wait(wait):
+                    self._wake.clear(); base = None; continue  # seek / speed change / stop: re-anchor
+            fr = MeasurementFrame(seq, t, selector)
+            if decode(p, fr, payload) != "done": bad += 1
+            del payload
+            if fr: self.frame.emit(fr)  # like SensorLink.poll: whatever datasets did decode
+            i += 1; done += 1
+            now = time.perf_counter()
+            if now - t_pos >= 0.1:
+                t_pos = now; self.position.emit(i, n)
+        self.position.emit(min(i, n), n)
+        if self.running:
+            self.running = False
+            self.connected.emit(False, "Replay finished")
+
+def decode(p: ResponseParser, fr: MeasurementFrame, payload) -> str:
+    # one recorded poll through the parser, as SensorLink.poll read it; returns the parser state
+    p.start(fr); p.feed(payload)
+    return p.finish()
+
+def bench(path: str, loops: int = 1) -> dict:
+    # decode-only throughput, no Qt event loop and no serial port involved
+    p = ResponseParser()
+    with CaptureReader(path) as rd:
+        frames = bad = 0; nbytes = 0
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            for i in range(len(rd)):
+                t, seq, selector, baud, payload = rd[i]
+                fr = MeasurementFrame(seq, t, selector)
+                if decode(p, fr, payload) != "done": bad += 1
+                frames += 1; nbytes += len(payload); del payload
+        dt = time.perf_counter() - t0
+    return {"frames": frames, "bad": bad, "seconds": dt, "frames_per_s": frames / dt if dt else 0.0, "MB_per_s": nbytes / dt / 1e6 if dt else 0.0}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m ondosense.replay", description="Decode throughput of a capture file")
+    ap.add_argument("path")
+    ap.add_argument("--loops", type=int, default=1)
+    a = ap.parse_args(argv)
+    r = bench(a.path, a.loops)
+    print(" ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in r.items()))
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,53 @@
 
 # ondosense/serial_worker.py
+# Qt adapter around SensorLink: slots for the GUI, results and status messages as signals.
 from PyQt6 import QtCore
 from PyQt6.QtCore import pyqtSignal, QObject, QTimer
-import serial, struct, time
+import time
 from .protocol import *
-
-def read_exact(ser: serial.Serial, n: int, overall_timeout: float) -> bytes:
-    end = time.time() + overall_timeout
-    out = bytearray()
-    while len(out) < n and time.time() < end:
-        chunk = ser.read(n - len(out))
-        if chunk: out.extend(chunk)
-        else: time.sleep(0.001)
-    return bytes(out)
+from .capture import FrameRecorder
+from .shm import FramePublisher, DEFAULT_NAME
+from .link import SensorLink, Poller, emit_frame
 
 class SerialWorker(QObject):
     # connection / status
     connected   = pyqtSignal(bool, str)
     statusmsg   = pyqtSignal(str)
+    warnmsg     = pyqtSignal(str)                # failures and budget warnings
+    tracemsg    = pyqtSignal(str)                # hex dumps of command frames, only while set_trace(True)
+    sensor_id   = pyqtSignal(object)             # PARAM_SN read on connect (None if it failed)
     errored     = pyqtSignal(str)
+    polls_missed= pyqtSignal(int)                # total scheduled polls that could not be issued
+    rate_clamped= pyqtSignal(float)              # rate_hz lowered to the link budget (cfg rate_limit "clamp")
 
     # measurement data
-    distance    = pyqtSignal(float)
-    distance_list = pyqtSignal(list)
-    spectrum    = pyqtSignal(object)
-    iq          = pyqtSignal(object)
-    peak_list   = pyqtSignal(object)
-    peak        = pyqtSignal(object)
-    meas_count  = pyqtSignal(int)
-    temperature = pyqtSignal(float)
-    high_prec   = pyqtSignal(object)
+    frame       = pyqtSignal(object)             # MeasurementFrame, once per poll
 
     # parameters
     param_read  = pyqtSignal(int, int)           # (pid, value)
     param_limits= pyqtSignal(int, int, int)      # (pid, min, max)
     param_write = pyqtSignal(int, bool, int)     # (pid, ok, status)
+    param_batch = pyqtSignal(list)               # [(cmd, pid, status, value)], one per op of run_params
 
     def __init__(self):
         super().__init__()
-        self.ser = None
+        self.link = SensorLink(log=self.statusmsg.emit, warn=self.warnmsg.emit)
+        self.cfg = self.link.cfg  # shared: live settings go straight to the link
+        self.link.on_clamp = self.rate_clamped.emit
         self.timer = QTimer(self)
         self.timer.timeout.connect(self._poll_once)
         self.running = False
-        self.busy = False  # guard re-entrancy
-        self.cfg = {
-            "port": "COM3",
-            "baud": 19200,
-            "timeout": 0.5,
-            "rate_hz": 10.0,
-            "rts_de": False,
-            "de_active_low": False,
-            "pre": 0.003, "post": 0.003,
-            "selector": SEL_DISTANCE,
-            "auto_write_selector": True,
-        }
+        self._acq = Poller(self.link, self.frame.emit, self._add_missed)
+        self._missed_emit_t = 0.0
+        self._due = None  # timer mode: when the current tick was due (see _poll_once)
+
+    @property
+    def ser(self):
+        return self.link.ser
+
+    @property
+    def recorder(self):
+        return self.link.recorder
 
     # ------------- lifecycle -------------
     @QtCore.pyqtSlot(dict)
@@ -63,15 +57,16 @@ class SerialWorker(QObject):
     @QtCore.pyqtSlot()
     def start(self):
         try:
-            self._open_serial(self.cfg["baud"])
-            if self.cfg["rts_de"]:
-                self._set_rts(False)
+            self.link.open()
             if self.cfg["auto_write_selector"]:
-                self._write_selector(self.cfg["selector"])
+                self.link.write_selector(self.cfg["selector"])
+            self.link.check_rate()
+            self.sensor_id.emit(self.link.sn if self.link.sn is not None else self.link.read_param(PARAM_SN))
             self.running = True
             self.connected.emit(True, f"Opened {self.cfg['port']} @ {self.cfg['baud']}")
             self._reset_timer()
         except Exception as e:
+            self.link.close()
             self.connected.emit(False, f"Open failed: {e}")
 
     @QtCore.pyqtSlot()
@@ -81,10 +76,9 @@ class SerialWorker(QObject):
             self.timer.stop()
         except Exception:
             pass
-        try:
-            if self.ser: self.ser.close()
-        except Exception:
-            pass
+        self._acq.stop()
+        self.stop_recording()
+        self.link.close()
         self.connected.emit(False, "Disconnected")
 
     # ------------- live settings -------------
@@ -92,377 +86,191 @@ class SerialWorker(QObject):
     def set_selector(self, mask: int):
         self.cfg["selector"] = mask
         if self.cfg["auto_write_selector"] and self.ser:
-            self._write_selector(mask)
+            self.link.write_selector(mask)
+        self._check_rate()
 
     @QtCore.pyqtSlot(float)
     def set_rate(self, hz: float):
         self.cfg["rate_hz"] = max(0.5, float(hz))
+        self.link.check_rate()
         self._reset_timer()
         self.statusmsg.emit(f"Rate set to {self.cfg['rate_hz']:.1f} Hz")
 
+    @QtCore.pyqtSlot(bool)
+    def set_trace(self, on: bool):
+        self.link.trace = self.tracemsg.emit if on else None
+
+    @QtCore.pyqtSlot(bool)
+    def set_latency(self, on: bool):
+        self.link.latency.enabled = bool(on)
+        self.statusmsg.emit(f"Latency instrumentation {'on' if on else 'off'}")
+
+    @QtCore.pyqtSlot(str)
+    def set_rate_limit(self, policy: str):
+        # "warn" or "clamp" (see SensorLink.check_rate)
+        self.cfg["rate_limit"] = policy
+        self._check_rate()
+
+    @QtCore.pyqtSlot(str)
+    def set_acq_mode(self, mode: str):
+        self.cfg["acq_mode"] = mode
+        self.link.check_rate()
+        self._reset_timer()
+        self.statusmsg.emit(f"Acquisition mode: {mode}")
+
+    def _check_rate(self):
+        # re-check after anything that changes bytes per poll or the baud
+        hz = self.cfg["rate_hz"]
+        self.link.check_rate()
+        if self.cfg["rate_hz"] != hz: self._reset_timer()
+
     def _reset_timer(self):
+        self._due = None
         if not self.running: return
-        interval_ms = max(int(1000.0 / float(self.cfg["rate_hz"])), 5)
-        self.timer.start(interval_ms)
+        if self.cfg["acq_mode"] == "timer":
+            self._acq.stop()
+            interval_ms = max(int(1000.0 / float(self.cfg["rate_hz"])), 5)
+            self.timer.start(interval_ms)
+            return
+        self.timer.stop()
+        self._acq.start()
+
+    def _add_missed(self, k: int):
+        # k more polls already counted in link.stats.missed; report the total at most once a second
+        now = time.monotonic()
+        if now - self._missed_emit_t >= 1.0:
+            self._missed_emit_t = now
+            self.polls_missed.emit(self.link.stats.missed)
 
     @QtCore.pyqtSlot(float)
     def set_timeout(self, sec: float):
-        self.cfg["timeout"] = max(0.05, float(sec))
-        if self.ser: self.ser.timeout = self.cfg["timeout"]
+        self.link.set_timeout(sec)
         self.statusmsg.emit(f"Timeout set to {self.cfg['timeout']:.2f} s")
 
+    @QtCore.pyqtSlot(float)
+    def set_margin(self, sec: float):
+        self.link.set_margin(sec)
+        self.statusmsg.emit(f"Sensor margin set to {self.cfg['margin'] * 1e3:.0f} ms")
+
     @QtCore.pyqtSlot(bool, bool)
     def set_rts_options(self, rts_de: bool, active_low: bool):
-        self.cfg["rts_de"] = bool(rts_de)
-        self.cfg["de_active_low"] = bool(active_low)
-        if self.ser and self.cfg["rts_de"]:
-            self._set_rts(False)
+        self.link.set_rts_options(rts_de, active_low)
         self.statusmsg.emit(f"RTS/DE={'on' if rts_de else 'off'}, active-low={'yes' if active_low else 'no'}")
 
+    # ------------- raw capture -------------
+    @QtCore.pyqtSlot(str)
+    def start_recording(self, path: str):
+        self.stop_recording()
+        try:
+            self.link.recorder = FrameRecorder(path).start()
+            self.statusmsg.emit(f"Recording raw frames to {path}")
+        except OSError as e:
+            self.link.recorder = None
+            self.warnmsg.emit(f"Recording failed: {e}")
+
+    @QtCore.pyqtSlot()
+    def stop_recording(self):
+        rec = self.link.recorder; self.link.recorder = None
+        if rec is None: return
+        rec.stop()
+        self.statusmsg.emit(f"Recording stopped: {rec.frames} frames, {rec.bytes} bytes, {rec.dropped} dropped")
+
+    # ------------- shared-memory publishing -------------
+    @QtCore.pyqtSlot(str)
+    def start_publishing(self, name: str = DEFAULT_NAME) -> bool:
+        self.stop_publishing()
+        try:
+            self.link.publisher = FramePublisher(name)
+        except (OSError, ValueError) as e:
+            self.warnmsg.emit(f"Publishing failed: {e}"); return False
+        self.statusmsg.emit(f"Publishing frames to shared memory '{name}'")
+        return True
+
+    @QtCore.pyqtSlot()
+    def stop_publishing(self):
+        with self.link.lock:  # not while a poll is writing into it
+            pub = self.link.publisher; self.link.publisher = None
+        if pub is None: return
+        pub.close()
+        self.statusmsg.emit(f"Publishing stopped: {pub.frames} frames, {pub.truncated} truncated")
+
     # ------------- parameter ops -------------
     @QtCore.pyqtSlot(int)
     def read_param(self, pid: int):
-        if not self.ser: 
-            self.statusmsg.emit("Not connected"); return
-        try:
-            self.busy = True
-            self._pre_tx(); self.ser.reset_input_buffer()
-            self.ser.write(bytes([CMD_READ_PARAM, pid])); self.ser.flush()
-            self._post_tx()
-            st_b = read_exact(self.ser, 1, self.cfg["timeout"])
-            if len(st_b)==1 and st_b[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                val_b = read_exact(self.ser, 4, self.cfg["timeout"])
-                if len(val_b)==4:
-                    v = struct.unpack(">i", val_b)[0]
-                    self.param_read.emit(pid, v)
-                else:
-                    self.statusmsg.emit(f"Read 0x{pid:02X}: short value")
-            else:
-                self.statusmsg.emit(f"Read 0x{pid:02X}: no status")
-        except Exception as e:
-            self.statusmsg.emit(f"Read error 0x{pid:02X}: {e}")
-        finally:
-            self.busy = False
+        v = self.link.read_param(pid)
+        if v is not None: self.param_read.emit(pid, v)
 
     @QtCore.pyqtSlot(int)
     def read_min(self, pid: int):
-        self._read_limit(pid, CMD_READ_MIN, is_min=True)
+        v = self.link.read_limit(pid, CMD_READ_MIN)
+        if v is not None: self.param_limits.emit(pid, v, None)
 
     @QtCore.pyqtSlot(int)
     def read_max(self, pid: int):
-        self._read_limit(pid, CMD_READ_MAX, is_min=False)
-
-    def _read_limit(self, pid: int, cmd: int, is_min: bool):
-        if not self.ser: 
-            self.statusmsg.emit("Not connected"); return
-        try:
-            self.busy = True
-            self._pre_tx(); self.ser.reset_input_buffer()
-            self.ser.write(bytes([cmd, pid])); self.ser.flush()
-            self._post_tx()
-            st_b = read_exact(self.ser, 1, self.cfg["timeout"])
-            if len(st_b)==1 and st_b[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                val_b = read_exact(self.ser, 4, self.cfg["timeout"])
-                if len(val_b)==4:
-                    v = struct.unpack(">i", val_b)[0]
-                    if is_min: self.param_limits.emit(pid, v, None)
-                    else:      self.param_limits.emit(pid, None, v)
-                else:
-                    self.statusmsg.emit(f"Limit 0x{pid:02X}: short")
-            else:
-                self.statusmsg.emit(f"Limit 0x{pid:02X}: no status")
-        except Exception as e:
-            self.statusmsg.emit(f"Limit error 0x{pid:02X}: {e}")
-        finally:
-            self.busy = False
-
-    def _hex(self, data: bytes) -> str:
-        return " ".join(f"{b:02X}" for b in data)
+        v = self.link.read_limit(pid, CMD_READ_MAX)
+        if v is not None: self.param_limits.emit(pid, None, v)
 
     @QtCore.pyqtSlot(int, int)
     def write_param(self, pid: int, value: int):
         if not self.ser:
-            self.statusmsg.emit("Not connected"); return
-        try:
-            self.busy = True
-            if pid == PARAM_BAUD:
-                self.set_sensor_baud(int(value))
-                self.param_write.emit(pid, True, STATUS_SUCCESS); return
-
-            self._pre_tx()
-            self.ser.reset_input_buffer()
-            frame = bytes([CMD_WRITE_PARAM, pid]) + struct.pack(">i", int(value))
-            self.statusmsg.emit(f"TX write 0x{pid:02X} ({len(frame)}): {self._hex(frame)}")
-            self.ser.write(frame); self.ser.flush()
-            self._post_tx()
-
-            ack = read_exact(self.ser, 1, self.cfg["timeout"])
-            self.statusmsg.emit(f"RX ack: {self._hex(ack) if ack else '(none)'}")
-            ok = len(ack)==1 and ack[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK)
-            self.param_write.emit(pid, ok, ack[0] if ack else -1)
-        except Exception as e:
-            self.statusmsg.emit(f"Write error 0x{pid:02X}: {e}")
-            self.param_write.emit(pid, False, -1)
-        finally:
-            self.busy = False
+            self.warnmsg.emit("Not connected"); return
+        ok, status = self.link.write_param(pid, value)
+        if ok and pid == PARAM_BAUD: self._check_rate()
+        self.param_write.emit(pid, ok, status)
+
+    @QtCore.pyqtSlot(list)
+    def run_params(self, ops: list):
+        if not self.ser:
+            self.warnmsg.emit("Not connected"); return
+        t0 = time.perf_counter()
+        res = self.link.param_batch(ops)
+        failed = sum(1 for r in res if r[2] not in STATUS_OK)
+        self.statusmsg.emit(f"Batch: {len(res)}/{len(ops)} ops in {(time.perf_counter() - t0) * 1e3:.0f} ms, {failed} failed")
+        self.param_batch.emit(res)
 
     @QtCore.pyqtSlot()
     def save_params(self):
         to = max(self.cfg.get('timeout', 0.5) * 2.0, 1.0)
-        self._simple_cmd(CMD_SAVE_PARAMS, "Save params (0x0F)", expect_status=True, timeout_override=to)
+        self.link.simple_cmd(CMD_SAVE_PARAMS, "Save params (0x0F)", expect_status=True, timeout_override=to)
 
     @QtCore.pyqtSlot()
     def autoset_amplifier(self):
-        self._simple_cmd(CMD_AUTOS_AMP, "Autoset amplifier (0x07)")
+        self.link.simple_cmd(CMD_AUTOS_AMP, "Autoset amplifier (0x07)")
 
     @QtCore.pyqtSlot()
     def bg_cal(self):
-        self._simple_cmd(CMD_BG_CAL, "Background calibration (0x0D)")
+        self.link.simple_cmd(CMD_BG_CAL, "Background calibration (0x0D)")
 
     @QtCore.pyqtSlot()
     def bg_remove(self):
-        self._simple_cmd(CMD_BG_REMOVE, "Remove background (0x0E)")
+        self.link.simple_cmd(CMD_BG_REMOVE, "Remove background (0x0E)")
 
     @QtCore.pyqtSlot()
     def restart_hp(self):
-        self._simple_cmd(CMD_RESTART_HP, "Restart high-precision (0x19)")
+        self.link.simple_cmd(CMD_RESTART_HP, "Restart high-precision (0x19)")
 
     @QtCore.pyqtSlot()
     def factory_reset(self):
-        if not self.ser: 
-            self.statusmsg.emit("Not connected"); return
-        try:
-            self.busy = True
-            self._pre_tx(); self.ser.reset_input_buffer()
-            self.ser.write(bytes([CMD_FACTORY_RESET]) + b"RESET"); self.ser.flush()
-            self._post_tx()
-            ack = read_exact(self.ser, 1, self.cfg["timeout"])
-            ok = len(ack)==1 and ack[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK)
-            self.statusmsg.emit("Factory reset OK" if ok else "Factory reset FAILED")
-        except Exception as e:
-            self.statusmsg.emit(f"Factory reset error: {e}")
-        finally:
-            self.busy = False
+        self.link.factory_reset()
 
     @QtCore.pyqtSlot(int)
     def set_sensor_baud(self, new_baud: int):
-        if not self.ser:
-            self.statusmsg.emit("Not connected"); return
-        try:
-            self.busy = True
-            self._pre_tx(); self.ser.reset_input_buffer()
-            self.ser.write(bytes([CMD_WRITE_PARAM, PARAM_BAUD]) + struct.pack(">i", int(new_baud)))
-            self.ser.flush()
-            self._post_tx()
-            ack = read_exact(self.ser, 1, self.cfg["timeout"])
-            if not (len(ack)==1 and ack[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK)):
-                self.statusmsg.emit("Baud write FAILED"); return
-            self._reopen_serial(new_baud)
-            self.statusmsg.emit(f"Reopened at {new_baud} baud")
-        except Exception as e:
-            self.statusmsg.emit(f"Baud change error: {e}")
-        finally:
-            self.busy = False
-
-    # ------------- simple command helper -------------
-    def _simple_cmd(self, cmd: int, label: str = "", expect_status: bool = True, timeout_override: float | None = None):
-        if not self.ser:
-            self.statusmsg.emit("Not connected"); return
-        try:
-            self.busy = True
-            self._pre_tx()
-            self.ser.reset_input_buffer()
-            tx = bytes([cmd])
-            self.statusmsg.emit(f"TX cmd{f' {label}' if label else ''}: {self._hex(tx)}")
-            self.ser.write(tx); self.ser.flush()
-            self._post_tx()
-            if expect_status:
-                ack = read_exact(self.ser, 1, (timeout_override if timeout_override is not None else self.cfg["timeout"]))
-                self.statusmsg.emit(f"RX ack: {self._hex(ack) if ack else '(none)'}")
-                ok = len(ack)==1 and ack[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK)
-                code = f"0x{ack[0]:02X}" if ack else "(no byte)"
-                self.statusmsg.emit(f"{label}: {'OK' if ok else 'FAIL (' + code + ')'}")
-            else:
-                self.statusmsg.emit(f"{label}: sent")
-        except Exception as e:
-            self.statusmsg.emit(f"{label}: error {e}")
-        finally:
-            self.busy = False
+        if self.link.set_sensor_baud(new_baud): self._check_rate()
 
     # ------------- polling -------------
     @QtCore.pyqtSlot()
     def _poll_once(self):
-        if not self.running or self.busy or not self.ser:
-            return
-        if self.cfg["selector"] == 0:
+        if not self.running or not self.ser:
             return
-        try:
-            self.busy = True
-            self._send_measure()
-
-            def want(bit): return (self.cfg["selector"] & bit) != 0
-
-            # IQ
-            if want(SEL_IQ):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    cnt_b = read_exact(self.ser, 2, self.cfg["timeout"])
-                    if len(cnt_b)==2:
-                        cnt = struct.unpack(">H", cnt_b)[0]
-                        raw = read_exact(self.ser, 2*cnt, self.cfg["timeout"])
-                        if len(raw)==2*cnt:
-                            I = [raw[i] for i in range(0, 2*cnt, 2)]
-                            Q = [raw[i] for i in range(1, 2*cnt, 2)]
-                            self.iq.emit({"I": I, "Q": Q})
-
-            # Spectrum
-            if want(SEL_SPECTRUM):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    cnt_b = read_exact(self.ser, 2, self.cfg["timeout"])
-                    hdr = read_exact(self.ser, 12, self.cfg["timeout"])
-                    if len(cnt_b)==2 and len(hdr)==12:
-                        cnt = struct.unpack(">H", cnt_b)[0]
-                        maxHz, dHz, ampl = struct.unpack(">III", hdr)
-                        mags = read_exact(self.ser, cnt, self.cfg["timeout"])
-                        thrs = read_exact(self.ser, cnt, self.cfg["timeout"])
-                        if len(mags)==cnt and len(thrs)==cnt:
-                            f0 = maxHz - (cnt - 1)*dHz
-                            freq = [f0 + i*dHz for i in range(cnt)]
-                            self.spectrum.emit({"freq": freq, "mag": list(mags), "thr": list(thrs),
-                                                "meta": {"count": cnt, "maxHz": maxHz, "dHz": dHz, "ampl": ampl}})
-
-            # Peak list
-            if want(SEL_PEAK_LIST):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    cntidx = read_exact(self.ser, 2, self.cfg["timeout"])
-                    if len(cntidx)==2:
-                        c, idx = cntidx[0], cntidx[1]
-                        raw = read_exact(self.ser, c*10, self.cfg["timeout"])
-                        if len(raw)==c*10:
-                            freqs = []; amps = []; off = 0
-                            for _ in range(c):
-                                f_centi = struct.unpack(">I", raw[off:off+4])[0]; off += 4
-                                off += 2
-                                amp = struct.unpack(">I", raw[off:off+4])[0]; off += 4
-                                freqs.append(f_centi/100.0); amps.append(amp)
-                            self.peak_list.emit({"freq": freqs, "amp": amps, "idx": idx})
-
-            # Peak
-            if want(SEL_PEAK):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    raw = read_exact(self.ser, 10, self.cfg["timeout"])
-                    if len(raw)==10:
-                        f_centi = struct.unpack(">I", raw[0:4])[0]
-                        amp = struct.unpack(">I", raw[6:10])[0]
-                        self.peak.emit({"freq": f_centi/100.0, "amp": amp})
-
-            # Distance list
-            if want(SEL_DISTANCE_LIST):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    ci = read_exact(self.ser, 2, self.cfg["timeout"])
-                    if len(ci)==2:
-                        c = ci[0]
-                        vals = []
-                        for _ in range(c):
-                            d_um_b = read_exact(self.ser, 4, self.cfg["timeout"])
-                            if len(d_um_b)!=4: vals = []; break
-                            vals.append(struct.unpack(">I", d_um_b)[0] / 1e6)
-                        if vals:
-                            self.distance_list.emit(vals)
-
-            # Distance
-            if want(SEL_DISTANCE):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    d_b = read_exact(self.ser, 4, self.cfg["timeout"])
-                    if len(d_b)==4:
-                        self.distance.emit(struct.unpack(">I", d_b)[0] / 1e6)
-
-            # Measurement count
-            if want(SEL_MEAS_COUNT):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    c_b = read_exact(self.ser, 4, self.cfg["timeout"])
-                    if len(c_b)==4:
-                        self.meas_count.emit(struct.unpack(">I", c_b)[0])
-
-            # Temperature
-            if want(SEL_TEMPERATURE):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    t_b = read_exact(self.ser, 4, self.cfg["timeout"])
-                    if len(t_b)==4:
-                        t_int = struct.unpack(">h", t_b[0:2])[0] / 100.0
-                        self.temperature.emit(t_int)
-
-            # High precision
-            if want(SEL_HIGH_PREC):
-                s = read_exact(self.ser, 1, self.cfg["timeout"])
-                if len(s)==1 and s[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK):
-                    hp_b = read_exact(self.ser, 5, self.cfg["timeout"])
-                    if len(hp_b)==5:
-                        lost = hp_b[0]
-                        d_hp = struct.unpack(">i", hp_b[1:5])[0] / 1e6
-                        self.high_prec.emit({"d_m": d_hp, "lost": lost})
-        except Exception as e:
-            self.statusmsg.emit(f"Poll error: {e}")
-        finally:
-            self.busy = False
-
-    # ------------- helpers -------------
-    def _open_serial(self, baud: int):
-        self.ser = serial.Serial(
-            port=self.cfg["port"], baudrate=int(baud),
-            bytesize=serial.EIGHTBITS, parity=serial.PARITY_NONE, stopbits=serial.STOPBITS_ONE,
-            timeout=self.cfg["timeout"], write_timeout=self.cfg["timeout"],
-            rtscts=False, dsrdtr=False, xonxoff=False
-        )
-        self.cfg["baud"] = int(baud)
-
-    def _reopen_serial(self, baud: int):
-        try:
-            if self.ser: self.ser.close()
-        except Exception: pass
-        time.sleep(0.1)
-        self._open_serial(baud)
-        if self.cfg["rts_de"]: self._set_rts(False)
-
-    def _pre_tx(self):
-        if self.cfg["rts_de"]:
-            self._set_rts(True); time.sleep(self.cfg["pre"])
-
-    def _post_tx(self):
-        if self.cfg["rts_de"]:
-            self._set_rts(False)
-        time.sleep(self.cfg["post"])
-
-    def _set_rts(self, tx: bool):
-        if not self.ser: return
-        level = (not tx) if self.cfg["de_active_low"] else tx
-        self.ser.rts = level
-
-    def _write_selector(self, mask: int) -> bool:
-        try:
-            self._pre_tx()
-            self.ser.reset_input_buffer()
-            frame = bytes([CMD_WRITE_PARAM, PARAM_SELECTOR, 0, 0, 0, mask & 0xFF])
-            self.statusmsg.emit(f"TX selector ({len(frame)}): {self._hex(frame)}")
-            self.ser.write(frame); self.ser.flush()
-            self._post_tx()
-            ack = read_exact(self.ser, 1, self.cfg["timeout"])
-            self.statusmsg.emit(f"RX ack: {self._hex(ack) if ack else '(none)'}")
-            ok = len(ack)==1 and ack[0] in (STATUS_SUCCESS, STATUS_SUCCESS_WEAK)
-            self.statusmsg.emit(f"Selector -> {mask} {'OK' if ok else 'FAILED'}")
-            return ok
-        except Exception:
-            return False
-
-    def _send_measure(self):
-        self._pre_tx()
-        self.ser.reset_input_buffer()
-        self.ser.write(bytes([CMD_MEASUREMENT])); self.ser.flush()
-        self._post_tx()
+        # Missed polls are counted from the time since the last tick, as in Poller: ticks Qt
+        # coalesced while a poll blocked never arrive, and a tick while busy is skipped
+        now = time.perf_counter(); period = 1.0 / float(self.cfg["rate_hz"])
+        due = self._due if self._due is not None and self._due <= now else now
+        k = int((now - due) / period); busy = self.link.busy
+        self._due = due + (k + 1 + busy) * period
+        if k + busy: self.link.stats.missed += k + busy; self._add_missed(k + busy)
+        if busy: return
+        hz = self.cfg["rate_hz"]
+        fr = self.link.poll()
+        if fr is not None: emit_frame(self.link.latency, self.frame.emit, fr)
+        if self.cfg["rate_hz"] != hz: self._reset_timer()  # clamped by the poll's check_rate
@@ -0,0 +1,180 @@
+# ondosense/series.py
+# Fixed-capacity (x, y) history backed by preallocated NumPy arrays.
+# Every sample is written twice (at i and i + capacity) so the newest `n` samples are
+# always one contiguous slice: view() is zero-copy and append() is O(1).
+import numpy as np
+
+class RingSeries:
+    def __init__(self, capacity: int, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self._alloc(int(capacity))
+
+    def _alloc(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._x = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._y = np.zeros(2 * self.capacity, dtype=self.dtype)
+        self._i = 0; self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def clear(self):
+        self._i = 0; self._n = 0
+
+    def resize(self, capacity: int):
+        capacity = max(1, int(capacity))
+        if capacity == self.capacity: return
+        xs, ys = self.view()
+        keep = min(len(xs), capacity)
+        xs = xs[len(xs) - keep:].copy(); ys = ys[len(ys) - keep:].copy()
+        self._alloc(capacity)
+        self.extend(xs, ys)
+
+    def append(self, x: float, y):
+        i = self._i; c = self.capacity
+        self._x[i] = self._x[i + c] = x
+        self._y[i] = self._y[i + c] = y
+        self._i = i + 1 if i + 1 < c else 0
+        if self._n < c: self._n += 1
+
+    def extend(self, xs, ys):
+        xs = np.asarray(xs, dtype=np.float64); ys = np.asarray(ys, dtype=self.dtype)
+        c = self.capacity
+        if len(xs) > c: xs = xs[-c:]; ys = ys[-c:]
+        k = len(xs)
+        if not k: return
+        i = self._i; first = min(k, c - i)
+        for buf, v in ((self._x, xs), (self._y, ys)):
+            buf[i:i + first] = v[:first]; buf[i + c:i + c + first] = v[:first]
+            if k > first:
+                buf[:k - first] = v[first:]; buf[c:c + k - first] = v[first:]
+        self._i = (i + k) % c
+        self._n = min(c, self._n + k)
+
+    def view(self):
+        # newest `len(self)` samples, oldest first; valid until the next append
+        end = self._i + self.capacity
+        return self._x[end - self._n:end], self._y[end - self._n:end]
+
+    def last(self):
+        j = self._i - 1 if self._i else self.capacity - 1
+        return (self._x[j], self._y[j]) if self._n else None
+
+class RingImage:
+    # Fixed-capacity history of equal-length rows (e.g. spectra) in one preallocated 2D array.
+    # Same double-write layout as RingSeries: view() is always `rows` contiguous rows, oldest
+    # first, so an image can be built on it without copying. Rows not written yet are zero.
+    # The row width is taken from the first row; a row of another width starts over.
+    def __init__(self, rows: int, dtype=np.uint8):
+        self.dtype = np.dtype(dtype)
+        self.rows = max(1, int(rows)); self.width = 0
+        self._buf = np.zeros((2 * self.rows, 0), dtype=self.dtype)
+        self._i = 0; self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def clear(self):
+        self._buf[:] = 0; self._i = 0; self._n = 0
+
+    def _alloc(self, rows: int, width: int):
+        self.rows = max(1, rows); self.width = width
+        self._buf = np.zeros((2 * self.rows, width), dtype=self.dtype)
+        self._i = 0; self._n = 0
+
+    def resize(self, rows: int):
+        rows = max(1, int(rows))
+        if rows == self.rows: return
+        keep = self.view()[self.rows - min(self._n, rows):].copy()
+        self._alloc(rows, self.width)
+        if len(keep): self.extend(keep)
+
+    def extend(self, block):
+        # append rows (k x width); only the k new rows are written
+        block = np.asarray(block, dtype=self.dtype)
+        if block.ndim == 1: block = block[None, :]
+        if block.shape[1] != self.width: self._alloc(self.rows, block.shape[1])
+        c = self.rows
+        if len(block) > c: block = block[-c:]
+        k = len(block)
+        if not k: return
+        i = self._i; first = min(k, c - i); buf = self._buf
+        buf[i:i + first] = block[:first]; buf[i + c:i + c + first] = block[:first]
+        if k > first:
+            buf[:k - first] = block[first:]; buf[c:c + k - first] = block[first:]
+        self._i = (i + k) % c
+        self._n = min(c, self._n + k)
+
+    def view(self) -> np.ndarray:
+        # all `rows` rows, oldest first (the newest is the last one); valid until the next extend
+        return self._buf[self._i:self._i + self.rows]
+
+class LodSeries(RingSeries):
+    # RingSeries plus a min/max pyramid for drawing long histories. Level k summarises
+    # FACTOR**k consecutive samples as (x of the first, min y, max y). extend() recomputes only
+    # the buckets the new samples touch, so its cost follows the new samples, not the history.
+    # query() returns about one min/max pair per pixel for an x range, or the raw samples
+    # themselves once there are few enough. x must not decrease.
+    FACTOR = 4
+
+    def _alloc(self, capacity: int):
+        super()._alloc(capacity)
+        self._total = 0   # samples added since the last clear; ordinal of the next one
+        self._levels = []  # [bucket size, capacity, x, lo, hi], rings written twice like the samples
+        b = self.FACTOR
+        while b < self.capacity:
+            c = self.capacity // b + 2
+            self._levels.append([b, c, np.zeros(2 * c), np.zeros(2 * c, dtype=self.dtype), np.zeros(2 * c, dtype=self.dtype)])
+            b *= self.FACTOR
+
+    def clear(self):
+        super().clear(); self._total = 0
+
+    def append(self, x: float, y):
+        self.extend((x,), (y,))
+
+    def extend(self, xs, ys):
+        k = len(xs)
+        evicted = self._total - self._n  # ordinal of the oldest sample before this extend
+        super().extend(xs, ys)
+        if not k: return
+        old = self._total; self._total += k
+        first = self._total - self._n
+        self._update(max(old, first), self._total)
+        if evicted < first < old:
+            self._update(first, first + 1)  # the oldest bucket at each level lost some of its samples
+
+    def _update(self, start: int, stop: int):
+        # rebuild, at every level, the buckets holding sample ordinals [start, stop), each from
+        # the samples (or lower-level buckets) still in the ring
+        sx, sy = self.view(); slo = shi = sy
+        first = self._total - self._n; end = self._total  # source items [first, end) in source units
+        f = self.FACTOR
+        for lev in self._levels:
+            _, c, X, LO, HI = lev
+            b0 = start // f; b1 = (stop - 1) // f + 1
+            lo = max(b0 * f, first); hi = min(b1 * f, end)  # source items of those buckets
+            starts = np.maximum(np.arange(b0, b1) * f, first) - lo
+            seg = slice(lo - first, hi - first)
+            j = np.arange(b0, b1) % c
+            for arr, v in ((X, sx[seg][starts]), (LO, np.fmin.reduceat(slo[seg], starts)), (HI, np.fmax.reduceat(shi[seg], starts))):
+                arr[j] = v; arr[j + c] = v
+            first = first // f; end = (end - 1) // f + 1; start = b0; stop = b1
+            j0 = first % c
+            sx, slo, shi = X[j0:j0 + end - first], LO[j0:j0 + end - first], HI[j0:j0 + end - first]
+
+    def query(self, x0: float, x1: float, pixels: int):
+        # (x, y) to draw [x0, x1] at `pixels` width: raw samples, or per bucket its x twice with
+        # min then max. Includes one point beyond each end so lines run to the edges.
+        xs, ys = self.view()
+        i0 = max(0, int(np.searchsorted(xs, x0)) - 1); i1 = min(len(xs), int(np.searchsorted(xs, x1, "right")) + 1)
+        pixels = max(1, int(pixels))
+        if i1 - i0 <= 2 * pixels or not self._levels: return xs[i0:i1], ys[i0:i1]
+        for b, c, X, LO, HI in self._levels:
+            if (i1 - i0) <= b * pixels: break
+        first = self._total - self._n
+        b0 = max((first + i0) // b, first // b); b1 = (first + i1 - 1) // b + 1
+        j0 = b0 % c; m = b1 - b0
+        out_x = np.repeat(X[j0:j0 + m], 2); out_y = np.empty(2 * m, dtype=self.dtype)
+        out_y[0::2] = LO[j0:j0 + m]; out_y[1::2] = HI[j0:j0 + m]
+        return np.clip(out_x, xs[0], xs[-1]), out_y
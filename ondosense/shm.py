@@ -0,0 +1,222 @@
+# ondosense/shm.py
+# Live frames for other local processes through multiprocessing.shared_memory. The acquisition
+# thread (the only writer) copies each decoded frame into the next slot of a fixed ring; readers
+# in any process map the same block by name and read the latest or the next frames in place.
+#
+#   header   64 bytes: magic, record size, slots, array capacities, creation time, head
+#   records  `slots` records of record_dtype(...), frame n in slot n % slots
+#
+# No locks. Each record starts with a stamp: 2n+1 while frame n is being written, 2n+2 once it
+# is complete, and head (frames written so far) is bumped after that. A reader checks the stamp
+# before and after using a record; if it changed, the writer lapped the reader and the record
+# is gone. Stores are not fenced, and on weakly ordered CPUs (ARM) the final stamp can become
+# visible before the data, so each record also carries a CRC-32 of everything after it: a
+# record only counts as intact when its stamp matches and the CRC checks out.
+import math, os, struct, time, zlib
+from multiprocessing import shared_memory
+import numpy as np
+from .protocol import *
+from .frame import FIELDS
+
+MAGIC = b"OSSHMv02"
+HEADER = struct.Struct("<8sIIIIIId")     # magic, record size, slots, spectrum bins, IQ samples, list length, 0, created
+HEAD_OFFSET = 48                         # u64 frames written so far
+DATA_OFFSET = 64
+DEFAULT_NAME = "ondosense"
+BODY = 12                                # record offset of the first field the CRC covers (seq)
+_published = set()  # names created by this process
+
+def record_dtype(spectrum_bins: int, iq_samples: int, list_len: int) -> np.dtype:
+    # Fixed record layout. Absent scalars are NaN/0; `present` has the selector bit of every
+    # dataset in the frame, n_* the number of valid entries in each array.
+    return np.dtype([
+        ("stamp", "<u8"), ("crc", "<u4"),             # crc: zlib.crc32 of the record from BODY on
+        ("seq", "<u4"), ("selector", "<u2"), ("present", "<u2"),
+        ("t", "<f8"),                                 # time.time() of the poll
+        ("distance", "<f8"), ("hp_distance", "<f8"), ("peak_freq", "<f8"),
+        ("temperature", "<f4"), ("meas_count", "<u4"), ("peak_amp", "<u4"),
+        ("hp_lost", "u1"), ("n_distances", "u1"), ("n_peaks", "u1"), ("peak_idx", "u1"),
+        ("n_spectrum", "<u2"), ("n_iq", "<u2"),
+        ("spec_f0", "<f8"), ("spec_df", "<f8"), ("spec_ampl", "<u4"),  # freq = f0 + df * k
+        ("distances", "<f8", (list_len,)),
+        ("peak_freqs", "<f8", (list_len,)), ("peak_amps", "<u4", (list_len,)),
+        ("spectrum", "u1", (spectrum_bins,)), ("threshold", "u1", (spectrum_bins,)),
+        ("iq_i", "u1", (iq_samples,)), ("iq_q", "u1", (iq_samples,)),
+    ], align=True)
+
+assert record_dtype(1, 1, 1).fields["seq"][1] == BODY
+
+class FramePublisher:
+    # Owns the block. write() is called on the acquisition thread for every decoded frame;
+    # arrays longer than the capacities given here are cut (and counted in `truncated`).
+    def __init__(self, name: str = DEFAULT_NAME, slots: int = 256, spectrum_bins: int = 2048,
+                 iq_samples: int = 4096, list_len: int = 16):
+        dt = record_dtype(spectrum_bins, iq_samples, list_len)
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=DATA_OFFSET + slots * dt.itemsize)
+        HEADER.pack_into(self._shm.buf, 0, MAGIC, dt.itemsize, slots, spectrum_bins, iq_samples, list_len, 0, time.time())
+        self.name = name; self.slots = slots; _published.add(name)
+        self.frames = 0; self.truncated = 0
+        self._head = np.ndarray((), "<u8", self._shm.buf, HEAD_OFFSET); self._head[()] = 0
+        rec = np.ndarray((slots,), dt, self._shm.buf, DATA_OFFSET)
+        self._col = {f: rec[f] for f in dt.names}  # one view per field: item stores, no record scalars
+        self._body = np.ndarray((slots, dt.itemsize), np.uint8, self._shm.buf, DATA_OFFSET)[:, BODY:]
+
+    def write(self, fr):
+        n = self.frames; i = n % self.slots; c = self._col; cut = False
+        c["stamp"][i] = 2 * n + 1
+        c["seq"][i] = fr.seq & 0xFFFFFFFF; c["selector"][i] = fr.selector; c["t"][i] = fr.t
+        present = 0
+        for bit, _ in fr.items(): present |= bit
+        c["present"][i] = present
+        c["distance"][i] = math.nan if fr.distance is None else fr.distance
+        c["temperature"][i] = math.nan if fr.temperature is None else fr.temperature
+        c["meas_count"][i] = fr.meas_count or 0
+        hp = fr.high_prec
+        c["hp_distance"][i] = math.nan if hp is None else hp["d_m"]; c["hp_lost"][i] = 0 if hp is None else hp["lost"]
+        pk = fr.peak
+        c["peak_freq"][i] = math.nan if pk is None else pk["freq"]; c["peak_amp"][i] = 0 if pk is None else pk["amp"]
+        if fr.distance_list is not None: cut |= _put(c["distances"][i], fr.distance_list, c["n_distances"], i)
+        else: c["n_distances"][i] = 0
+        pl = fr.peak_list
+        if pl is not None:
+            cut |= _put(c["peak_freqs"][i], pl["freq"], c["n_peaks"], i); _put(c["peak_amps"][i], pl["amp"])
+            c["peak_idx"][i] = pl["idx"]
+        else: c["n_peaks"][i] = 0
+        sp = fr.spectrum
+        if sp is not None:
+            cut |= _put(c["spectrum"][i], sp["mag"], c["n_spectrum"], i); _put(c["threshold"][i], sp["thr"])
+            f = sp["freq"]
+            c["spec_f0"][i] = f[0] if len(f) else 0.0; c["spec_df"][i] = sp["meta"]["dHz"]; c["spec_ampl"][i] = sp["meta"]["ampl"]
+        else: c["n_spectrum"][i] = 0
+        iq = fr.iq
+        if iq is not None: cut |= _put(c["iq_i"][i], iq["I"], c["n_iq"], i); _put(c["iq_q"][i], iq["Q"])
+        else: c["n_iq"][i] = 0
+        c["crc"][i] = zlib.crc32(self._body[i])
+        c["stamp"][i] = 2 * n + 2
+        self.frames = n + 1; self._head[()] = n + 1
+        if cut: self.truncated += 1
+
+    def close(self):
+        # unlinks the name; readers that are still attached keep their mapping
+        if self._shm is None: return
+        self._head = self._col = self._body = None  # views must go before the buffer can be released
+        self._shm.close(); self._shm.unlink(); self._shm = None
+        _published.discard(self.name)
+
+def _put(dst: np.ndarray, src, count=None, i: int = 0) -> bool:
+    # copy src into the fixed-size dst (and its length into count[i]); True if it had to be cut
+    k = min(len(src), len(dst)); dst[:k] = src[:k]
+    if count is not None: count[i] = k
+    return k < len(src)
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix" and name not in _published:  # otherwise the resource tracker unlinks the publisher's block when this process exits
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+class FrameReader:
+    # Maps a FramePublisher's block from any process. Records come back as NumPy record scalars
+    # (see record_dtype; datasets() turns one into the usual dataset dicts). With copy=False
+    # they point into the shared block: check intact(n) after using one, it may have been
+    # overwritten meanwhile.
+    def __init__(self, name: str = DEFAULT_NAME):
+        self._shm = _attach(name)
+        magic, size, slots, bins, iq, lst, _, self.created = HEADER.unpack_from(self._shm.buf, 0)
+        dt = record_dtype(bins, iq, lst)
+        if magic != MAGIC or size != dt.itemsize:
+            self._shm.close(); raise ValueError(f"{name}: not an OndoSense frame ring")
+        self.name = name; self.slots = slots
+        self._head = np.ndarray((), "<u8", self._shm.buf, HEAD_OFFSET)
+        self.records = np.ndarray((slots,), dt, self._shm.buf, DATA_OFFSET)
+        self._raw = np.ndarray((slots, size), np.uint8, self._shm.buf, DATA_OFFSET)
+        self._stamp = self.records["stamp"]
+        self.cursor = self.head  # next frame for next(): the first one published after attaching
+        self.lost = 0            # frames next() skipped because the writer lapped it
+
+    @property
+    def head(self) -> int:
+        # frames written so far; the latest is head - 1
+        return int(self._head)
+
+    def intact(self, n: int) -> bool:
+        i = n % self.slots
+        return int(self._stamp[i]) == 2 * n + 2 and _crc_ok(self._raw[i])
+
+    def get(self, n: int, copy: bool = True):
+        # frame n, or None if it is not written yet or already overwritten
+        if n < 0: return None
+        i = n % self.slots
+        if not copy: return self.records[i] if self.intact(n) else None
+        if int(self._stamp[i]) != 2 * n + 2: return None
+        raw = self._raw[i].copy()  # one memcpy, not field by field
+        if int(self._stamp[i]) != 2 * n + 2 or not _crc_ok(raw): return None
+        return raw.view(self.records.dtype)[0]
+
+    def latest(self, copy: bool = True):
+        # (n, record) of the newest complete frame, or None before the first one
+        while True:
+            h = self.head
+            if h == 0: return None
+            rec = self.get(h - 1, copy)
+            if rec is not None: return h - 1, rec
+
+    def next(self, timeout: float | None = None, copy: bool = True, poll_s: float = 0.0005):
+        # (n, record) of the frame at cursor, waiting up to timeout for it (None: forever);
+        # None on timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            h = self.head
+            if self.cursor < h:
+                oldest = h - self.slots + 1  # slot of h - slots may be under the writer right now
+                if self.cursor < oldest:
+                    self.lost += oldest - self.cursor; self.cursor = oldest
+                n = self.cursor; rec = self.get(n, copy)
+                if rec is not None:
+                    self.cursor = n + 1; return n, rec
+                continue  # lapped while reading it
+            if deadline is not None and time.monotonic() >= deadline: return None
+            time.sleep(poll_s)
+
+    def seek(self, n: int):
+        self.cursor = max(0, n)
+
+    def close(self):
+        if self._shm is None: return
+        self._head = self.records = self._raw = self._stamp = None
+        self._shm.close(); self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _crc_ok(raw: np.ndarray) -> bool:
+    # raw: one record as bytes
+    return zlib.crc32(raw[BODY:]) == int(raw[8:12].view("<u4")[0])
+
+def datasets(rec) -> dict:
+    # record -> {dataset name: value} for the datasets present, shaped like MeasurementFrame's;
+    # arrays are views into rec
+    present = int(rec["present"]); out = {}
+    if present & SEL_IQ:
+        k = int(rec["n_iq"]); out[FIELDS[SEL_IQ]] = {"I": rec["iq_i"][:k], "Q": rec["iq_q"][:k]}
+    if present & SEL_SPECTRUM:
+        k = int(rec["n_spectrum"]); f0, df = float(rec["spec_f0"]), float(rec["spec_df"])
+        out[FIELDS[SEL_SPECTRUM]] = {"freq": f0 + df * np.arange(k), "mag": rec["spectrum"][:k], "thr": rec["threshold"][:k],
+                                     "meta": {"count": k, "dHz": df, "ampl": int(rec["spec_ampl"])}}
+    if present & SEL_PEAK_LIST:
+        k = int(rec["n_peaks"])
+        out[FIELDS[SEL_PEAK_LIST]] = {"freq": rec["peak_freqs"][:k], "amp": rec["peak_amps"][:k], "idx": int(rec["peak_idx"])}
+    if present & SEL_PEAK: out[FIELDS[SEL_PEAK]] = {"freq": float(rec["peak_freq"]), "amp": int(rec["peak_amp"])}
+    if present & SEL_DISTANCE_LIST: out[FIELDS[SEL_DISTANCE_LIST]] = rec["distances"][:int(rec["n_distances"])]
+    if present & SEL_DISTANCE: out[FIELDS[SEL_DISTANCE]] = float(rec["distance"])
+    if present & SEL_MEAS_COUNT: out[FIELDS[SEL_MEAS_COUNT]] = int(rec["meas_count"])
+    if present & SEL_TEMPERATURE: out[FIELDS[SEL_TEMPERATURE]] = float(rec["temperature"])
+    if present & SEL_HIGH_PREC: out[FIELDS[SEL_HIGH_PREC]] = {"d_m": float(rec["hp_distance"]), "lost": int(rec["hp_lost"])}
+    return out
@@ -0,0 +1,331 @@
+# ondosense/simulator.py
+# Hardware-free OndoSense sensor: serves the RS-485 protocol on a Linux pty so that
+# SerialWorker (or any pyserial client) can be pointed at SensorSimulator.port.
+import argparse, math, os, random, select, struct, termios, threading, time, tty
+from .protocol import *
+
+STATUS_ERROR         = 0xFF
+STATUS_UNKNOWN_CMD   = 0xFE
+STATUS_UNKNOWN_PARAM = 0xFD
+STATUS_RANGE_ERROR   = 0xFC
+STATUS_FORBIDDEN     = 0xFB
+STATUS_NO_TARGET     = 0xFA
+
+# pid -> (default, min, max)
+DEFAULT_PARAMS = {
+    PARAM_SN:            (0x00A1B2C3, 0, 0x7FFFFFFF),
+    PARAM_SELECTOR:      (SEL_DISTANCE, 0, 1023),
+    PARAM_MEAS_RATE:     (100, 1, 1000),
+    PARAM_MIN_DIST:      (150, 0, 40000),
+    PARAM_MAX_DIST:      (10000, 0, 40000),
+    PARAM_INT_RAW:       (1, 1, 10000),
+    PARAM_INT_SPEC:      (1, 1, 10000),
+    PARAM_PROFILE:       (2, 2, 16),
+    PARAM_BAUD:          (19200, 9600, 921600),
+    PARAM_HP_THRESH:     (25, 1, 1000),
+    PARAM_HP_TIMEOUT:    (5000, 0, 60000),
+    PARAM_PREAMP_Q:      (127, 0, 255),
+    PARAM_PREAMP_I:      (127, 0, 255),
+    PARAM_ADCG_Q:        (127, 0, 255),
+    PARAM_ADCG_I:        (127, 0, 255),
+    PARAM_RX_DELAY:      (5000, 0, 100000),
+    PARAM_THRESH_SENS:   (10, 0, 100),
+    PARAM_THRESH_OFFSET: (0, 0, 255),
+    PARAM_DIST_OFFSET:   (0, -40000, 40000),
+    PARAM_EMA_MS:        (0, 0, 10000),
+    PARAM_OUTLIER_TMAX:  (0, 0, 10000),
+    PARAM_OUTLIER_DMAX:  (0, 0, 40000),
+    PARAM_OUTLIER_VMAX:  (0, 0, 10000000),
+    PARAM_PEAK_SORT:     (1, 0, 5),
+    PARAM_PEAK_INDEX:    (0, 0, 4),
+    PARAM_SW1_EN:        (1, 0, 1),
+    PARAM_SW2_EN:        (1, 0, 1),
+    PARAM_SW3_EN:        (1, 0, 1),
+    PARAM_SW1_POL:       (0, 0, 1),
+    PARAM_SW2_POL:       (0, 0, 1),
+    PARAM_SW3_POL:       (0, 0, 1),
+    PARAM_IO1_SEL1:      (0, 0, 1),
+    PARAM_IO1_SEL2:      (0, 0, 1),
+    PARAM_IO1_SEL3:      (0, 0, 1),
+    PARAM_CL_MIN:        (0, 0, 40000),
+    PARAM_CL_MAX:        (10000, 0, 40000),
+    PARAM_CL_ERRMODE:    (0, 0, 1),
+}
+
+# bytes that follow the command byte
+CMD_ARGS = {
+    CMD_READ_PARAM: 1, CMD_WRITE_PARAM: 5, CMD_READ_MIN: 1, CMD_READ_MAX: 1,
+    CMD_FACTORY_RESET: 5,
+}
+
+BAUDS = (9600, 19200, 38400, 57600, 115200, 230400, 460800, 500000, 576000, 921600)
+_TERMIOS_BAUD = {getattr(termios, f"B{b}"): b for b in BAUDS if hasattr(termios, f"B{b}")}
+
+class SensorSimulator:
+    def __init__(self, baud: int = 19200, rate_hz: float = 100.0, iq_samples: int = 512,
+                 spectrum_bins: int = 256, peaks: int = 3, hz_per_m: float = 2000.0,
+                 latency: float = 0.0005, dropout: float = 0.0, strict_baud: bool = True,
+                 max_clean_baud: int = 0, stall: float = 0.0, stall_s: float = 0.05, seed: int | None = None):
+        self.iq_samples = int(iq_samples)
+        self.spectrum_bins = int(spectrum_bins)
+        self.peaks = max(1, int(peaks))
+        self.hz_per_m = float(hz_per_m)
+        self.latency = float(latency)          # sensor processing time before the first reply byte
+        self.dropout = float(dropout)          # probability of a "no target" status per target dataset
+        self.strict_baud = strict_baud         # ignore commands when the host opened the pty at another baud
+        self.max_clean_baud = int(max_clean_baud)  # above this, 5% of replies get a corrupted byte (0 = never)
+        self.stall = float(stall)              # probability that a measurement reply pauses part-way...
+        self.stall_s = float(stall_s)          # ...for this long (host times out, the tail arrives late)
+        self.rng = random.Random(seed)
+        self.params = {pid: d for pid, (d, _, _) in DEFAULT_PARAMS.items()}
+        self.params[PARAM_BAUD] = int(baud)
+        self.params[PARAM_MEAS_RATE] = max(1, int(round(rate_hz)))
+        self.saved = dict(self.params)
+        self.stats = {"commands": 0, "measurements": 0, "tx_bytes": 0, "rx_bytes": 0, "ignored": 0}
+        self.master = self.slave = None
+        self.port = ""
+        self._thread = None
+        self._stop = threading.Event()
+        self._t0 = time.perf_counter()
+        self._cache_idx = -1; self._cache = None
+        self._pending_baud = 0
+
+    # ------------- lifecycle -------------
+    def start(self) -> str:
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ondosense-sim", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(1.0)
+        for fd in (self.master, self.slave):
+            try:
+                if fd is not None: os.close(fd)
+            except OSError: pass
+        self.master = self.slave = self._thread = None
+
+    def __enter__(self):
+        self.start(); return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def baud(self) -> int:
+        return self.params[PARAM_BAUD]
+
+    # ------------- command loop -------------
+    def _run(self):
+        rx = bytearray()
+        while not self._stop.is_set():
+            try:
+                if not select.select([self.master], [], [], 0.05)[0]: continue
+                chunk = os.read(self.master, 4096)
+            except OSError:
+                break
+            if not chunk: continue
+            self.stats["rx_bytes"] += len(chunk)
+            if self.strict_baud and not self._host_baud_ok():
+                self.stats["ignored"] += 1; rx.clear(); continue
+            rx.extend(chunk)
+            while rx:
+                need = 1 + CMD_ARGS.get(rx[0], 0)
+                if len(rx) < need: break
+                cmd = bytes(rx[:need]); del rx[:need]
+                self.stats["commands"] += 1
+                self._handle(cmd)
+
+    def _host_baud_ok(self) -> bool:
+        try:
+            host = _TERMIOS_BAUD.get(termios.tcgetattr(self.slave)[5])
+        except termios.error:
+            return True
+        return host is None or host == self.baud
+
+    def _handle(self, cmd: bytes):
+        c = cmd[0]
+        if c == CMD_READ_PARAM:
+            pid = cmd[1]
+            if pid not in self.params: self._send(bytes([STATUS_UNKNOWN_PARAM])); return
+            self._send(bytes([STATUS_SUCCESS]) + struct.pack(">i", self.params[pid]))
+        elif c in (CMD_READ_MIN, CMD_READ_MAX):
+            pid = cmd[1]
+            if pid not in DEFAULT_PARAMS: self._send(bytes([STATUS_UNKNOWN_PARAM])); return
+            _, mn, mx = DEFAULT_PARAMS[pid]
+            self._send(bytes([STATUS_SUCCESS]) + struct.pack(">i", mn if c == CMD_READ_MIN else mx))
+        elif c == CMD_WRITE_PARAM:
+            pid = cmd[1]; value = struct.unpack(">i", cmd[2:6])[0]
+            self._send(bytes([self._write(pid, value)]))
+            if pid == PARAM_BAUD and self._pending_baud:
+                self.params[PARAM_BAUD] = self._pending_baud; self._pending_baud = 0
+        elif c == CMD_MEASUREMENT:
+            self.stats["measurements"] += 1
+            self._send(self._measurement(), stall=self.stall > 0 and self.rng.random() < self.stall)
+        elif c == CMD_SAVE_PARAMS:
+            self.saved = dict(self.params)
+            self.saved[PARAM_BAUD] = DEFAULT_PARAMS[PARAM_BAUD][0]
+            self.saved[PARAM_SELECTOR] = DEFAULT_PARAMS[PARAM_SELECTOR][0]
+            self._send(bytes([STATUS_SUCCESS]))
+        elif c in (CMD_AUTOS_AMP, CMD_BG_CAL, CMD_BG_REMOVE, CMD_RESTART_HP):
+            self._send(bytes([STATUS_SUCCESS]))
+        elif c == CMD_FACTORY_RESET:
+            if cmd[1:] != b"RESET": self._send(bytes([STATUS_ERROR])); return
+            baud = self.params[PARAM_BAUD]
+            self.params = {pid: d for pid, (d, _, _) in DEFAULT_PARAMS.items()}
+            self.params[PARAM_BAUD] = baud  # keep the link alive until the next power cycle
+            self._send(bytes([STATUS_SUCCESS]))
+        else:
+            self._send(bytes([STATUS_UNKNOWN_CMD]))
+
+    def _write(self, pid: int, value: int) -> int:
+        if pid not in DEFAULT_PARAMS: return STATUS_UNKNOWN_PARAM
+        if pid == PARAM_SN: return STATUS_FORBIDDEN
+        _, mn, mx = DEFAULT_PARAMS[pid]
+        if not mn <= value <= mx: return STATUS_RANGE_ERROR
+        if pid == PARAM_BAUD:
+            if value not in BAUDS: return STATUS_RANGE_ERROR
+            self._pending_baud = value  # ack goes out at the old baud
+            return STATUS_SUCCESS
+        self.params[pid] = value
+        return STATUS_SUCCESS
+
+    # ------------- byte pacing -------------
+    def _send(self, data: bytes, stall: bool = False):
+        if stall and len(data) > 1:
+            cut = self.rng.randrange(1, len(data))
+            self._send(data[:cut]); time.sleep(self.stall_s); self._send(data[cut:])
+            return
+        if self.latency > 0: time.sleep(self.latency)
+        if self.max_clean_baud and self.baud > self.max_clean_baud and self.rng.random() < 0.05:
+            i = self.rng.randrange(len(data))  # long cable / bad termination
+            data = data[:i] + bytes([data[i] ^ (1 << self.rng.randrange(8))]) + data[i + 1:]
+        bps = self.baud / 10.0                   # 8N1: 10 bits on the wire per byte
+        step = max(1, int(bps * 0.001))          # ~1 ms worth of bytes per write
+        t0 = time.perf_counter()
+        for off in range(0, len(data), step):
+            due = t0 + off / bps
+            dt = due - time.perf_counter()
+            if dt > 0: time.sleep(dt)
+            try:
+                os.write(self.master, data[off:off + step])
+            except OSError:
+                return
+        dt = t0 + len(data) / bps - time.perf_counter()
+        if dt > 0: time.sleep(dt)
+        self.stats["tx_bytes"] += len(data)
+
+    # ------------- synthetic data -------------
+    def target_m(self, t: float) -> float:
+        return 1.5 + 0.25 * math.sin(2 * math.pi * 0.2 * t)
+
+    def _measurement(self) -> bytes:
+        rate = max(1, self.params[PARAM_MEAS_RATE])
+        idx = int((time.perf_counter() - self._t0) * rate)
+        if idx != self._cache_idx:
+            self._cache_idx = idx; self._cache = self._state(idx, idx / rate)
+        out = bytearray()
+        for bit in selected_datasets(self.params[PARAM_SELECTOR]):
+            if bit in self._cache["lost"]: out.append(STATUS_NO_TARGET); continue
+            if bit not in self._cache: self._cache[bit] = self._payload(bit, self._cache)
+            out.append(STATUS_SUCCESS); out += self._cache[bit]
+        return bytes(out)
+
+    def _state(self, idx: int, t: float) -> dict:
+        # one sensor-side measurement; payloads are rendered lazily per selected dataset
+        d = self.target_m(t) + self.rng.gauss(0.0, 0.0005)
+        lost = set()
+        if self.dropout and self.rng.random() < self.dropout:
+            lost = {SEL_PEAK, SEL_DISTANCE_LIST, SEL_DISTANCE, SEL_HIGH_PREC}
+        return {"idx": idx, "t": t, "d": d, "lost": lost,
+                "targets": [(d * (k + 1), 1_000_000 // (k + 1) ** 2) for k in range(self.peaks)]}
+
+    def _payload(self, bit: int, st: dict) -> bytes:
+        rng = self.rng; d = st["d"]; targets = st["targets"]
+        cnt = self.spectrum_bins; dHz = 50; maxHz = cnt * dHz
+        if bit == SEL_SPECTRUM:
+            mags = bytearray(cnt); thrs = bytes([40]) * cnt
+            for i in range(cnt):
+                f = maxHz - (cnt - 1 - i) * dHz
+                m = 20 + rng.random() * 8
+                for dk, amp in targets:
+                    m += (200.0 * amp / 1_000_000) * math.exp(-((f - dk * self.hz_per_m) / (1.5 * dHz)) ** 2)
+                mags[i] = min(255, int(m))
+            return struct.pack(">HIII", cnt, maxHz, dHz, max(mags)) + bytes(mags) + thrs
+        if bit == SEL_IQ:
+            n = self.iq_samples; k = d * self.hz_per_m / (2.0 * maxHz)
+            iq = bytearray(2 * n)
+            for i in range(n):
+                ph = 2 * math.pi * k * i
+                iq[2 * i] = max(0, min(255, int(128 + 100 * math.cos(ph) + rng.gauss(0, 2))))
+                iq[2 * i + 1] = max(0, min(255, int(128 + 100 * math.sin(ph) + rng.gauss(0, 2))))
+            return struct.pack(">H", n) + bytes(iq)
+        if bit in (SEL_PEAK_LIST, SEL_PEAK):
+            peaks = b"".join(struct.pack(">IHI", int(dk * self.hz_per_m * 100), 0, amp) for dk, amp in targets)
+            return peaks[:10] if bit == SEL_PEAK else bytes([len(targets), 0]) + peaks
+        if bit == SEL_DISTANCE_LIST:
+            return bytes([len(targets), 0]) + b"".join(struct.pack(">I", int(dk * 1e6)) for dk, _ in targets)
+        if bit == SEL_DISTANCE:
+            return struct.pack(">I", int(d * 1e6))
+        if bit == SEL_MEAS_COUNT:
+            return struct.pack(">I", st["idx"] & 0xFFFFFFFF)
+        if bit == SEL_TEMPERATURE:
+            temp_c = int(round((31.0 + 0.5 * math.sin(st["t"] / 60.0)) * 100))
+            return struct.pack(">hh", temp_c, temp_c)
+        return bytes([0]) + struct.pack(">i", int(d * 1e6))  # SEL_HIGH_PREC
+
+# ------------- load test -------------
+def bench(sim: SensorSimulator, selector: int, rate_hz: float, seconds: float, mode: str = "timer") -> dict:
+    from PyQt6.QtCore import QCoreApplication, QTimer, Qt
+    from .serial_worker import SerialWorker
+    app = QCoreApplication.instance() or QCoreApplication([])
+    w = SerialWorker()
+    w.configure(dict(port=sim.port, baud=sim.baud, rate_hz=rate_hz, selector=selector, acq_mode=mode))
+    stamps = []; lat = []
+    def on_frame(fr):
+        stamps.append(time.perf_counter()); lat.append(time.time() - fr.t)
+    w.frame.connect(on_frame, Qt.ConnectionType.DirectConnection)
+    w.start()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+    w.stop()
+    dts = sorted(b - a for a, b in zip(stamps, stamps[1:])); lat.sort()
+    pct = lambda xs, p: xs[min(len(xs) - 1, int(p * len(xs)))] * 1e3 if xs else float("nan")
+    return {"frames": len(stamps), "rate_hz": len(stamps) / seconds, "missed": w.link.stats.missed,
+            "tx_kBps": sim.stats["tx_bytes"] / seconds / 1e3,
+            "dt_p50_ms": pct(dts, 0.5), "dt_p99_ms": pct(dts, 0.99), "dt_max_ms": pct(dts, 1.0),
+            "lat_p50_ms": pct(lat, 0.5), "lat_p99_ms": pct(lat, 0.99)}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m ondosense.simulator", description="OndoSense sensor simulator on a pty")
+    ap.add_argument("--baud", type=int, default=19200)
+    ap.add_argument("--rate", type=float, default=100.0, help="sensor-side measurement rate (Hz)")
+    ap.add_argument("--iq", type=int, default=512, help="IQ samples per frame")
+    ap.add_argument("--bins", type=int, default=256, help="spectrum bins per frame")
+    ap.add_argument("--dropout", type=float, default=0.0, help="probability of a no-target frame")
+    ap.add_argument("--max-clean-baud", type=int, default=0, help="corrupt 5%% of replies above this baud (0 = never)")
+    ap.add_argument("--stall", type=float, default=0.0, help="probability that a measurement reply pauses part-way (late tail)")
+    ap.add_argument("--bench", type=float, default=0.0, metavar="SEC", help="drive SerialWorker against the simulator for SEC seconds")
+    ap.add_argument("--poll", type=float, default=200.0, help="host poll rate for --bench (Hz)")
+    ap.add_argument("--selector", type=int, default=SEL_DISTANCE, help="selector bitmask for --bench")
+    ap.add_argument("--mode", default="timer", choices=("timer", "deadline", "free"), help="acquisition mode for --bench")
+    a = ap.parse_args(argv)
+    sim = SensorSimulator(baud=a.baud, rate_hz=a.rate, iq_samples=a.iq, spectrum_bins=a.bins, dropout=a.dropout,
+                          max_clean_baud=a.max_clean_baud, stall=a.stall)
+    with sim:
+        if a.bench > 0:
+            r = bench(sim, a.selector, a.poll, a.bench, a.mode)
+            print(" ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in r.items()))
+            return
+        print(f"Simulated sensor on {sim.port} @ {sim.baud} baud (Ctrl+C to stop)", flush=True)
+        try:
+            while True: time.sleep(1.0)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# ondosense/stream.py
+# Decoded frames over a local TCP or Unix-domain socket. The server runs its own asyncio loop
+# on its own thread; write() on the acquisition thread only queues the frame and wakes the loop
+# once per batch. Each frame is encoded once per distinct (datasets, format) subscription and
+# the bytes are shared by every client with that subscription.
+#
+# A client sends one line, "<datasets> [binary|ndjson]", e.g. "distance,peaks ndjson" (dataset
+# names as in frame.FIELDS, plus "peaks" = peak + peak_list and "all"). The server answers with
+# one JSON line ({"ok": true, ...} or {"ok": false, "error": ...}, then closes) and streams:
+#   ndjson  one JSON object per frame: n, seq, t and the subscribed datasets present
+#   binary  FRAME_HDR, then the datasets present in SEL_ORDER (see _pack; decode() reverses it)
+# n counts frames served, so a gap in n means frames dropped for this client. Every client has a
+# bounded queue; when it is full the oldest frame goes, so a slow reader never holds up anyone else.
+import asyncio, collections, json, os, socket, struct, threading
+import numpy as np
+from .protocol import *
+from .frame import FIELDS
+
+DEFAULT_ADDRESS = "127.0.0.1:5605"
+FRAME_HDR = struct.Struct("<2sHIIdI")  # b"OS", datasets present (selector bits), n, poll seq, t, payload bytes
+MAGIC = b"OS"
+ALIASES = {"peaks": SEL_PEAK | SEL_PEAK_LIST, "all": sum(FIELDS)}
+FORMATS = ("binary", "ndjson")
+
+_F8 = struct.Struct("<d"); _U4 = struct.Struct("<I"); _F4 = struct.Struct("<f"); _U2 = struct.Struct("<H")
+_HP = struct.Struct("<dB"); _PEAK = struct.Struct("<dI"); _PL = struct.Struct("<HB"); _SPEC = struct.Struct("<HddI")
+
+def parse_address(addr: str) -> tuple:
+    # "unix:/path", "host:port", "tcp:host:port" or "port" -> ("unix", path) / ("tcp", host, port)
+    if addr.startswith("unix:"): return ("unix", addr[5:])
+    if addr.startswith("tcp:"): addr = addr[4:]
+    host, _, port = addr.rpartition(":")
+    return ("tcp", host or "127.0.0.1", int(port))
+
+def parse_datasets(text: str) -> int:
+    mask = 0
+    for name in text.replace("+", ",").split(","):
+        name = name.strip().lower()
+        if name in ALIASES: mask |= ALIASES[name]; continue
+        bit = next((b for b, f in FIELDS.items() if f == name), None)
+        if bit is None: raise ValueError(f"unknown dataset {name!r}")
+        mask |= bit
+    return mask
+
+# ------------- encoding -------------
+def _pack(bit: int, v) -> bytes:
+    if bit == SEL_DISTANCE: return _F8.pack(v)
+    if bit == SEL_MEAS_COUNT: return _U4.pack(v)
+    if bit == SEL_TEMPERATURE: return _F4.pack(v)
+    if bit == SEL_HIGH_PREC: return _HP.pack(v["d_m"], v["lost"])
+    if bit == SEL_PEAK: return _PEAK.pack(v["freq"], v["amp"])
+    if bit == SEL_DISTANCE_LIST: return _U2.pack(len(v)) + np.asarray(v, "<f8").tobytes()
+    if bit == SEL_PEAK_LIST:
+        return _PL.pack(len(v["freq"]), v["idx"]) + np.asarray(v["freq"], "<f8").tobytes() + np.asarray(v["amp"], "<u4").tobytes()
+    if bit == SEL_SPECTRUM:
+        f = v["freq"]; n = len(v["mag"])
+        return _SPEC.pack(n, f[0] if n else 0.0, v["meta"]["dHz"], v["meta"]["ampl"]) + v["mag"].tobytes() + v["thr"].tobytes()
+    return _U2.pack(len(v["I"])) + v["I"].tobytes() + v["Q"].tobytes()  # SEL_IQ
+
+def encode_binary(n: int, fr, mask: int) -> bytes:
+    present = 0; parts = []
+    for bit, v in fr.items():
+        if bit & mask: present |= bit; parts.append(_pack(bit, v))
+    body = b"".join(parts)
+    return FRAME_HDR.pack(MAGIC, present, n & 0xFFFFFFFF, fr.seq & 0xFFFFFFFF, fr.t, len(body)) + body
+
+def _jsonable(v):
+    if hasattr(v, "tolist"): return v.tolist()
+    if isinstance(v, dict): return {k: _jsonable(x) for k, x in v.items()}
+    return v
+
+def encode_ndjson(n: int, fr, mask: int) -> bytes:
+    rec = {"n": n, "seq": fr.seq, "t": fr.t}
+    for bit, v in fr.items():
+        if bit & mask: rec[FIELDS[bit]] = _jsonable(v)
+    return (json.dumps(rec, separators=(",", ":")) + "\n").encode()
+
+ENCODERS = {"binary": encode_binary, "ndjson": encode_ndjson}
+
+def decode(present: int, body) -> dict:
+    # binary payload -> {dataset name: value}, shaped like MeasurementFrame's; arrays are views into body
+    out = {}; off = 0
+    for bit in SEL_ORDER:
+        if not present & bit: continue
+        if bit == SEL_DISTANCE: v = _F8.unpack_from(body, off)[0]; off += 8
+        elif bit == SEL_MEAS_COUNT: v = _U4.unpack_from(body, off)[0]; off += 4
+        elif bit == SEL_TEMPERATURE: v = _F4.unpack_from(body, off)[0]; off += 4
+        elif bit == SEL_HIGH_PREC: d, lost = _HP.unpack_from(body, off); v = {"d_m": d, "lost": lost}; off += _HP.size
+        elif bit == SEL_PEAK: f, a = _PEAK.unpack_from(body, off); v = {"freq": f, "amp": a}; off += _PEAK.size
+        elif bit == SEL_DISTANCE_LIST:
+            k = _U2.unpack_from(body, off)[0]; v = np.frombuffer(body, "<f8", k, off + 2); off += 2 + 8 * k
+        elif bit == SEL_PEAK_LIST:
+            k, idx = _PL.unpack_from(body, off); off += _PL.size
+            v = {"freq": np.frombuffer(body, "<f8", k, off), "amp": np.frombuffer(body, "<u4", k, off + 8 * k), "idx": idx}; off += 12 * k
+        elif bit == SEL_SPECTRUM:
+            k, f0, df, ampl = _SPEC.unpack_from(body, off); off += _SPEC.size
+            v = {"freq": f0 + df * np.arange(k), "mag": np.frombuffer(body, np.uint8, k, off),
+                 "thr": np.frombuffer(body, np.uint8, k, off + k), "meta": {"count": k, "dHz": df, "ampl": ampl}}; off += 2 * k
+        else:
+            k = _U2.unpack_from(body, off)[0]; off += 2
+            v = {"I": np.frombuffer(body, np.uint8, k, off), "Q": np.frombuffer(body, np.uint8, k, off + k)}; off += 2 * k
+        out[FIELDS[bit]] = v
+    return out
+
+# ------------- server -------------
+class _Client:
+    __slots__ = ("peer", "mask", "fmt", "queue", "wake", "dropped", "sent")
+
+    def __init__(self, peer: str, mask: int, fmt: str, max_queue: int):
+        self.peer = peer; self.mask = mask; self.fmt = fmt
+        self.queue = collections.deque(maxlen=max_queue); self.wake = asyncio.Event()
+        self.dropped = 0; self.sent = 0
+
+class StreamServer:
+    def __init__(self, address: str = DEFAULT_ADDRESS, max_queue: int = 256, log=None, warn=None):
+        self.address = address
+        self.max_queue = max_queue
+        self.log = log or (lambda msg: None)
+        self.warn = warn or self.log
+        self.frames = 0       # frames served (n)
+        self.dropped = 0      # frames dropped before the loop got to them
+        self._inbox = collections.deque(maxlen=4096)
+        self._scheduled = False
+        self._clients = set()
+        self._loop = self._server = self._thread = None
+
+    def start(self):
+        # binds before returning; raises OSError if the address is taken
+        ready = threading.Event(); err = []
+        def run():
+            loop = self._loop = asyncio.new_event_loop()
+            try:
+                self._server = loop.run_until_complete(self._listen())
+            except OSError as e:
+                err.append(e); ready.set(); loop.close(); return
+            ready.set()
+            loop.run_forever()
+            self._server.close()
+            tasks = asyncio.all_tasks(loop)
+            for t in tasks: t.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(self._server.wait_closed()); loop.close()
+        self._thread = threading.Thread(target=run, name="ondosense-stream", daemon=True)
+        self._thread.start(); ready.wait()
+        if err:
+            self._thread.join(); self._thread = None; raise err[0]
+        self.log(f"Serving frames on {self.address}")
+        return self
+
+    def stop(self):
+        if self._thread is None: return
+        self._loop.call_soon_threadsafe(self._loop.stop); self._thread.join(); self._thread = None
+        if self.address.startswith("unix:"):
+            try: os.unlink(self.address[5:])
+            except OSError: pass
+        self.log(f"Stopped serving frames: {self.frames} frames")
+
+    @property
+    def clients(self) -> list:
+        # [(peer, datasets mask, format, frames sent, frames dropped)]
+        return [(c.peer, c.mask, c.fmt, c.sent, c.dropped) for c in list(self._clients)]
+
+    # runs on the acquisition thread
+    def write(self, fr):
+        if not self._clients: return
+        if len(self._inbox) == self._inbox.maxlen: self.dropped += 1
+        self._inbox.append(fr)
+        if not self._scheduled:
+            self._scheduled = True
+            try:
+                self._loop.call_soon_threadsafe(self._fan_out)
+            except RuntimeError:  # loop closed by stop()
+                pass
+
+    # ------------- loop thread -------------
+    async def _listen(self):
+        kind, *where = parse_address(self.address)
+        if kind == "unix":
+            return await asyncio.start_unix_server(self._serve, where[0])
+        return await asyncio.start_server(self._serve, where[0], where[1])
+
+    def _fan_out(self):
+        self._scheduled = False  # before draining: a frame queued from here on schedules another pass
+        inbox = self._inbox
+        while inbox:
+            fr = inbox.popleft(); n = self.frames; self.frames += 1
+            encoded = {}
+            for c in self._clients:
+                key = (c.mask, c.fmt)
+                data = encoded.get(key)
+                if data is None: data = encoded[key] = ENCODERS[c.fmt](n, fr, c.mask)
+                if len(c.queue) == c.queue.maxlen: c.dropped += 1
+                c.queue.append(data); c.wake.set()
+
+    async def _serve(self, reader, writer):
+        peer = writer.get_extra_info("peername") or "unix"
+        peer = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else str(peer or "unix")
+        try:
+            line = (await asyncio.wait_for(reader.readline(), 10.0)).decode("ascii", "replace").split()
+            if not line: raise ValueError("expected '<datasets> [binary|ndjson]'")
+            mask = parse_datasets(line[0]); fmt = line[1].lower() if len(line) > 1 else "binary"
+            if fmt not in FORMATS: raise ValueError(f"unknown format {fmt!r}")
+        except (ValueError, asyncio.TimeoutError, ConnectionError) as e:
+            writer.write((json.dumps({"ok": False, "error": str(e) or "no subscription"}) + "\n").encode())
+            writer.close(); return
+        c = _Client(peer, mask, fmt, self.max_queue)
+        self._clients.add(c)  # before the ack: frames written once the client has it are its own
+        writer.write((json.dumps({"ok": True, "datasets": [FIELDS[b] for b in SEL_ORDER if b & mask], "format": fmt}) + "\n").encode())
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family != getattr(socket, "AF_UNIX", None):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.log(f"Stream client {peer}: {', '.join(FIELDS[b] for b in SEL_ORDER if b & mask)} ({fmt})")
+        sender = asyncio.ensure_future(self._send(c, writer))
+        try:
+            while await reader.read(4096): pass  # anything after the subscription is ignored; EOF ends the session
+        except (ConnectionError, asyncio.CancelledError):  # peer reset / stop()
+            pass
+        finally:
+            self._clients.discard(c); sender.cancel()
+            writer.close()
+            self.log(f"Stream client {peer} left: {c.sent} frames sent, {c.dropped} dropped")
+
+    async def _send(self, c: _Client, writer):
+        try:
+            while True:
+                await c.wake.wait(); c.wake.clear()
+                batch = list(c.queue); c.queue.clear()
+                writer.write(b"".join(batch)); c.sent += len(batch)
+                await writer.drain()  # only this client waits; its queue keeps dropping the oldest meanwhile
+        except ConnectionError:
+            writer.close()
+
+# ------------- client -------------
+class StreamClient:
+    # Blocking client: iterate for (n, seq, t, {dataset name: value}) per frame.
+    def __init__(self, address: str = DEFAULT_ADDRESS, datasets: str = "distance", fmt: str = "binary", timeout: float = 5.0):
+        kind, *where = parse_address(address)
+        self.sock = socket.socket(socket.AF_UNIX if kind == "unix" else socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(where[0] if kind == "unix" else tuple(where))
+        self.sock.sendall(f"{datasets} {fmt}\n".encode())
+        self.file = self.sock.makefile("rb")
+        ack = json.loads(self.file.readline() or b"{}")
+        if not ack.get("ok"):
+            self.close(); raise ValueError(f"subscription refused: {ack.get('error', 'connection closed')}")
+        self.fmt = fmt; self.datasets = ack["datasets"]
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.fmt == "ndjson":
+            line = self.file.readline()
+            if not line: raise StopIteration
+            rec = json.loads(line)
+            return rec.pop("n"), rec.pop("seq"), rec.pop("t"), rec
+        hdr = self.file.read(FRAME_HDR.size)
+        if len(hdr) < FRAME_HDR.size: raise StopIteration
+        magic, present, n, seq, t, size = FRAME_HDR.unpack(hdr)
+        if magic != MAGIC: raise ValueError("stream out of sync")
+        return n, seq, t, decode(present, self.file.read(size))
+
+    def close(self):
+        self.file = None; self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
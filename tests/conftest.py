@@ -0,0 +1,23 @@
+# tests/conftest.py
+import os, sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def sim_link():
+    # SensorLink on a pty-backed SensorSimulator (Linux); yields a factory taking simulator and link options
+    pytest.importorskip("serial")
+    if not sys.platform.startswith("linux"): pytest.skip("the simulator needs a Linux pty")
+    from ondosense.simulator import SensorSimulator
+    from ondosense.link import SensorLink
+    from ondosense.protocol import PARAM_BAUD
+    opened = []
+    def make(sim_kw=None, cfg=None):
+        sim = SensorSimulator(**{"baud": 115200, "seed": 1, **(sim_kw or {})}); sim.start()
+        link = SensorLink({"port": sim.port, "baud": sim.params[PARAM_BAUD], **(cfg or {})})
+        link.open(); opened.append((sim, link))
+        return sim, link
+    yield make
+    for sim, link in opened:
+        link.close(); sim.stop()
@@ -0,0 +1,48 @@
+# tests/test_capture.py
+import os
+import pytest
+from ondosense.capture import *
+
+def record(path, n: int):
+    rec = FrameRecorder(path, flush_s=0.01).start()
+    for k in range(n): rec.write(k, 1000.0 + k, 1, 115200, bytes([k]) * (k + 1))
+    rec.stop()
+
+def check(reader, n: int):
+    assert len(reader) == n
+    for k in range(n):
+        t, seq, sel, baud, payload = reader[k]
+        assert (t, seq, sel, baud, bytes(payload)) == (1000.0 + k, k, 1, 115200, bytes([k]) * (k + 1))
+
+@pytest.fixture
+def capture(tmp_path):
+    path = str(tmp_path / "c.osr")
+    record(path, 10)
+    return path
+
+def test_round_trip(capture):
+    with CaptureReader(capture) as r:
+        check(r, 10)
+        assert r.find_time(1004.5) == 5 and r.duration == 9.0
+
+def test_index_behind_data_is_extended_in_memory(capture):
+    # a live recording: the data is flushed, the index lags, and the last record is half written
+    ipath = index_path(capture)
+    with open(ipath, "r+b") as f: f.truncate(FILE_HDR.size + 6 * IDX_ENTRY.size + 5)
+    with open(capture, "ab") as f: f.write(REC_HDR.pack(100, 10, 1010.0, 115200, 1) + b"\0" * 10)
+    before = open(ipath, "rb").read()
+    with CaptureReader(capture) as r: check(r, 10)
+    assert open(ipath, "rb").read() == before
+
+def test_index_ahead_of_data_is_cut(capture):
+    # the index was flushed first: its last entries point past the end of the data
+    size = os.path.getsize(capture)
+    with open(capture, "r+b") as f: f.truncate(size - 5)
+    with CaptureReader(capture) as r: check(r, 9)
+
+def test_missing_index_is_not_created(capture):
+    os.remove(index_path(capture))
+    with CaptureReader(capture) as r: check(r, 10)
+    assert not os.path.exists(index_path(capture))
+    assert rebuild_index(capture) == 10
+    with CaptureReader(capture) as r: check(r, 10)
@@ -0,0 +1,24 @@
+# tests/test_cli.py
+import sys
+import pytest
+from ondosense.protocol import *
+
+pytest.importorskip("serial")
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="the simulator needs a Linux pty")
+
+@pytest.fixture
+def sim():
+    from ondosense.simulator import SensorSimulator
+    s = SensorSimulator(baud=115200, seed=1); s.start()
+    yield s
+    s.stop()
+
+def test_no_write_selector_parses_with_the_sensors_selector(sim, tmp_path):
+    from ondosense.cli import main
+    sim.params[PARAM_SELECTOR] = SEL_DISTANCE | SEL_MEAS_COUNT
+    out = tmp_path / "out.csv"
+    main(["--port", sim.port, "--baud", "115200", "--no-write-selector", "--format", "csv", "--count", "5", "-o", str(out)])
+    rows = out.read_text().splitlines()
+    assert sim.params[PARAM_SELECTOR] == SEL_DISTANCE | SEL_MEAS_COUNT
+    assert "meas_count" in rows[0] and len(rows) == 6
+    assert all(row.split(",")[-1].isdigit() for row in rows[1:])
@@ -0,0 +1,45 @@
+# tests/test_link.py
+import time
+from ondosense.protocol import *
+
+class NoFd:
+    # the link's pyserial port as it looks on Windows: no descriptor to select() on, so reads
+    # block in pyserial for up to ser.timeout
+    fd = None
+
+    def __init__(self, ser):
+        object.__setattr__(self, "_ser", ser)
+
+    def __getattr__(self, k):
+        return getattr(self._ser, k)
+
+    def __setattr__(self, k, v):
+        setattr(self._ser, k, v)
+
+def test_no_fd_port_reads(sim_link):
+    sim, link = sim_link()
+    link.ser = NoFd(link.ser)
+    assert link.read_param(PARAM_MEAS_RATE) == sim.params[PARAM_MEAS_RATE]
+    assert link.poll() is not None
+    assert link.ser.timeout == link.cfg["timeout"]
+
+def test_no_fd_port_keeps_the_budget(sim_link):
+    # the sensor answers after 0.2 s; pyserial's own 0.5 s timeout must not stretch the budget
+    sim, link = sim_link({"latency": 0.2}, {"timeout": 0.5})
+    link.ser = NoFd(link.ser)
+    for call in (lambda: link.read_param(PARAM_MEAS_RATE), link.poll):
+        t = time.monotonic()
+        assert call() is None
+        assert time.monotonic() - t < 0.15
+        assert link.ser.timeout == 0.5
+        time.sleep(0.3)  # let the late reply pass
+
+def test_rate_check_waits_for_the_first_spectrum(sim_link):
+    # before a response the spectrum size is unknown: no clamp to the empty-spectrum budget
+    sim, link = sim_link({"spectrum_bins": 512}, {"selector": SEL_DISTANCE | SEL_SPECTRUM, "rate_hz": 500.0,
+                                                  "acq_mode": "deadline", "rate_limit": "clamp"})
+    assert link.write_selector(link.cfg["selector"]) and not link.sizes_known()
+    link.check_rate()
+    assert link.cfg["rate_hz"] == 500.0
+    assert link.poll() is not None and link.sizes_known()
+    assert link.cfg["rate_hz"] == int(link.max_rate() * 10) / 10 < 20
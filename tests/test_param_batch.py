@@ -0,0 +1,29 @@
+# tests/test_param_batch.py
+from ondosense.protocol import *
+
+PIDS = (PARAM_MEAS_RATE, PARAM_MIN_DIST, PARAM_MAX_DIST, PARAM_PROFILE, PARAM_RX_DELAY, PARAM_EMA_MS)
+
+def test_batch_reads_match_the_sensor(sim_link):
+    sim, link = sim_link()
+    res = link.param_batch([(CMD_READ_PARAM, pid) for pid in PIDS])
+    assert [(pid, val) for _, pid, _, val in res] == [(pid, sim.params[pid]) for pid in PIDS]
+
+def test_late_reply_is_not_read_as_the_next_op(sim_link):
+    # replies arrive after the op's deadline (latency > margin): every op may time out, but none
+    # may take another PID's value
+    sim, link = sim_link({"latency": 0.025}, {"margin": 0.02})
+    for pid, v in zip(PIDS, (11, 150, 2500, 2, 5000, 77)): sim.params[pid] = v
+    res = link.param_batch([(CMD_READ_PARAM, pid) for pid in PIDS])
+    assert len(res) == len(PIDS)
+    for (_, pid, st, val), want in zip(res, PIDS):
+        assert pid == want
+        assert st == -1 or val == sim.params[pid]
+    # the line is clean afterwards: with enough margin the same batch reads correctly
+    link.set_margin(0.1)
+    res = link.param_batch([(CMD_READ_PARAM, pid) for pid in PIDS])
+    assert [val for *_, val in res] == [sim.params[pid] for pid in PIDS]
+
+def test_write_then_read_back(sim_link):
+    sim, link = sim_link()
+    res = link.param_batch([(CMD_WRITE_PARAM, PARAM_EMA_MS, 123), (CMD_READ_PARAM, PARAM_EMA_MS)])
+    assert res[0][2] in STATUS_OK and res[1][3] == 123 == sim.params[PARAM_EMA_MS]
@@ -0,0 +1,63 @@
+# tests/test_parser.py
+import random
+import pytest
+from ondosense.frame import MeasurementFrame
+from ondosense.parser import ResponseParser
+from ondosense.protocol import *
+from ondosense.simulator import SensorSimulator
+
+SELECTORS = (SEL_DISTANCE, SEL_DISTANCE | SEL_SPECTRUM | SEL_MEAS_COUNT)
+
+@pytest.fixture(params=SELECTORS)
+def responses(request):
+    # two consecutive CMD_MEASUREMENT responses from the simulator (no port needed)
+    sim = SensorSimulator(iq_samples=64, spectrum_bins=32, seed=1)
+    sim.params[PARAM_SELECTOR] = request.param
+    a = sim._measurement(); sim._t0 -= 0.05
+    return request.param, a, sim._measurement()
+
+def parse(sel: int, data: bytes, p: ResponseParser | None = None):
+    p = p or ResponseParser(); fr = MeasurementFrame(1, 0.0, sel)
+    p.start(fr); p.feed(data)
+    return p.finish(), fr, p
+
+def test_clean_response(responses):
+    sel, _, b = responses
+    st, fr, p = parse(sel, b)
+    assert st == "done" and p.skipped == 0 and fr.distance is not None
+
+@pytest.mark.parametrize("junk", [b"\xff\xfe\x13", bytes(7)])
+def test_resyncs_past_leading_garbage(responses, junk):
+    sel, _, b = responses
+    _, ref, _ = parse(sel, b)
+    st, fr, p = parse(sel, junk + b)
+    assert st == "done" and p.skipped == len(junk)
+    assert (fr.distance, fr.meas_count) == (ref.distance, ref.meas_count)
+
+def test_resyncs_past_stale_tail(responses):
+    # the end of the previous response still in the buffer ahead of the new one
+    sel, a, b = responses
+    _, ref, _ = parse(sel, b)
+    st, fr, _ = parse(sel, a[-5:] + b)
+    assert st == "done" and (fr.distance, fr.meas_count) == (ref.distance, ref.meas_count)
+
+def test_truncated_is_never_done(responses):
+    sel, _, b = responses
+    rng = random.Random(3)
+    for n in [len(b) - 1, len(b) // 2, 1] + [rng.randrange(len(b)) for _ in range(50)]:
+        assert parse(sel, b[:n])[0] == "truncated", n
+
+def test_parser_recovers_after_truncated_response(responses):
+    sel, a, b = responses
+    p = ResponseParser()
+    assert parse(sel, a[:len(a) // 2], p)[0] == "truncated"
+    _, ref, _ = parse(sel, b)
+    st, fr, _ = parse(sel, b, p)
+    assert st == "done" and fr.distance == ref.distance and p.truncated == 1
+
+def test_gives_up_on_noise():
+    noise = bytes(random.Random(2).randrange(256) for _ in range(300))
+    p = ResponseParser(max_hunt=64)
+    st, fr, _ = parse(SEL_DISTANCE, noise, p)
+    assert st == "garbled" and p.garbled == 1
+    assert parse(SEL_DISTANCE, noise)[0] == "truncated"
@@ -0,0 +1,35 @@
+# tests/test_poller.py
+import time
+import pytest
+from ondosense.link import SensorLink, Poller
+
+def test_free_mode_does_not_spin_without_a_port():
+    link = SensorLink({"acq_mode": "free"})  # never opened: every poll returns None at once
+    calls = 0; poll = link.poll
+    def counted():
+        nonlocal calls; calls += 1; return poll()
+    link.poll = counted
+    p = Poller(link, lambda fr: None); p.start()
+    t0 = time.process_time(); time.sleep(0.5); p.stop()
+    assert calls <= 0.5 / Poller.IDLE_S + 5
+    assert time.process_time() - t0 < 0.25
+
+def test_free_mode_polls_the_simulator(sim_link):
+    sim, link = sim_link({"rate_hz": 500}, {"acq_mode": "free", "selector": 16, "margin": 0.02})
+    frames = []
+    p = Poller(link, frames.append); p.start(); time.sleep(0.5); p.stop()
+    assert len(frames) > 20 and all(fr.distance is not None for fr in frames)
+
+def test_timer_mode_counts_polls_it_cannot_make(sim_link):
+    # SerialWorker's QTimer at 100 Hz with ~45 ms responses: ticks Qt drops while a poll
+    # blocks must be counted as missed, as Poller counts them
+    pytest.importorskip("PyQt6")
+    from ondosense.protocol import SEL_SPECTRUM
+    from ondosense.simulator import SensorSimulator, bench
+    sim = SensorSimulator(baud=115200, spectrum_bins=256); sim.start()
+    try:
+        r = bench(sim, SEL_SPECTRUM, 100.0, 1.0, mode="timer")
+    finally:
+        sim.stop()
+    assert r["frames"] < 40 and r["missed"] > 40
+    assert 80 <= r["frames"] + r["missed"] <= 110
@@ -0,0 +1,49 @@
+# tests/test_series.py
+import numpy as np
+from ondosense.series import LodSeries, RingSeries
+
+def check_query(s: LodSeries, x0: float, x1: float, pixels: int):
+    # every point drawn is a retained sample's y inside the retained x range, and the drawn
+    # min/max cover the samples in [x0, x1]
+    xs, ys = s.view()
+    qx, qy = s.query(x0, x1, pixels)
+    assert len(qx) == len(qy)
+    assert xs[0] <= qx.min() and qx.max() <= xs[-1]
+    assert np.isin(qy, ys).all()
+    sel = (xs >= x0) & (xs <= x1)
+    if sel.any():
+        assert qy.min() <= ys[sel].min() and qy.max() >= ys[sel].max()
+    return qx, qy
+
+def test_evicted_spike_is_not_drawn():
+    s = LodSeries(100)
+    for x in range(1000):
+        s.append(x, 1000.0 if x == 899 else 0.0)
+    qx, qy = check_query(s, -np.inf, np.inf, 10)
+    assert qy.max() == 0.0 and qx.min() >= 900
+
+def test_query_matches_brute_force_after_eviction():
+    rng = np.random.default_rng(7)
+    for cap in (100, 257, 1000):
+        s = LodSeries(cap); x = 0
+        for _ in range(200):
+            k = int(rng.integers(1, cap // 3))
+            s.extend(np.arange(x, x + k), rng.normal(size=k)); x += k
+            xs, _ = s.view()
+            qx, qy = check_query(s, -np.inf, np.inf, int(rng.integers(1, 30)))
+            assert qy.min() == s.view()[1].min() and qy.max() == s.view()[1].max()
+            a, b = np.sort(rng.uniform(xs[0] - 5, xs[-1] + 5, 2))
+            check_query(s, a, b, int(rng.integers(1, 30)))
+
+def test_resize_keeps_pyramid_consistent():
+    s = LodSeries(1000)
+    s.extend(np.arange(5000), np.sin(np.arange(5000) / 50.0))
+    s.resize(300)
+    check_query(s, -np.inf, np.inf, 8)
+    s.extend(np.arange(5000, 5100), np.full(100, 5.0))
+    assert check_query(s, -np.inf, np.inf, 8)[1].max() == 5.0
+
+def test_ring_series_view_is_newest_oldest_first():
+    r = RingSeries(5)
+    r.extend(range(8), range(8))
+    assert list(r.view()[0]) == [3, 4, 5, 6, 7] and r.last() == (7, 7)
@@ -0,0 +1,59 @@
+# tests/test_shm.py
+import os, sys
+import numpy as np
+import pytest
+from ondosense.frame import MeasurementFrame
+from ondosense.protocol import *
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="POSIX shared memory")
+shm = pytest.importorskip("ondosense.shm")
+
+def frame(seq: int) -> MeasurementFrame:
+    fr = MeasurementFrame(seq, 1000.0 + seq, SEL_DISTANCE | SEL_SPECTRUM | SEL_MEAS_COUNT)
+    fr.distance = seq / 1000.0; fr.meas_count = seq
+    mag = (np.arange(32) + seq).astype(np.uint8)
+    fr.spectrum = {"freq": 50.0 * np.arange(32), "mag": mag, "thr": mag // 2, "meta": {"count": 32, "maxHz": 1600, "dHz": 50, "ampl": 0}}
+    return fr
+
+@pytest.fixture
+def ring():
+    pub = shm.FramePublisher(f"ostest{os.getpid()}", slots=8, spectrum_bins=64, iq_samples=16, list_len=4)
+    reader = shm.FrameReader(pub.name)
+    yield pub, reader
+    reader.close(); pub.close()
+
+def test_latest_round_trip(ring):
+    pub, r = ring
+    assert r.latest() is None
+    for k in range(3): pub.write(frame(k))
+    n, rec = r.latest()
+    d = shm.datasets(rec)
+    assert n == 2 and d["distance"] == 0.002 and d["meas_count"] == 2
+    assert np.array_equal(d["spectrum"]["mag"], frame(2).spectrum["mag"])
+    assert np.allclose(d["spectrum"]["freq"], frame(2).spectrum["freq"])
+
+def test_next_follows_in_order_and_counts_lapped_frames(ring):
+    pub, r = ring
+    for k in range(3): pub.write(frame(k))
+    assert [r.next(timeout=0)[0] for _ in range(3)] == [0, 1, 2]
+    assert r.next(timeout=0.01) is None
+    for k in range(3, 23): pub.write(frame(k))  # 20 more into 8 slots
+    n, rec = r.next(timeout=0)
+    assert n == 23 - 8 + 1 and int(rec["seq"]) == n and r.lost == n - 3
+
+def test_lapped_record_is_detected(ring):
+    pub, r = ring
+    pub.write(frame(0))
+    rec = r.get(0, copy=False)
+    assert rec is not None and r.intact(0)
+    for k in range(1, 9): pub.write(frame(k))  # slot 0 now holds frame 8
+    assert not r.intact(0) and r.get(0) is None
+    assert r.get(8) is not None and int(r.get(8)["seq"]) == 8
+
+def test_torn_record_is_rejected(ring):
+    # stamp says complete but the data is not what the CRC covered (as a reader on a weakly
+    # ordered CPU could see it)
+    pub, r = ring
+    pub.write(frame(0))
+    r.records["distance"][0] = 99.0
+    assert not r.intact(0) and r.get(0) is None and r.get(0, copy=False) is None
@@ -0,0 +1,129 @@
+# widgets/iq_dsp.py
+from PyQt6 import QtCore, QtWidgets
+import numpy as np
+import pyqtgraph as pg
+from ondosense.mailbox import Mailbox, BatchBox
+from ondosense.series import RingSeries
+
+class IQDspPanel(QtWidgets.QWidget):
+    # Host processing of IQ frames next to the sensor's own results: the host FFT and the sensor
+    # spectrum (each normalised to its maximum) over distance, and both distance estimates as
+    # trends. The IQPipeline's results arrive on its thread and are handed over through
+    # mailboxes; drain()/render() are driven by the window's RenderScheduler.
+    def __init__(self, pipeline, history: int = 10_000, parent=None):
+        super().__init__(parent)
+        self.dsp = pipeline
+        self.dsp.on_result = self._on_result
+        self.mb_res = Mailbox(); self.mb_dist = BatchBox()
+        self.latest = None; self.n = 0
+        self.host_series = RingSeries(history); self.sensor_series = RingSeries(history)
+
+        self.run_chk = QtWidgets.QCheckBox("Process IQ"); self.run_chk.setChecked(True)
+        self.fs_ds = QtWidgets.QDoubleSpinBox(); self.fs_ds.setRange(1.0, 1e9); self.fs_ds.setDecimals(0)
+        self.fs_ds.setValue(pipeline.opts["fs_hz"]); self.fs_ds.setSuffix(" Hz"); self.fs_ds.setToolTip("IQ sample rate")
+        self.hzpm_ds = QtWidgets.QDoubleSpinBox(); self.hzpm_ds.setRange(1.0, 1e7); self.hzpm_ds.setDecimals(1)
+        self.hzpm_ds.setValue(pipeline.opts["hz_per_m"]); self.hzpm_ds.setSuffix(" Hz/m")
+        self.hzpm_ds.setToolTip("Beat frequency per metre of distance")
+        self.win_cb = QtWidgets.QComboBox(); self.win_cb.addItems(["hann", "hamming", "blackman", "rect"])
+        self.win_cb.setCurrentText(pipeline.opts["window"])
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(self.run_chk)
+        bar.addWidget(QtWidgets.QLabel("Sample rate:")); bar.addWidget(self.fs_ds)
+        bar.addWidget(QtWidgets.QLabel("Scale:")); bar.addWidget(self.hzpm_ds)
+        bar.addWidget(QtWidgets.QLabel("Window:")); bar.addWidget(self.win_cb)
+        bar.addStretch(1)
+
+        self.spec_plot = pg.PlotWidget(title="Spectrum: host FFT vs sensor"); self.spec_plot.showGrid(x=True, y=True, alpha=0.2)
+        self.spec_plot.setLabel("bottom", "distance", "m"); self.spec_plot.setLabel("left", "relative magnitude")
+        self.spec_plot.addLegend()
+        self.host_curve = self.spec_plot.plot(pen=pg.mkPen((80, 140, 220), width=2), name="host")
+        self.sensor_curve = self.spec_plot.plot(pen=pg.mkPen((230, 120, 40), width=2), name="sensor")
+        self.peaks_scatter = pg.ScatterPlotItem(size=8, brush=(80, 140, 220)); self.spec_plot.addItem(self.peaks_scatter)
+        self.sensor_line = pg.InfiniteLine(angle=90, pen=pg.mkPen((230, 120, 40), style=QtCore.Qt.PenStyle.DashLine))
+        self.spec_plot.addItem(self.sensor_line); self.sensor_line.hide()
+
+        self.dist_plot = pg.PlotWidget(title="Distance (m)"); self.dist_plot.showGrid(x=True, y=True, alpha=0.2)
+        self.dist_plot.setLabel("bottom", "frame"); self.dist_plot.addLegend()
+        self.dist_plot.setDownsampling(auto=True, mode="peak"); self.dist_plot.setClipToView(True)
+        self.host_dcurve = self.dist_plot.plot(pen=pg.mkPen((80, 140, 220), width=2), name="host")
+        self.sensor_dcurve = self.dist_plot.plot(pen=pg.mkPen((230, 120, 40), width=2), name="sensor")
+        self.info = QtWidgets.QLabel("")
+
+        split = QtWidgets.QSplitter(QtCore.Qt.Orientation.Vertical)
+        split.addWidget(self.spec_plot); split.addWidget(self.dist_plot)
+        lay = QtWidgets.QVBoxLayout(self)
+        lay.addLayout(bar); lay.addWidget(split, 1); lay.addWidget(self.info)
+
+        self.run_chk.toggled.connect(self.on_run_toggled)
+        self.fs_ds.valueChanged.connect(lambda v: self.dsp.configure(fs_hz=v))
+        self.hzpm_ds.valueChanged.connect(lambda v: self.dsp.configure(hz_per_m=v))
+        self.win_cb.currentTextChanged.connect(lambda w: self.dsp.configure(window=w))
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh_info)
+        self.timer.start(500)
+        self.dsp.start()
+
+    def on_run_toggled(self, on: bool):
+        if on: self.dsp.start()
+        else: self.dsp.stop()
+
+    # runs on the pipeline thread
+    def _on_result(self, res: dict):
+        self.mb_res.put(res)
+        self.mb_dist.put((res["distance"], res["sensor"]["distance"]))
+
+    def set_history(self, n: int):
+        self.host_series.resize(n); self.sensor_series.resize(n)
+
+    def clear(self):
+        self.mb_res.clear(); self.mb_dist.clear(); self.latest = None; self.n = 0
+        self.host_series.clear(); self.sensor_series.clear()
+        for c in (self.host_curve, self.sensor_curve, self.host_dcurve, self.sensor_dcurve): c.setData([], [])
+        self.peaks_scatter.setData([], []); self.sensor_line.hide()
+
+    # -------- render scheduler channel --------
+    def drain(self) -> bool:
+        res = self.mb_res.take()
+        if res is not None: self.latest = res
+        pairs = self.mb_dist.drain()
+        if pairs:
+            x = np.arange(self.n, self.n + len(pairs)); self.n += len(pairs)
+            host, sensor = np.array(pairs, dtype=float).T  # None -> nan
+            self.host_series.extend(x, host); self.sensor_series.extend(x, sensor)
+        return res is not None or bool(pairs)
+
+    def render(self):
+        self.host_dcurve.setData(*self.host_series.view(), connect="finite")
+        self.sensor_dcurve.setData(*self.sensor_series.view(), connect="finite")
+        res = self.latest
+        if res is None: return
+        hzpm = res["hz_per_m"]; mag = res["mag"]; top = float(mag.max()) or 1.0
+        self.host_curve.setData(res["freq"] / hzpm, mag / top)
+        pk = res["peaks"]
+        if len(pk["freq"]):
+            self.peaks_scatter.setData(pk["freq"] / hzpm, np.interp(pk["freq"], res["freq"], mag) / top)
+        else:
+            self.peaks_scatter.setData([], [])
+        sensor = res["sensor"]
+        spec = sensor["spectrum"]
+        if spec is not None:
+            m = spec["mag"].astype(float); self.sensor_curve.setData(spec["freq"] / hzpm, m / (m.max() or 1.0))
+        else:
+            self.sensor_curve.setData([], [])
+        if sensor["distance"] is not None:
+            self.sensor_line.setValue(sensor["distance"]); self.sensor_line.show()
+        else:
+            self.sensor_line.hide()
+
+    def refresh_info(self):
+        if not self.isVisible(): return
+        st = self.dsp.stats(); res = self.latest
+        text = (f"{st['frames']} frames in {st['batches']} batches (mean {st['batch_mean']:.1f}), "
+                f"{st['us_per_frame']:.0f} µs/frame, {st['dropped']} dropped")
+        if res is not None:
+            host, sensor = res["distance"], res["sensor"]["distance"]
+            text += "   host " + ("—" if host is None else f"{host:.4f} m")
+            text += ", sensor " + ("—" if sensor is None else f"{sensor:.4f} m")
+            if host is not None and sensor is not None: text += f", Δ {1e3 * (host - sensor):+.1f} mm"
+        self.info.setText(text)
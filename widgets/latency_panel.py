@@ -0,0 +1,95 @@
+# widgets/latency_panel.py
+from PyQt6 import QtCore, QtWidgets
+import time
+import numpy as np
+import pyqtgraph as pg
+from ondosense.latency import bin_edges
+
+class LatencyPanel(QtWidgets.QWidget):
+    # Diagnostics for a LatencyStats: switch recording on/off, a percentile table per poll phase
+    # and the histogram of the selected phase. Refreshes on its own 2 Hz timer while visible.
+    COLS = ["Phase", "Count", "Mean (µs)", "p50 (µs)", "p90 (µs)", "p99 (µs)", "Max (µs)"]
+
+    toggled = QtCore.pyqtSignal(bool)  # recording switched on/off
+    ui_event = QtCore.pyqtSignal(str)  # for the log
+
+    def __init__(self, latency, parent=None):
+        super().__init__(parent)
+        self.lat = latency
+        self.enable_chk = QtWidgets.QCheckBox("Record poll latency")
+        self.enable_chk.setToolTip("Time every poll phase with perf_counter_ns; costs next to nothing while off")
+        self.enable_chk.setChecked(latency.enabled)
+        self.reset_btn = QtWidgets.QPushButton("Reset")
+        self.dump_btn = QtWidgets.QPushButton("Dump…")
+        self.info = QtWidgets.QLabel("")
+
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(self.enable_chk); bar.addWidget(self.info, 1); bar.addWidget(self.reset_btn); bar.addWidget(self.dump_btn)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.COLS))
+        self.table.setHorizontalHeaderLabels(self.COLS)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+
+        self.plot = pg.PlotWidget(title="Histogram"); self.plot.showGrid(x=True, y=True, alpha=0.2)
+        self.plot.setLabel("bottom", "latency", "µs"); self.plot.setLogMode(x=True, y=False)
+        self.hist_curve = self.plot.plot(stepMode="center", fillLevel=0, brush=(80, 140, 220, 120))
+
+        split = QtWidgets.QSplitter(QtCore.Qt.Orientation.Vertical)
+        split.addWidget(self.table); split.addWidget(self.plot)
+        lay = QtWidgets.QVBoxLayout(self)
+        lay.addLayout(bar); lay.addWidget(split, 1)
+
+        self.enable_chk.toggled.connect(self.toggled)
+        self.reset_btn.clicked.connect(self.reset)
+        self.dump_btn.clicked.connect(self.on_dump)
+        self.table.itemSelectionChanged.connect(self.refresh_hist)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+
+    def reset(self):
+        self.lat.reset()
+        self.refresh()
+
+    def on_dump(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Dump latency histograms", "latency.json", "JSON (*.json)")
+        if not path: return
+        try:
+            self.lat.dump(path)
+            self.ui_event.emit(f"Latency histograms written to {path}")
+        except OSError as e:
+            self.ui_event.emit(f"Latency dump failed: {e}")
+
+    def _selected_phase(self):
+        rows = self.table.selectionModel().selectedRows()
+        return self.table.item(rows[0].row(), 0).text() if rows else None
+
+    def refresh(self):
+        if not self.isVisible(): return
+        sel = self._selected_phase()
+        rows = self.lat.summary()
+        self.table.setRowCount(len(rows))
+        for r, (phase, n, *us) in enumerate(rows):
+            for c, text in enumerate((phase, str(n), *(f"{v:.1f}" for v in us))):
+                item = self.table.item(r, c)
+                if item is None: self.table.setItem(r, c, QtWidgets.QTableWidgetItem(text))
+                else: item.setText(text)
+            if phase == sel and not self.table.item(r, 0).isSelected(): self.table.selectRow(r)
+        since = time.strftime("%H:%M:%S", time.localtime(self.lat.t_reset))
+        self.info.setText(f"recording, counts since {since}" if self.lat.enabled else f"off, counts since {since}")
+        self.refresh_hist()
+
+    def refresh_hist(self):
+        h = self.lat.hists.get(self._selected_phase())
+        if h is None or not h.count:
+            self.hist_curve.setData([], []); return
+        used = [b for b, n in enumerate(h.bins) if n]
+        lo, hi = used[0], used[-1] + 1
+        edges = np.array([bin_edges(b)[0] for b in range(lo, hi)] + [bin_edges(hi - 1)[1]], dtype=float) / 1e3
+        counts = np.array(h.bins[lo:hi], dtype=float)
+        self.hist_curve.setData(np.maximum(edges, 1e-3), counts)
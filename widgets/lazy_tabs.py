@@ -0,0 +1,30 @@
+# widgets/lazy_tabs.py
+from PyQt6 import QtCore, QtWidgets
+
+class LazyTabs(QtCore.QObject):
+    # Adds empty pages to a QTabWidget and fills each one the first time it becomes the current
+    # tab. Nothing is built until release() is called, so the window can paint before the
+    # plotting stack is even imported.
+    def __init__(self, tabs: QtWidgets.QTabWidget, parent=None):
+        super().__init__(parent)
+        self.tabs = tabs
+        self._pending = {}  # page -> build(layout)
+        self._held = True
+        self.tabs.currentChanged.connect(lambda _: self._held or self.ensure(self.tabs.currentWidget()))
+
+    def add(self, title: str, build) -> QtWidgets.QWidget:
+        page = QtWidgets.QWidget(); QtWidgets.QVBoxLayout(page)
+        self._pending[page] = build
+        self.tabs.addTab(page, title)
+        return page
+
+    def is_built(self, page: QtWidgets.QWidget) -> bool:
+        return page not in self._pending
+
+    def ensure(self, page: QtWidgets.QWidget):
+        build = self._pending.pop(page, None)
+        if build: build(page.layout())
+
+    def release(self):
+        self._held = False
+        self.ensure(self.tabs.currentWidget())
@@ -0,0 +1,85 @@
+# widgets/link_stats.py
+from PyQt6 import QtCore, QtWidgets
+from ondosense.link import char_time, TURNAROUND_CHARS
+
+class LinkStatsPanel(QtWidgets.QWidget):
+    # Link budget for the current selector and baud next to what is actually achieved, with
+    # losses split by where they happen: link (timeouts), host (missed polls) and sensor
+    # (meas_count gaps). Refreshes on its own 2 Hz timer while visible.
+    def __init__(self, worker, parent=None):
+        super().__init__(parent)
+        self.worker = worker
+        self.labels = {}
+
+        def group(title, rows):
+            box = QtWidgets.QGroupBox(title); form = QtWidgets.QFormLayout(box)
+            for key, text in rows:
+                self.labels[key] = QtWidgets.QLabel("—"); form.addRow(text, self.labels[key])
+            return box
+
+        budget = group("Link budget", (("baud", "Baud:"), ("bytes", "Bytes per poll:"), ("wire", "Wire time per poll:"),
+                                       ("max", "Max sustainable rate:"), ("rate", "Requested rate:")))
+        achieved = group("Achieved", (("polls", "Polls/s:"), ("frames", "Frames/s:"), ("meas", "Sensor measurements/s:"),
+                                      ("timeouts", "Timeouts (link):"), ("garbled", "Garbled / resynced (link):"),
+                                      ("missed", "Missed polls (host):"),
+                                      ("skipped", "Skipped measurements (sensor):"), ("repeats", "Repeated measurements:"),
+                                      ("count", "Meas count:")))
+        self.clamp_chk = QtWidgets.QCheckBox("Clamp rate to link budget")
+        self.clamp_chk.setToolTip("Off: warn in the log when the rate is more than the link can carry\nOn: lower the rate to the budget")
+        self.reset_btn = QtWidgets.QPushButton("Reset counters")
+        self.verdict = QtWidgets.QLabel(""); self.verdict.setWordWrap(True)
+
+        row = QtWidgets.QHBoxLayout(); row.addWidget(budget); row.addWidget(achieved)
+        bar = QtWidgets.QHBoxLayout(); bar.addWidget(self.clamp_chk); bar.addStretch(1); bar.addWidget(self.reset_btn)
+        lay = QtWidgets.QVBoxLayout(self)
+        lay.addLayout(row); lay.addWidget(self.verdict); lay.addLayout(bar); lay.addStretch(1)
+
+        self.clamp_chk.setChecked(worker.cfg["rate_limit"] == "clamp")
+        self.reset_btn.clicked.connect(self.reset)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+        self.refresh()
+
+    def reset(self):
+        self.worker.link.stats.reset()
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible(): return
+        link = self.worker.link; cfg = link.cfg
+        tx, rx = link.poll_bytes(); mx = link.max_rate()
+        st = link.stats.snapshot()
+        free = cfg["acq_mode"] == "free"
+        known = link.sizes_known()  # else mx counts IQ/spectrum as empty
+        over = not free and known and cfg["rate_hz"] > mx
+        L = self.labels
+        L["baud"].setText(str(cfg["baud"]))
+        L["bytes"].setText(f"{tx} + {rx}" + (" (largest seen)" if link.counts else ""))
+        L["wire"].setText(f"{(tx + rx + 2 * TURNAROUND_CHARS) * char_time(cfg['baud']) * 1e3:.2f} ms")
+        L["max"].setText(f"{mx:.1f} Hz" if known else "? (waiting for the first IQ/spectrum frame)")
+        L["rate"].setText("free-run" if free else f"{cfg['rate_hz']:.1f} Hz ({cfg['acq_mode']})" + ("  ⚠ over budget" if over else ""))
+        L["rate"].setStyleSheet("color: #c0392b" if over else "")
+        L["polls"].setText(f"{st['polls_hz']:.1f}")
+        L["frames"].setText(f"{st['frames_hz']:.1f}")
+        L["meas"].setText("—" if st["meas_count"] is None else f"{st['meas_hz']:.1f}")
+        pct = lambda n: f"{n} ({100.0 * n / st['polls']:.1f} %)" if st["polls"] else str(n)
+        L["timeouts"].setText(pct(st["timeouts"]))
+        L["garbled"].setText(f"{st['garbled']} / {st['resynced']}")
+        L["missed"].setText(str(st["missed"]))
+        L["skipped"].setText(str(st["skipped"]))
+        L["repeats"].setText(pct(st["repeats"]))
+        L["count"].setText("—" if st["meas_count"] is None else str(st["meas_count"]))
+        self.verdict.setText(self._verdict(st, over))
+
+    @staticmethod
+    def _verdict(st: dict, over: bool) -> str:
+        if not st["polls"]: return "No polls yet."
+        why = []
+        if over: why.append("requested rate is above what the baud can carry: raise the baud or select less data")
+        if st["timeouts"]: why.append(f"link: {st['timeouts']} responses missing or cut short (wiring, baud, margin)")
+        if st["garbled"]: why.append(f"link: {st['garbled']} responses garbled (noise, termination, baud)")
+        if st["missed"]: why.append(f"host: {st['missed']} polls could not be issued on time")
+        if st["skipped"]: why.append(f"sensor: {st['skipped']} measurements made but never fetched (polling slower than the sensor)")
+        return "; ".join(why) if why else "No data lost."
@@ -0,0 +1,23 @@
+# widgets/lod_curve.py
+from PyQt6 import QtCore
+import numpy as np
+
+class LodCurve(QtCore.QObject):
+    # Draws a LodSeries at about one min/max pair per pixel of the visible x range. While the
+    # x axis follows the data the whole history is queried; once the user zooms or pans, only
+    # the visible range is, down to the raw samples. render() is the RenderScheduler hook.
+    def __init__(self, plot, series, pen=None):
+        super().__init__(plot)
+        self.series = series
+        self.vb = plot.getViewBox()
+        self.curve = plot.plot(pen=pen, skipFiniteCheck=True)
+        self.vb.sigXRangeChanged.connect(self._on_range)
+        self.vb.sigResized.connect(self._on_range)
+
+    def _on_range(self, *_):
+        if not self.vb.autoRangeEnabled()[0]: self.render()
+
+    def render(self):
+        if self.vb.autoRangeEnabled()[0]: x0, x1 = -np.inf, np.inf
+        else: x0, x1 = self.vb.viewRange()[0]
+        self.curve.setData(*self.series.query(x0, x1, max(100, int(self.vb.width()))))
@@ -0,0 +1,81 @@
+# widgets/log_view.py
+from PyQt6 import QtCore, QtWidgets
+from ondosense.eventlog import CATEGORIES, LEVEL_NAMES, WARNING, format_record
+
+class LogView(QtWidgets.QWidget):
+    # Viewer for an EventLog. Pending records are appended as one block per flush tick instead
+    # of one appendPlainText per message, and the text keeps at most max_blocks lines. The bar
+    # sets the level and categories (applied when a message is posted), hex TX/RX tracing and a
+    # rotating log file.
+    trace_toggled = QtCore.pyqtSignal(bool)  # for SerialWorker.set_trace
+
+    def __init__(self, events, max_blocks: int = 5000, flush_ms: int = 200, parent=None):
+        super().__init__(parent)
+        self.events = events
+        self.max_blocks = max_blocks
+
+        self.level_cb = QtWidgets.QComboBox()
+        for level, name in LEVEL_NAMES.items(): self.level_cb.addItem(name.capitalize(), level)
+        self.level_cb.setCurrentIndex(self.level_cb.findData(events.level))
+        self.cat_btn = QtWidgets.QToolButton(); self.cat_btn.setText("Categories")
+        self.cat_btn.setPopupMode(QtWidgets.QToolButton.ToolButtonPopupMode.InstantPopup)
+        menu = QtWidgets.QMenu(self.cat_btn)
+        for cat, what in CATEGORIES.items():
+            if cat == "trace": continue
+            act = menu.addAction(f"{cat} ({what})"); act.setCheckable(True); act.setChecked(events.enabled[cat])
+            act.toggled.connect(lambda on, cat=cat: self.events.enabled.__setitem__(cat, on))
+        self.cat_btn.setMenu(menu)
+        self.trace_chk = QtWidgets.QCheckBox("Trace TX/RX")
+        self.trace_chk.setToolTip("Log hex dumps of command frames; they are not even formatted while this is off")
+        self.file_btn = QtWidgets.QPushButton("Log to file…"); self.file_btn.setCheckable(True)
+        self.clear_btn = QtWidgets.QPushButton("Clear")
+        self.text = QtWidgets.QPlainTextEdit(); self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(max_blocks); self.text.setUndoRedoEnabled(False)
+
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(QtWidgets.QLabel("Log")); bar.addStretch(1)
+        bar.addWidget(QtWidgets.QLabel("Level:")); bar.addWidget(self.level_cb); bar.addWidget(self.cat_btn)
+        bar.addWidget(self.trace_chk); bar.addWidget(self.file_btn); bar.addWidget(self.clear_btn)
+        lay = QtWidgets.QVBoxLayout(self); lay.setContentsMargins(0, 0, 0, 0)
+        lay.addLayout(bar); lay.addWidget(self.text)
+
+        self.level_cb.currentIndexChanged.connect(lambda _: setattr(self.events, "level", self.level_cb.currentData()))
+        self.trace_chk.toggled.connect(self.on_trace_toggled)
+        self.file_btn.toggled.connect(self.on_file_toggled)
+        self.clear_btn.clicked.connect(self.text.clear)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(flush_ms)
+
+    def on_trace_toggled(self, on: bool):
+        self.events.enabled["trace"] = on
+        self.trace_toggled.emit(on)
+
+    def on_file_toggled(self, on: bool):
+        if not on:
+            self.events.close_file(); self.file_btn.setToolTip(""); return
+        default = QtCore.QDateTime.currentDateTime().toString("'ondosense_'yyyyMMdd_HHmmss'.log'")
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Log to file", default, "Log (*.log)")
+        if path:
+            try:
+                self.events.open_file(path)
+                self.file_btn.setToolTip(f"{path} (rotates at 5 MB, 3 backups)")
+                self.events.post(f"Logging to {path}")
+                return
+            except OSError as e:
+                self.events.post(f"Log file not opened: {e}", WARNING)
+        self.file_btn.blockSignals(True); self.file_btn.setChecked(False); self.file_btn.blockSignals(False)
+
+    def flush(self):
+        recs, dropped = self.events.drain()
+        if not recs and not dropped: return
+        lines = [f"… {dropped} messages dropped (log ring full)"] if dropped else []
+        if len(recs) > self.max_blocks:
+            lines.append(f"… {len(recs) - self.max_blocks} messages not shown"); recs = recs[-self.max_blocks:]
+        lines.extend(map(format_record, recs))
+        self.text.appendPlainText("\n".join(lines))  # one layout pass; follows the end if it was there
+
+    def toPlainText(self) -> str:
+        self.flush()
+        return self.text.toPlainText()
@@ -59,6 +59,7 @@ class ParamTable(QtWidgets.QWidget):
     request_read_min  = pyqtSignal(int)
     request_read_max  = pyqtSignal(int)
     request_write     = pyqtSignal(int, int)
+    request_batch     = pyqtSignal(list)   # [(cmd, pid[, value])], answered by apply_batch
     request_save      = pyqtSignal()
     request_autos_amp = pyqtSignal()
     request_bg_cal    = pyqtSignal()
@@ -167,18 +168,32 @@ class ParamTable(QtWidgets.QWidget):
                 if mx is not None: self.table.item(r,4).setText(str(mx))
                 break
 
+    def clear_values(self):
+        self.table.setUpdatesEnabled(False)
+        for r in range(self.table.rowCount()):
+            self.table.item(r, 3).setText("—"); self.table.item(r, 4).setText("—"); self.table.item(r, 5).setText("")
+        self.table.setUpdatesEnabled(True)
+
+    def apply_batch(self, results: list):
+        # results of a request_batch: [(cmd, pid, status, value)]; one repaint for the whole table
+        rows = {p.pid: r for r, p in enumerate(PARAMS)}
+        col = {CMD_READ_PARAM: 5, CMD_READ_MIN: 3, CMD_READ_MAX: 4}
+        self.table.setUpdatesEnabled(False)
+        try:
+            for cmd, pid, status, value in results:
+                if value is None or cmd not in col or pid not in rows: continue
+                self.table.item(rows[pid], col[cmd]).setText(str(value))
+        finally:
+            self.table.setUpdatesEnabled(True)
+
     def _read_selected(self):
-        for r in self.rows_selected():
-            self.request_read.emit(self.pid_at(r))
+        self.request_batch.emit([(CMD_READ_PARAM, self.pid_at(r)) for r in self.rows_selected()])
 
     def _read_all(self):
-        for p in PARAMS:
-            self.request_read.emit(p.pid)
+        self.request_batch.emit([(CMD_READ_PARAM, p.pid) for p in PARAMS])
 
     def _read_limits_all(self):
-        for p in PARAMS:
-            self.request_read_min.emit(p.pid)
-            self.request_read_max.emit(p.pid)
+        self.request_batch.emit([(cmd, p.pid) for p in PARAMS for cmd in (CMD_READ_MIN, CMD_READ_MAX)])
 
     def _write_selected(self):
         for r in self.rows_selected():
@@ -0,0 +1,35 @@
+# widgets/render_scheduler.py
+from PyQt6 import QtCore, QtWidgets
+
+class RenderScheduler(QtCore.QObject):
+    # Repaints at a fixed display rate. Each channel has a drain() that pulls whatever arrived
+    # since the last tick (returns True if anything did) and a render() that redraws it.
+    # drain() always runs so histories stay complete; render() only runs for the visible tab,
+    # and only once ready(tab) says its widgets exist.
+    def __init__(self, tabs: QtWidgets.QTabWidget, fps: float = 30.0, parent=None, ready=None):
+        super().__init__(parent)
+        self.tabs = tabs
+        self.ready = ready or (lambda tab: True)
+        self._channels = []  # [tab, drain, render, dirty]
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+        self.tabs.currentChanged.connect(lambda _: self.tick())
+        self.set_fps(fps)
+
+    def add(self, tab: QtWidgets.QWidget, drain, render):
+        self._channels.append([tab, drain, render, False])
+
+    def set_fps(self, fps: float):
+        self.timer.start(max(1, int(1000.0 / max(1.0, float(fps)))))
+
+    @QtCore.pyqtSlot()
+    def tick(self):
+        cur = self.tabs.currentWidget()
+        if not self.ready(cur): cur = None
+        for ch in self._channels:
+            tab, drain, render, dirty = ch
+            if drain(): dirty = True
+            if dirty and tab is cur:
+                render(); dirty = False
+            ch[3] = dirty
@@ -0,0 +1,149 @@
+# widgets/sensor_panel.py
+from PyQt6 import QtCore, QtWidgets
+import time
+import pyqtgraph as pg
+from ondosense.protocol import *
+from ondosense.series import RingSeries
+
+class SensorPanel(QtWidgets.QWidget):
+    # Combined dashboard for a SensorManager: add/remove sensors, overlaid distance traces,
+    # a status row per sensor and aggregate throughput. drain()/render() are driven by the
+    # window's RenderScheduler; the status grid refreshes on its own 2 Hz timer.
+    COLS = ["Sensor", "Port", "Baud", "State", "Frames", "Rate", "Missed", "Distance (m)", "Last frame"]
+
+    def __init__(self, manager, history: int = 10_000, parent=None):
+        super().__init__(parent)
+        self.mgr = manager
+        self.history = history
+        self.t0 = time.time()
+        self.series = {}; self.curves = {}; self.rows = {}
+
+        self.port_cb = QtWidgets.QComboBox(); self.port_cb.setEditable(True); self.port_cb.setMinimumWidth(140)
+        self.baud_sb = QtWidgets.QSpinBox(); self.baud_sb.setRange(9600, 921600); self.baud_sb.setValue(19200); self.baud_sb.setSingleStep(9600)
+        self.rate_ds = QtWidgets.QDoubleSpinBox(); self.rate_ds.setRange(0.5, 2000); self.rate_ds.setValue(10.0); self.rate_ds.setSuffix(" Hz")
+        self.acq_cb = QtWidgets.QComboBox()
+        for label, mode in (("Deadline", "deadline"), ("Free-run", "free"), ("Timer", "timer")): self.acq_cb.addItem(label, mode)
+        self.sel_sb = QtWidgets.QSpinBox(); self.sel_sb.setRange(1, 1023); self.sel_sb.setValue(SEL_DISTANCE)
+        self.sel_sb.setToolTip("Result Data Selector written on connect")
+        self.add_btn = QtWidgets.QPushButton("Add")
+        self.remove_btn = QtWidgets.QPushButton("Remove")
+        self.start_btn = QtWidgets.QPushButton("Start all")
+        self.stop_btn = QtWidgets.QPushButton("Stop all")
+
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(QtWidgets.QLabel("Port:")); bar.addWidget(self.port_cb)
+        bar.addWidget(QtWidgets.QLabel("Baud:")); bar.addWidget(self.baud_sb)
+        bar.addWidget(QtWidgets.QLabel("Rate:")); bar.addWidget(self.rate_ds)
+        bar.addWidget(QtWidgets.QLabel("Acq:")); bar.addWidget(self.acq_cb)
+        bar.addWidget(QtWidgets.QLabel("Selector:")); bar.addWidget(self.sel_sb)
+        bar.addWidget(self.add_btn); bar.addWidget(self.remove_btn)
+        bar.addStretch(1)
+        bar.addWidget(self.start_btn); bar.addWidget(self.stop_btn)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.COLS))
+        self.table.setHorizontalHeaderLabels(self.COLS)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+
+        self.plot = pg.PlotWidget(title="Distance (m), all sensors"); self.plot.showGrid(x=True, y=True, alpha=0.2)
+        self.plot.setLabel("bottom", "time", "s"); self.plot.addLegend()
+        self.plot.setDownsampling(auto=True, mode="peak"); self.plot.setClipToView(True)
+        self.totals = QtWidgets.QLabel("No sensors")
+
+        split = QtWidgets.QSplitter(QtCore.Qt.Orientation.Vertical)
+        split.addWidget(self.plot); split.addWidget(self.table); split.setStretchFactor(0, 3)
+        lay = QtWidgets.QVBoxLayout(self)
+        lay.addLayout(bar); lay.addWidget(split, 1); lay.addWidget(self.totals)
+
+        self.add_btn.clicked.connect(self.on_add)
+        self.remove_btn.clicked.connect(self.on_remove)
+        self.start_btn.clicked.connect(self.mgr.start_all)
+        self.stop_btn.clicked.connect(self.mgr.stop_all)
+        self.mgr.sensor_added.connect(self._on_added)
+        self.mgr.sensor_removed.connect(self._on_removed)
+        self.mgr.sensor_state.connect(lambda sid, ok, msg: self.refresh_status())
+
+        self.status_timer = QtCore.QTimer(self)
+        self.status_timer.timeout.connect(self.refresh_status)
+        self.status_timer.start(500)
+        for sid in self.mgr.sensors: self._on_added(sid)
+
+    def set_ports(self, ports: list):
+        cur = self.port_cb.currentText()
+        self.port_cb.clear(); self.port_cb.addItems(ports)
+        self.port_cb.setCurrentText(cur or (ports[0] if ports else ""))
+
+    def on_add(self):
+        port = self.port_cb.currentText().strip()
+        if not port: return
+        if any(s.cfg["port"] == port for s in self.mgr.sensors.values()): return
+        self.mgr.add(dict(port=port, baud=int(self.baud_sb.value()), rate_hz=float(self.rate_ds.value()),
+                          acq_mode=self.acq_cb.currentData(), selector=int(self.sel_sb.value()), auto_write_selector=True))
+
+    def on_remove(self):
+        rows = {i.row() for i in self.table.selectedIndexes()}
+        for sid, r in list(self.rows.items()):
+            if r in rows: self.mgr.remove(sid)
+
+    def _on_added(self, sid: int):
+        s = self.mgr.sensors[sid]
+        self.series[sid] = RingSeries(self.history)
+        self.curves[sid] = self.plot.plot(pen=pg.mkPen(pg.intColor(sid - 1, hues=8), width=2), name=s.name, skipFiniteCheck=True)
+        self._rebuild_rows()
+
+    def _on_removed(self, sid: int):
+        self.series.pop(sid, None)
+        c = self.curves.pop(sid, None)
+        if c is not None: self.plot.removeItem(c)
+        self._rebuild_rows()
+
+    def _rebuild_rows(self):
+        self.rows = {sid: r for r, sid in enumerate(self.mgr.sensors)}
+        self.table.setRowCount(len(self.rows))
+        for sid, r in self.rows.items():
+            for c in range(len(self.COLS)): self.table.setItem(r, c, QtWidgets.QTableWidgetItem(""))
+        self.refresh_status()
+
+    def set_history(self, n: int):
+        self.history = n
+        for series in self.series.values(): series.resize(n)
+
+    def clear(self):
+        self.t0 = time.time()
+        for sid, series in self.series.items():
+            series.clear(); self.mgr.sensors[sid].dist.clear(); self.curves[sid].setData([])
+
+    # -------- render scheduler channel --------
+    def drain(self) -> bool:
+        got = False
+        for sid, s in self.mgr.sensors.items():
+            batch = s.dist.drain()
+            if not batch: continue
+            ts, ds = zip(*batch)
+            self.series[sid].extend([t - self.t0 for t in ts], ds); got = True
+        return got
+
+    def render(self):
+        for sid, curve in self.curves.items():
+            curve.setData(*self.series[sid].view())
+
+    # -------- status grid --------
+    def refresh_status(self):
+        if not self.isVisible() and self.rows: return
+        st = self.mgr.stats()
+        for sid, p in st["sensors"].items():
+            r = self.rows.get(sid)
+            if r is None: continue
+            cfg = self.mgr.sensors[sid].cfg
+            age = p["age_s"]
+            cells = (p["name"], cfg["port"], str(cfg["baud"]),
+                     "connected" if p["connected"] else (self.mgr.sensors[sid].msg or "idle"),
+                     str(p["frames"]), f"{p['rate_hz']:.1f} Hz", str(p["missed"]),
+                     "—" if p["distance"] is None else f"{p['distance']:.4f}",
+                     "—" if age is None else f"{age:.1f} s ago")
+            for c, text in enumerate(cells): self.table.item(r, c).setText(text)
+        n = len(st["sensors"])
+        self.totals.setText(f"{st['connected']}/{n} connected, {st['rate_hz']:.1f} frames/s total, "
+                            f"{st['frames']} frames, {st['missed']} missed polls" if n else "No sensors")
@@ -0,0 +1,69 @@
+# widgets/waterfall.py
+from PyQt6 import QtCore, QtWidgets
+import numpy as np
+import pyqtgraph as pg
+
+class WaterfallPanel(QtWidgets.QWidget):
+    # Spectrogram of the last N spectra: one ImageItem drawn straight from a RingImage of the
+    # uint8 magnitudes. With a 256-entry colour table and no float levels pyqtgraph wraps the
+    # ring's view in an indexed QImage without converting it, so a display tick costs the rows
+    # written since the last one plus the paint, not the whole history. x is distance
+    # (bin frequency / Hz per m), y is frames before the newest (0 at the top).
+    def __init__(self, ring, parent=None):
+        super().__init__(parent)
+        self.ring = ring
+        self.meta = None; self._rect_key = None
+
+        self.hzpm_ds = QtWidgets.QDoubleSpinBox(); self.hzpm_ds.setRange(1.0, 1e7); self.hzpm_ds.setDecimals(1)
+        self.hzpm_ds.setValue(2000.0); self.hzpm_ds.setSuffix(" Hz/m")
+        self.hzpm_ds.setToolTip("Beat frequency per metre of distance: a Peak frequency divided by the Distance of the same frame")
+        self.rows_sb = QtWidgets.QSpinBox(); self.rows_sb.setRange(100, 100_000); self.rows_sb.setSingleStep(500)
+        self.rows_sb.setValue(ring.rows)
+        self.levels_btn = QtWidgets.QPushButton("Auto levels")
+        self.levels_btn.setToolTip("Stretch the colours over the 1st..99.5th percentile of the history")
+        self.full_btn = QtWidgets.QPushButton("Full range")
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(QtWidgets.QLabel("Scale:")); bar.addWidget(self.hzpm_ds)
+        bar.addWidget(QtWidgets.QLabel("Rows:")); bar.addWidget(self.rows_sb)
+        bar.addStretch(1); bar.addWidget(self.levels_btn); bar.addWidget(self.full_btn)
+
+        self.plot = pg.PlotWidget(title="Waterfall")
+        self.plot.setLabel("bottom", "distance", "m"); self.plot.setLabel("left", "frames ago")
+        self.image = pg.ImageItem(axisOrder="row-major")
+        self.image.setLookupTable(pg.colormap.get("viridis").getLookupTable(nPts=256, alpha=False))
+        self.image.setLevels(None)
+        self.plot.addItem(self.image)
+
+        lay = QtWidgets.QVBoxLayout(self)
+        lay.addLayout(bar); lay.addWidget(self.plot, 1)
+
+        self.hzpm_ds.valueChanged.connect(lambda _: self.render())
+        self.rows_sb.editingFinished.connect(self.on_rows_changed)
+        self.levels_btn.clicked.connect(self.auto_levels)
+        self.full_btn.clicked.connect(lambda: self.image.setLevels(None))
+
+    def on_rows_changed(self):
+        self.ring.resize(self.rows_sb.value())
+        self.render()
+
+    def auto_levels(self):
+        n = min(len(self.ring), self.ring.rows)
+        if not n or not self.ring.width: return
+        lo, hi = np.percentile(self.ring.view()[self.ring.rows - n:], (1.0, 99.5))
+        self.image.setLevels((float(lo), float(max(hi, lo + 1))))
+
+    def clear(self):
+        self.ring.clear(); self.meta = None
+        self.image.clear(); self._rect_key = None
+
+    def render(self, meta: dict | None = None):
+        # meta: the newest spectrum's header (count, maxHz, dHz); None keeps the last one
+        if meta is not None: self.meta = meta
+        if not self.ring.width or self.meta is None: return
+        self.image.setImage(self.ring.view(), autoLevels=False)
+        m = self.meta; hzpm = self.hzpm_ds.value()
+        key = (m["count"], m["maxHz"], m["dHz"], hzpm, self.ring.rows, self.ring.width)
+        if key != self._rect_key:  # axis only changes with the spectrum layout, scale or depth
+            self._rect_key = key
+            f0 = m["maxHz"] - (m["count"] - 1) * m["dHz"] - m["dHz"] / 2
+            self.image.setRect(QtCore.QRectF(f0 / hzpm, -self.ring.rows, self.ring.width * m["dHz"] / hzpm, self.ring.rows))